@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
 import os
 import cv2
 import numpy as np
@@ -18,6 +18,9 @@ import sys
 from pathlib import Path
 import time
 import math
+import threading
+import contextlib
+import itertools
 
 # Import Inference Pipeline for custom hockey player detection
 try:
@@ -40,17 +43,104 @@ except ImportError:
     BYTETRACKER_AVAILABLE = False
     print("Warning: ByteTracker not available. Install with: pip install ultralytics supervision")
 
+from job_queue import JobQueue, QueueFullError
+from pose_helpers import DEFAULT_POSE_OPTIONS, JOINT_NAMES, array_to_landmarks, roi_landmarks_to_frame, draw_pose_overlay
+from sharded_analysis import run_sharded_pose
+from frame_pipeline import FramePipeline, StreamStage, iter_video_frames
+from model_registry import ModelRegistry
+from pose_pool import PosePool
+from landmark_cache import LandmarkCache
+from landmark_store import LandmarkStore, NUM_LANDMARKS
+from metrics_output import MetricsWriter
+from metrics_engine import MetricsEngine, GOALIE_METRICS, GOALIE_LIVE_METRICS, SPEED_METRICS
+from skeleton_renderer import FULL_SKELETON, SIMPLE_SKELETON, blank_frame
+from video_encoder import VideoEncoder
+from content_store import UploadStore, ResultStore, file_sha256, known_sha256
+from chunked_upload import ChunkedUploads, UploadError, UploadOffsetError
+from live_preview import PreviewHub
+from frame_index import FrameReader
+from detection_service import DetectionService, DetectionError
+from player_tracking import init_tracking, update_tracking, iter_tracked
+
 app = Flask(__name__, static_folder='static')
 print("🚀 FLASK APP STARTING WITH PERFORMANCE OPTIMIZATIONS! 🚀")
 print("   Debug mode disabled for speed, threaded for efficiency")
-app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # Reduced to 100MB for better performance
+app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # Per request; large videos arrive as chunked uploads
+app.config['CHUNKED_UPLOAD_MAX_BYTES'] = int(os.environ.get('UPLOAD_MAX_GB', '20')) * 1024 * 1024 * 1024
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'outputs'
+app.config['LANDMARK_CACHE_FOLDER'] = os.path.join('cache', 'landmarks')
+app.config['LANDMARK_CACHE_MAX_BYTES'] = int(os.environ.get('LANDMARK_CACHE_MB', '2048')) * 1024 * 1024
+app.config['RESULT_INDEX_FOLDER'] = os.path.join('cache', 'results')
+app.config['KEYFRAME_INDEX_FOLDER'] = os.path.join('cache', 'keyframes')
+app.config['METRICS_FORMAT'] = os.environ.get('METRICS_FORMAT', 'csv')  # csv, or parquet/arrow with CSV rendered on download
+app.config['TABLE_FLUSH_FRAMES'] = int(os.environ.get('TABLE_FLUSH_FRAMES', '256'))  # Poses per metrics table write
+app.config['ANALYSIS_SHARDS'] = int(os.environ.get('ANALYSIS_SHARDS', '1'))  # Processes per video
+app.config['MAX_ANALYSIS_SHARDS'] = int(os.environ.get('MAX_ANALYSIS_SHARDS', os.cpu_count() or 1))  # Per-request ceiling
+app.config['TRACKING_BATCH'] = int(os.environ.get('TRACKING_BATCH', '8'))  # Frames per detector call
+app.config['TRACKING_STRIDE'] = int(os.environ.get('TRACKING_STRIDE', '1'))  # Detect every Nth frame, flow in between
+app.config['LANDMARKS_MAX_SECONDS'] = float(os.environ.get('LANDMARKS_MAX_SECONDS', '60'))  # Longest /landmarks window
+app.config['ROI_PADDING'] = float(os.environ.get('ROI_PADDING', '0.2'))  # Pose crop margin, fraction of box size
+app.config['VIDEO_ENCODER'] = os.environ.get('VIDEO_ENCODER', 'auto')  # ffmpeg (H.264), opencv (mp4v), or auto
+app.config['VIDEO_CODEC'] = os.environ.get('VIDEO_CODEC', 'auto')  # libx264, libopenh264, or auto
+app.config['VIDEO_PRESET'] = os.environ.get('VIDEO_PRESET', 'veryfast')  # x264 preset
+app.config['VIDEO_CRF'] = int(os.environ.get('VIDEO_CRF', '23'))  # x264 quality, lower is better
+app.config['VIDEO_THREADS'] = int(os.environ.get('VIDEO_THREADS', '0'))  # Encoder threads, 0 = ffmpeg's choice
 
 # Ensure directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
 
+# Shared inference models: loaded and warmed once per process, not per request
+model_registry = ModelRegistry()
+if BYTETRACKER_AVAILABLE:
+    model_registry.register(
+        'yolov8n',
+        lambda: YOLO('yolov8n.pt'),
+        warmup=lambda model: model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+    )
+
+# Reusable MediaPipe Pose graphs, bounded per configuration and reset between jobs
+pose_pool = PosePool(max_per_config=int(os.environ.get('POSE_POOL_SIZE', os.environ.get('ANALYSIS_WORKERS', '2'))))
+
+# Pose landmarks persisted per (video content, pose settings, stride) so re-analysis skips inference
+landmark_cache = LandmarkCache(app.config['LANDMARK_CACHE_FOLDER'], app.config['LANDMARK_CACHE_MAX_BYTES'])
+
+# Uploads stored once per content hash (filenames are aliases), with finished analyses indexed by content
+upload_store = UploadStore(app.config['UPLOAD_FOLDER'])
+metrics_writer = MetricsWriter(app.config['METRICS_FORMAT'])
+# Every output video: browser-playable H.264 from an ffmpeg process when available, OpenCV mp4v otherwise
+video_encoder = VideoEncoder(app.config['VIDEO_ENCODER'], app.config['VIDEO_CODEC'], app.config['VIDEO_PRESET'],
+                             app.config['VIDEO_CRF'], app.config['VIDEO_THREADS'])
+print(f"🎞️ Video encoder: {video_encoder.codec or 'OpenCV mp4v'}")
+goalie_metrics = MetricsEngine(GOALIE_METRICS)
+live_metrics = MetricsEngine(GOALIE_METRICS + GOALIE_LIVE_METRICS + SPEED_METRICS)  # Reported in job progress while a pose pass runs
+result_store = ResultStore(app.config['RESULT_INDEX_FOLDER'], app.config['OUTPUT_FOLDER'], exists=metrics_writer.exists)
+
+# Resumable uploads streamed to disk in chunks, so file size is not bound by MAX_CONTENT_LENGTH or RAM
+chunked_uploads = ChunkedUploads(os.path.join(app.config['UPLOAD_FOLDER'], 'partial'), upload_store,
+                                 app.config['CHUNKED_UPLOAD_MAX_BYTES'])
+
+# Random frame access for player selection: keyframe index per video plus an LRU of decoded frames
+frame_reader = FrameReader(app.config['KEYFRAME_INDEX_FOLDER'],
+                           max_cache_bytes=int(os.environ.get('FRAME_CACHE_MB', '256')) * 1024 * 1024)
+if not shutil.which('ffprobe'):
+    print("⚠️ ffprobe not found - frame selection will seek without a keyframe index (slower on long videos)")
+
+# Person detection for the player-selection screen, cached per (content, frame, detector, threshold)
+detection_service = DetectionService(frame_reader, model_registry)
+
+# Live MJPEG previews of running jobs, rate-limited so they never hold up the analysis
+preview_hub = PreviewHub(max_fps=float(os.environ.get('PREVIEW_MAX_FPS', '5')))
+
+# Background analysis jobs: /analyze enqueues, a bounded pool of workers runs them
+job_queue = JobQueue(max_workers=int(os.environ.get('ANALYSIS_WORKERS', '2')),
+                     max_pending=int(os.environ.get('ANALYSIS_MAX_PENDING', '32')))
+
+# Warm models in the background at startup instead of on the first player-selection click
+if os.environ.get('PRELOAD_MODELS', '1') == '1':
+    threading.Thread(target=model_registry.preload, name='model-preload', daemon=True).start()
+
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
 
@@ -96,6 +186,10 @@ def index():
 def test_logo():
     return send_file('test_logo.html')
 
+def _index_in_background(video_path):
+    """Build the keyframe index right after upload so the first frame request does not wait for it"""
+    threading.Thread(target=frame_reader.index, args=(video_path,), name='keyframe-index', daemon=True).start()
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'video' not in request.files:
@@ -106,22 +200,91 @@ def upload_file():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        # Hashed while streaming to disk; identical content is stored once and reported as a duplicate
+        stored = upload_store.save_stream(file.stream, secure_filename(file.filename))
+        _index_in_background(stored['filepath'])
         
         return jsonify({
             'success': True,
-            'filename': filename,
-            'filepath': filepath
+            'filename': stored['filename'],
+            'filepath': stored['filepath'],
+            'content_hash': stored['content_hash'],
+            'duplicate': stored['duplicate']
         })
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+def _upload_error_response(e):
+    body = {'error': str(e)}
+    if isinstance(e, UploadOffsetError):
+        body['received'] = e.received
+    return jsonify(body), e.status
+
+@app.route('/upload/chunked', methods=['POST'])
+def start_chunked_upload():
+    """Open a resumable upload session: send ``filename`` and ``size``, then PUT the chunks"""
+    data = request.get_json() or {}
+    filename = data.get('filename', '')
+    if not filename or not allowed_file(filename):
+        return jsonify({'error': 'Invalid file type'}), 400
+    
+    try:
+        session = chunked_uploads.start(secure_filename(filename), int(data.get('size', 0)))
+    except UploadError as e:
+        return _upload_error_response(e)
+    return jsonify(session), 201
+
+@app.route('/upload/chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    """How many bytes of an upload have arrived; clients resume from ``received``"""
+    try:
+        return jsonify(chunked_uploads.status(upload_id))
+    except UploadError as e:
+        return _upload_error_response(e)
+
+@app.route('/upload/chunked/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """Append a raw chunk; ``offset`` must equal the bytes already received"""
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'offset query parameter is required'}), 400
+    
+    try:
+        session = chunked_uploads.write_chunk(upload_id, offset, request.stream)
+    except UploadError as e:
+        return _upload_error_response(e)
+    return jsonify({'upload_id': upload_id, 'received': session['received'], 'size': session['size']})
+
+@app.route('/upload/chunked/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    """Finish an upload once every byte has arrived; answers like /upload"""
+    try:
+        stored = chunked_uploads.complete(upload_id)
+    except UploadError as e:
+        return _upload_error_response(e)
+    _index_in_background(stored['filepath'])
+    
+    return jsonify({
+        'success': True,
+        'filename': stored['filename'],
+        'filepath': stored['filepath'],
+        'content_hash': stored['content_hash'],
+        'duplicate': stored['duplicate']
+    })
+
 @app.route('/analyze', methods=['POST'])
 def analyze_video():
+    """
+    Queue an analysis and return its job ID immediately
+    
+    Send ``analysis_types`` (a list) instead of ``analysis_type`` to run several
+    pose analyses from a single decode and pose pass over the video. An optional
+    ``bbox`` (x, y, w, h on the player-selection frame) restricts the pose
+    analyses to that player.
+    """
     data = request.get_json()
     analysis_type = data.get('analysis_type')
+    analysis_types = data.get('analysis_types')
     filename = data.get('filename')
     
     if not filename:
@@ -132,85 +295,639 @@ def analyze_video():
     if not os.path.exists(filepath):
         return jsonify({'error': 'File not found'}), 404
     
-    try:
-        if analysis_type == 'skeleton':
-            result = analyze_skeleton(filepath, filename)
-        elif analysis_type == 'goalie':
-            result = analyze_goalie(filepath, filename)
-        elif analysis_type == 'motion_capture':
-            result = analyze_motion_capture(filepath, filename)
-        elif analysis_type == 'speed':
-            result = analyze_speed(filepath, filename)
+    analyses = {
+        'skeleton': analyze_skeleton,
+        'goalie': analyze_goalie,
+        'motion_capture': analyze_motion_capture,
+        'speed': analyze_speed,
+    }
+    
+    if analysis_types:
+        if not isinstance(analysis_types, list) or any(t not in FAN_OUT_ANALYSES for t in analysis_types):
+            return jsonify({'error': f'analysis_types must be a list drawn from {list(FAN_OUT_ANALYSES)}'}), 400
+        if len(set(analysis_types)) == 1:
+            analysis_type = analysis_types[0]
         else:
-            return jsonify({'error': 'Invalid analysis type'}), 400
-        
-        return jsonify(result)
+            analysis_type = 'multi'
+    elif analysis_type not in analyses:
+        return jsonify({'error': 'Invalid analysis type'}), 400
     
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
+    # Sharded mode splits one video across processes; only the pose pass analyses support it
+    options = {}
+    if analysis_type in FAN_OUT_ANALYSES or analysis_type == 'multi':
+        try:
+            shards = int(data.get('shards', app.config['ANALYSIS_SHARDS']))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'shards must be an integer'}), 400
+        options['shards'] = min(max(1, shards), app.config['MAX_ANALYSIS_SHARDS'])
+        bbox = data.get('bbox')
+        if bbox is not None:
+            error = _selection_error(bbox, data.get('bbox_frame_width'))
+            if error:
+                return jsonify({'error': error}), 400
+            options['selection'] = _selection_to_video_pixels(filepath, bbox, data.get('bbox_frame_width'))
+    
+    if analysis_type == 'multi':
+        params = {'filename': filename, 'analysis_types': analysis_types, **options}
+        fn, args = analyze_multiple, (filepath, filename, analysis_types)
+        result_key = 'multi-' + '-'.join(sorted(set(analysis_types)))
+    else:
+        params = {'filename': filename, **options}
+        fn, args = analyses[analysis_type], (filepath, filename)
+        result_key = analysis_type
+    if options.get('selection'):
+        result_key += '-roi-' + '-'.join(str(v) for v in options['selection'])
+    
+    # Identical content analysed the same way before: answer from the stored result.
+    # The request never reads the video: an unknown hash is computed by the queued job instead
+    if analysis_type in FAN_OUT_ANALYSES or analysis_type == 'multi':
+        content_hash = known_sha256(filepath)
+        previous = None
+        if content_hash is not None and not data.get('force'):
+            previous = result_store.get(content_hash, result_key)
+        if previous is not None:
+            job = job_queue.add_completed(analysis_type, previous, params={**params, 'reused': True})
+            return jsonify({
+                'success': True,
+                'job_id': job.id,
+                'analysis_type': analysis_type,
+                'status_url': f'/jobs/{job.id}',
+                'reused': True
+            }), 202
+        fn, args = _remember_result, (content_hash, result_key, not data.get('force'), fn) + args
+    
+    preview = None
+    if analysis_type in FAN_OUT_ANALYSES or analysis_type == 'multi':
+        preview = preview_hub.create()
+        options['preview'] = preview
+    
+    try:
+        job = job_queue.submit(analysis_type, fn, *args, params=params, **options)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    response = {
+        'success': True,
+        'job_id': job.id,
+        'analysis_type': analysis_type,
+        'status_url': f'/jobs/{job.id}'
+    }
+    if preview is not None:
+        preview_hub.attach(job.id, preview)
+        response['preview_url'] = f'/jobs/{job.id}/preview'
+    return jsonify(response), 202
+
+def _remember_result(content_hash, result_key, reuse, fn, video_path, *args, **kwargs):
+    """
+    Run an analysis and index its result by content so identical uploads can reuse it
+    
+    With ``content_hash`` None the video is hashed here, on the worker, and a
+    stored result for it is returned instead of running again when ``reuse``.
+    """
+    if content_hash is None:
+        content_hash = file_sha256(video_path)
+        previous = result_store.get(content_hash, result_key) if reuse else None
+        if previous is not None:
+            return previous
+    result = fn(video_path, *args, **kwargs)
+    if result.get('success'):
+        result_store.put(content_hash, result_key, result)
+    return result
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report state, frames processed, throughput and ETA of a queued analysis"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Server-sent events stream of a job's progress
+    
+    Sends a ``progress`` event with the job snapshot (frames, stage timings,
+    fps, ETA) at most every ``interval`` seconds (default 0.5), and ends with a
+    ``completed`` or ``failed`` event carrying the final status. The analysis
+    itself never writes to the stream; snapshots are taken here.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    interval = min(5.0, max(0.2, request.args.get('interval', 0.5, type=float)))
+    
+    def stream():
+        last_payload = None
+        last_sent = time.time()
+        while True:
+            finished = job.wait(interval)
+            status = job.to_dict()
+            if finished:
+                yield f"event: {status['state']}\ndata: {json.dumps(status)}\n\n"
+                return
+            
+            payload = json.dumps(status)
+            if payload != last_payload:
+                yield f"event: progress\ndata: {payload}\n\n"
+                last_payload = payload
+                last_sent = time.time()
+            elif time.time() - last_sent > 15:
+                yield ": keep-alive\n\n"  # Stops proxies closing an idle (queued) stream
+                last_sent = time.time()
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<job_id>/preview')
+def job_preview(job_id):
+    """MJPEG stream of annotated frames while the job runs; use as an <img> src"""
+    job = job_queue.get(job_id)
+    preview = preview_hub.get(job_id)
+    if job is None or preview is None:
+        return jsonify({'error': 'No preview for this job'}), 404
+    
+    def stream():
+        for jpeg in preview.frames(is_done=lambda: job.finished):
+            yield (b'--frame\r\nContent-Type: image/jpeg\r\n'
+                   b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+    
+    return Response(stream(), mimetype='multipart/x-mixed-replace; boundary=frame',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs')
+def list_jobs():
+    """List known jobs without their result payloads"""
+    jobs = []
+    for job in job_queue.list():
+        status = job.to_dict()
+        status.pop('result', None)
+        jobs.append(status)
+    return jsonify(jobs)
+
+
+@app.route('/landmarks/<job_id>')
+def job_landmarks(job_id):
+    """
+    A window of a finished job's pose landmarks, e.g. /landmarks/<job>?start=754&end=756&joints=left_wrist,right_wrist
+    
+    ``start`` and ``end`` are seconds into the video and ``joints`` a
+    comma-separated subset of the joint names. A window is at most
+    LANDMARKS_MAX_SECONDS long: without ``end`` (or with one further away) it
+    ends that long after ``start``, and the response's ``start``/``end`` say
+    which window was served so long sessions can be paged. Landmark blocks are
+    memory-mapped, so only the requested window is read from disk.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    key = (job.result or {}).get('landmarks')
+    cached = landmark_cache.get(key) if key else None
+    if cached is None:
+        return jsonify({'error': 'No landmarks stored for this job'}), 404
+    header = landmark_cache.header(key) or {}
+    
+    joints = [j for j in request.args.get('joints', '').split(',') if j] or JOINT_NAMES
+    unknown = [j for j in joints if j not in JOINT_NAMES]
+    if unknown:
+        return jsonify({'error': f'Unknown joints: {unknown}'}), 400
+    
+    bounds = {}
+    for name in ('start', 'end'):
+        value = request.args.get(name)
+        if value is None:
+            continue
+        try:
+            bounds[name] = float(value)
+        except ValueError:
+            bounds[name] = math.nan
+        if not math.isfinite(bounds[name]) or bounds[name] < 0:
+            return jsonify({'error': f'{name} must be a non-negative number of seconds'}), 400
+    start = bounds.get('start', 0.0)
+    if bounds.get('end', start) < start:
+        return jsonify({'error': 'end must not be before start'}), 400
+    end = min(bounds.get('end', math.inf), start + app.config['LANDMARKS_MAX_SECONDS'])
+    
+    # Stored frame numbers are 1-based: frame n is shown at (n - 1) / fps seconds
+    fps = header.get('fps') or 30.0
+    window = LandmarkStore.from_arrays(*cached).window(int(start * fps) + 1, int(end * fps) + 1)
+    
+    indexes = [JOINT_NAMES.index(j) for j in joints]
+    return jsonify({
+        **header,
+        'joints': joints,
+        'start': start,
+        'end': end,
+        'frames': window.frames.tolist(),
+        'landmarks': window.landmarks[:, indexes].tolist()
+    })
 
-def analyze_goalie(video_path, filename):
-    """Goalie biomechanics analysis"""
-    output_video = f"goalie_annotated_{filename}"
-    output_csv = f"goalie_metrics_{filename.replace('.mp4', '.csv')}"
+class _PoseEstimator:
+    """
+    Pose inference stage backed by the landmark cache.
     
-    output_video_path = os.path.join(app.config['OUTPUT_FOLDER'], output_video)
-    output_csv_path = os.path.join(app.config['OUTPUT_FOLDER'], output_csv)
+    On a cache hit landmarks are served from disk and no Pose graph is checked
+    out; on a miss a pooled Pose graph is checked out on the first frame and
+    the detected landmarks are written to the cache once the whole video has
+    been posed. With a ``selection`` (the player's box in video pixels) pose
+    runs on the tracked box each frame instead of the whole frame.
     
-    # Initialize MediaPipe
-    pose = mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+    ``store`` holds every detected pose in frame order once the pass is done.
+    """
     
-    # Video setup
+    def __init__(self, video_path, pose_options=DEFAULT_POSE_OPTIONS, selection=None):
+        self.pose_options = pose_options
+        if selection is None:
+            self.cache_key = landmark_cache.key(video_path, pose_options)
+        else:
+            self.cache_key = landmark_cache.key(video_path, pose_options, roi={
+                'bbox': [int(v) for v in selection], 'padding': app.config['ROI_PADDING'],
+                'tracking_stride': app.config['TRACKING_STRIDE']})
+        self.cached = landmark_cache.get(self.cache_key)
+        self.pose = None
+        self._spill_dir = None
+        if self.cached is not None:
+            self.store = LandmarkStore.from_arrays(*self.cached)
+            self._cached_frames = {int(f): i for i, f in enumerate(self.store.frames)}
+        else:
+            # New landmarks go to disk a chunk at a time instead of accumulating in memory
+            self._spill_dir = tempfile.mkdtemp(suffix='.tmp', dir=landmark_cache.directory)
+            self.store = LandmarkStore(spill_dir=self._spill_dir)
+    
+    def __call__(self, frame_index, frame, roi=None):
+        """Return MediaPipe pose landmarks for this frame (restricted to ``roi`` if given), or None"""
+        if self.cached is not None:
+            i = self._cached_frames.get(frame_index)
+            return array_to_landmarks(self.store.landmarks[i]) if i is not None else None
+        
+        if self.pose is None:
+            self.pose = pose_pool.acquire(**self.pose_options)
+        if roi is not None:
+            height, width = frame.shape[:2]
+            pose_landmarks = _run_pose_on_roi(frame, roi, self.pose, width, height)
+        else:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            pose_landmarks = self.pose.process(rgb_frame).pose_landmarks
+        if pose_landmarks:
+            self.store.append_landmarks(frame_index, pose_landmarks)
+        return pose_landmarks
+    
+    def close(self, completed=True, **header):
+        """Return the Pose graph and, if the whole video was posed, fill the cache (with ``header`` fields)"""
+        if self.cached is not None:
+            return
+        if self.pose is not None:
+            pose_pool.release(self.pose)
+            self.pose = None
+        if completed:
+            landmark_cache.put(self.cache_key, self.store.frames, self.store.landmarks, **header)
+            # Read the cached copy from now on, or an in-memory one if the cache budget evicted it straight away
+            cached = landmark_cache.get(self.cache_key) or (np.array(self.store.frames), np.array(self.store.landmarks))
+            self.store = LandmarkStore.from_arrays(*cached)
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+def _pipeline_progress(progress, total_frames, metrics_stream=None):
+    """Adapt a job progress callback to the pipeline's per-frame hook, passing stage timings and live metrics along"""
+    if progress is None:
+        return None
+    return lambda frames_done, stage_seconds: progress(
+        frames_done, total_frames, stage_seconds=stage_seconds,
+        metrics=metrics_stream.latest if metrics_stream is not None else None)
+
+def _tracking_stage(selection=None, fps=30.0):
+    """
+    Pipeline stage turning (frame number, frame) items into (frame number, frame, roi)
+    
+    Without a ``selection`` roi is None (pose on the whole frame). With one, the
+    selected player is tracked from the first frame on and roi is their box on
+    that frame; when the tracker loses them for a frame the last known box is kept.
+    """
+    def track(items):
+        if selection is None:
+            for frame_index, frame in items:
+                yield frame_index, frame, None
+            return
+        first = next(items, None)
+        if first is None:
+            return
+        tracking_ctx = _init_tracker_and_model(first[1], selection, fps)
+        roi = tuple(selection)
+        for frame_index, frame, ok, bbox in iter_tracked(itertools.chain([first], items), tracking_ctx,
+                                                         app.config['TRACKING_BATCH'], app.config['TRACKING_STRIDE']):
+            if ok:
+                roi = bbox
+            yield frame_index, frame, roi
+    return StreamStage(track)
+
+def _selection_error(bbox, frame_width=None):
+    """Why a player-selection box (and the width of the frame it was drawn on) cannot be used, or None"""
+    def is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+    
+    if not isinstance(bbox, list) or len(bbox) != 4 or not all(is_number(v) for v in bbox):
+        return 'bbox must be [x, y, w, h] numbers'
+    x, y, w, h = bbox
+    if x < 0 or y < 0 or w <= 0 or h <= 0:
+        return 'bbox needs x, y >= 0 and a positive width and height'
+    if frame_width is not None and not (is_number(frame_width) and frame_width > 0):
+        return 'bbox_frame_width must be a positive number'
+    return None
+
+def _selection_to_video_pixels(video_path, bbox, frame_width=None):
+    """
+    Scale a player-selection box to video pixels
+    
+    The selection screen shows frames downscaled to at most 640 px wide, so
+    boxes drawn there are in those pixels unless ``frame_width`` says otherwise.
+    """
+    cap = cv2.VideoCapture(video_path)
+    video_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    cap.release()
+    frame_width = frame_width or min(video_width, 640)
+    scale = video_width / frame_width if frame_width else 1.0
+    x, y, w, h = [int(round(v * scale)) for v in bbox]
+    return [x, y, max(w, 1), max(h, 1)]  # A tiny box drawn on a downscaled frame still covers a pixel
+
+class _PoseTables:
+    """
+    Metrics tables written while poses arrive, TABLE_FLUSH_FRAMES poses at a time.
+    
+    ``tables`` maps a table kind to its CSV path:
+    
+        joints    video frame number and every joint's x/y
+        skeleton  the same rows, numbered by detected pose
+        goalie    skeleton rows plus the goalie metrics
+        speed     hip-centre position, displacement and speed per pose
+    
+    Only one chunk of poses is held in memory, plus the few earlier poses the
+    metrics of the next chunk depend on. Each file on disk always holds a
+    complete table of the poses written so far.
+    """
+    
+    def __init__(self, tables, fps, width, height):
+        self.fps, self.width, self.height = fps, width, height
+        self.chunk = app.config['TABLE_FLUSH_FRAMES']
+        self._streams = {kind: metrics_writer.open(path) for kind, path in tables.items()}
+        self._buffer = LandmarkStore(capacity=self.chunk)
+        self._context_rows = max(goalie_metrics.context_rows, 1)
+        self._context = (np.empty(0, dtype=np.int32), np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32))
+        self.rows = 0
+    
+    def add(self, frame_number, pose_landmarks):
+        if not self._streams:
+            return
+        self._buffer.append_landmarks(frame_number, pose_landmarks)
+        if len(self._buffer) >= self.chunk:
+            self.flush()
+    
+    def extend(self, frames, landmarks):
+        """Write already posed landmarks, e.g. from the landmark cache, in chunks"""
+        for start in range(0, len(frames) if self._streams else 0, self.chunk):
+            self._write(np.asarray(frames[start:start + self.chunk]), np.asarray(landmarks[start:start + self.chunk]))
+    
+    def flush(self):
+        if len(self._buffer):
+            self._write(self._buffer.frames, self._buffer.landmarks)
+            self._buffer = LandmarkStore(capacity=self.chunk)
+    
+    def close(self):
+        self.flush()
+        for stream in self._streams.values():
+            stream.close()
+    
+    def _write(self, frames, landmarks):
+        # Earlier poses first, so velocities and smoothing continue across chunk boundaries
+        offset = len(self._context[0])
+        frames = np.concatenate([self._context[0], frames])
+        landmarks = np.concatenate([self._context[1], landmarks])
+        chunk = LandmarkStore.from_arrays(frames[offset:], landmarks[offset:])
+        pose_numbers = np.arange(self.rows + 1, self.rows + len(chunk) + 1)
+        
+        for kind, stream in self._streams.items():
+            if kind == 'joints':
+                df = chunk.to_dataframe()
+            elif kind == 'skeleton':
+                df = chunk.to_dataframe(frame_numbers=pose_numbers)
+            elif kind == 'goalie':
+                metrics = goalie_metrics.evaluate(landmarks, self.fps, self.width, self.height)
+                df = pd.concat([chunk.to_dataframe(frame_numbers=pose_numbers),
+                                pd.DataFrame({name: values[offset:] for name, values in metrics.items()})], axis=1)
+            else:
+                df = _speed_rows(LandmarkStore.from_arrays(frames, landmarks), self.fps, self.width, self.height)
+                df = df.iloc[offset:].reset_index(drop=True)
+            stream.write(df)
+        
+        self.rows += len(chunk)
+        self._context = (frames[-self._context_rows:].copy(), landmarks[-self._context_rows:].copy())
+
+def _speed_rows(store, fps, width, height):
+    """Hip-centre speed table, straight from the hip landmark columns; the first row has no displacement"""
+    hips = (store.joint('left_hip')[:, :2].astype(np.float64) + store.joint('right_hip')[:, :2]) / 2
+    df = pd.DataFrame({
+        'frame': store.frames,
+        'com_x': hips[:, 0],
+        'com_y': hips[:, 1],
+        'timestamp': store.frames / fps
+    })
+    
+    # Calculate displacement and speed
+    df['displacement'] = np.sqrt(
+        (df['com_x'].diff() * width) ** 2 + 
+        (df['com_y'].diff() * height) ** 2
+    )
+    df['speed_px_s'] = df['displacement'] * fps
+    df['speed_kmh'] = df['speed_px_s'] * 3.6  # Rough conversion
+    df['speed_mph'] = df['speed_kmh'] * 0.621371
+    return df
+
+def _write_pose_tables(tables, store, fps, width, height):
+    """Write the metrics tables for landmarks that were posed without a frame loop"""
+    pose_tables = _PoseTables(tables or {}, fps, width, height)
+    try:
+        pose_tables.extend(store.frames, store.landmarks)
+    finally:
+        pose_tables.close()
+
+def _annotated_pose_pass(video_path, output_video_path, progress=None, shards=1, preview=None, selection=None,
+                         tables=None):
+    """
+    Run pose on every frame, write the annotated video and the metrics tables.
+    
+    ``tables`` maps _PoseTables kinds to CSV paths; they are written as poses arrive.
+    Landmarks carry the 1-based video frame number. With ``output_video_path`` None
+    no overlay is drawn or encoded. With ``shards`` > 1 the video is split into
+    frame ranges posed in parallel processes. Landmarks come from the landmark
+    cache when this video has been posed with the same settings before.
+    Annotated frames are offered to ``preview`` (a PreviewChannel) as they are encoded.
+    With a ``selection`` box (video pixels) that player is tracked and pose runs on their box only.
+    Returns (landmark store, landmark cache key, fps, width, height); the key names
+    the landmarks for the /landmarks query endpoint.
+    """
     cap = cv2.VideoCapture(video_path)
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = cap.get(cv2.CAP_PROP_FPS)
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
-    
-    joint_data = []
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-        
-        if results.pose_landmarks:
-            landmark_positions = {'frame': len(joint_data) + 1}
-            
-            for id, landmark in enumerate(results.pose_landmarks.landmark):
-                joint_name = mp_pose.PoseLandmark(id).name.lower()
-                landmark_positions[f'{joint_name}_x'] = landmark.x
-                landmark_positions[f'{joint_name}_y'] = landmark.y
-                
-                # Draw joints
-                x = int(landmark.x * width)
-                y = int(landmark.y * height)
-                cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)
-            
-            # Draw pose connections
-            mp.solutions.drawing_utils.draw_landmarks(
-                frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                mp.solutions.drawing_utils.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2),
-                mp.solutions.drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
-            )
-            
-            joint_data.append(landmark_positions)
-        
-        out.write(frame)
-    
-    cap.release()
-    out.release()
-    pose.close()
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    estimator = _PoseEstimator(video_path, selection=selection)
+    
+    completed = False
+    cleanup = contextlib.ExitStack()
+    # Unwound in reverse and each step runs even if an earlier one raises (e.g. a failed
+    # encoder or shard), so the estimator always hands its Pose graph back to the pool
+    # and removes its spill directory, and the live preview always ends
+    cleanup.callback(lambda: estimator.close(completed, fps=fps, width=width, height=height))
+    cleanup.callback(cap.release)
+    if preview is not None:
+        cleanup.callback(preview.close)
+    
+    def infer(item):
+        frame_index, frame, roi = item
+        return frame_index, frame, estimator(frame_index, frame, roi)
+    
+    metrics_stream = live_metrics.stream(fps, width, height)
+    
+    def render(item):
+        frame_index, frame, pose_landmarks = item
+        if pose_landmarks:
+            metrics_stream.update_landmarks(pose_landmarks)
+            pose_tables.add(frame_index, pose_landmarks)
+            if out is not None:
+                draw_pose_overlay(frame, pose_landmarks, width, height)
+        return frame_index, frame
+    
+    def encode(item):
+        frame_index, frame = item
+        if out is not None:
+            out.write(frame)
+            if preview is not None:
+                preview.offer(frame)
+    
+    with cleanup:
+        if estimator.cached is not None and output_video_path is None:
+            # Nothing to render: cached landmarks answer the analysis without decoding
+            cap.release()
+            _write_pose_tables(tables, estimator.store, fps, width, height)
+            if progress:
+                progress(total_frames, total_frames)
+            return estimator.store, estimator.cache_key, fps, width, height
+        
+        if estimator.cached is None and shards > 1 and selection is None:
+            # The shards pose the video themselves; the estimator's own store stays empty and uncached
+            cap.release()
+            frames, landmarks = run_sharded_pose(video_path, output_video_path, shards,
+                                                 pose_options=DEFAULT_POSE_OPTIONS, progress=progress,
+                                                 encoder_options=video_encoder.options())
+            landmark_cache.put(estimator.cache_key, frames, landmarks, fps=fps, width=width, height=height)
+            store = LandmarkStore.from_arrays(frames, landmarks)
+            _write_pose_tables(tables, store, fps, width, height)
+            return store, estimator.cache_key, fps, width, height
+        
+        pose_tables = cleanup.enter_context(contextlib.closing(_PoseTables(tables or {}, fps, width, height)))
+        out = None
+        if output_video_path:
+            out = cleanup.enter_context(video_encoder.open(output_video_path, fps, width, height))
+        # Cached landmarks need no tracking: the boxes only matter for running pose
+        tracking = _tracking_stage(selection if estimator.cached is None else None, fps)
+        FramePipeline(iter_video_frames(cap),
+                      [('tracking', tracking), ('inference', infer), ('render', render), ('encode', encode)],
+                      on_item=_pipeline_progress(progress, total_frames, metrics_stream)).run()
+        completed = True
+    
+    return estimator.store, estimator.cache_key, fps, width, height
+
+def _metrics_results(csv_name, description):
+    """Result entries for a metrics table: the CSV download, plus the columnar file when one was written"""
+    results = [{
+        'name': csv_name,
+        'type': 'csv',
+        'description': description,
+        'preview': False,
+        'download': True
+    }]
+    if not metrics_writer.columnar:
+        return results
+    columnar_path = metrics_writer.columnar_path(os.path.join(app.config['OUTPUT_FOLDER'], csv_name))
+    if os.path.exists(columnar_path):
+        results.append({
+            'name': os.path.basename(columnar_path),
+            'type': 'data',
+            'description': f'{description} ({metrics_writer.format}, float32)',
+            'preview': False,
+            'download': True
+        })
+    return results
+
+# Analyses that can share one decode + pose pass over the video, in output order
+FAN_OUT_ANALYSES = ('skeleton', 'goalie', 'speed')
+
+def _annotated_video_name(analysis_type, filename):
+    return {'skeleton': f"skeleton_{filename}", 'goalie': f"goalie_annotated_{filename}"}.get(analysis_type)
+
+def _metrics_csv_name(analysis_type, filename):
+    return f"{analysis_type}_metrics_{filename.replace('.mp4', '.csv')}"
+
+def _selection_output_name(filename, selection=None):
+    """Name the outputs of a run are derived from: a selected-player run gets its own files, tagged with the box"""
+    if not selection:
+        return filename
+    base_name, extension = os.path.splitext(filename)
+    return f"{base_name}_roi-{'-'.join(str(int(v)) for v in selection)}{extension}"
+
+def analyze_multiple(video_path, filename, analysis_types, progress=None, shards=1, preview=None, selection=None):
+    """Run several pose analyses from a single decode and pose pass over the video (optionally on one selected player)"""
+    analysis_types = [t for t in FAN_OUT_ANALYSES if t in analysis_types]
+    if not analysis_types:
+        raise ValueError('No supported analysis types requested')
+    
+    # A selected-player run must not overwrite the whole-frame outputs a stored result points at
+    output_name = _selection_output_name(filename, selection)
+    
+    # Skeleton and goalie draw the same overlay: encode it once, copy it for the other
+    video_paths = [os.path.join(app.config['OUTPUT_FOLDER'], _annotated_video_name(t, output_name))
+                   for t in analysis_types if _annotated_video_name(t, output_name)]
+    output_video_path = video_paths[0] if video_paths else None
+    tables = {t: os.path.join(app.config['OUTPUT_FOLDER'], _metrics_csv_name(t, output_name)) for t in analysis_types}
+    
+    _, landmarks_key, _, _, _ = _annotated_pose_pass(video_path, output_video_path, progress, shards, preview,
+                                                     selection, tables)
+    for extra_path in video_paths[1:]:
+        shutil.copyfile(output_video_path, extra_path)
+    
+    finishers = {
+        'skeleton': _finish_skeleton,
+        'goalie': _finish_goalie,
+        'speed': _finish_speed,
+    }
+    analyses = {t: finishers[t](output_name) for t in analysis_types}
+    for analysis in analyses.values():
+        analysis['landmarks'] = landmarks_key
     
-    # Analyze goalie metrics
-    joint_df = pd.DataFrame(joint_data)
-    joint_df = analyze_goalie_metrics(joint_df, fps, width)
-    joint_df.to_csv(output_csv_path, index=False)
+    return {
+        'success': True,
+        'analysis_id': 'multi',
+        'analysis_type': 'multi',
+        'message': f"{', '.join(analysis_types).capitalize()} analysis completed from a single pass",
+        'analyses': analyses,
+        'landmarks': landmarks_key,
+        'results': [item for t in analysis_types for item in analyses[t]['results']]
+    }
+
+def analyze_goalie(video_path, filename, progress=None, shards=1, preview=None, selection=None):
+    """Goalie biomechanics analysis"""
+    return analyze_multiple(video_path, filename, ['goalie'], progress, shards, preview, selection)['analyses']['goalie']
+
+def analyze_skeleton(video_path, filename, progress=None, shards=1, preview=None, selection=None):
+    """Skeleton analysis - pose tracking with colored joint overlay"""
+    return analyze_multiple(video_path, filename, ['skeleton'], progress, shards, preview, selection)['analyses']['skeleton']
+
+def analyze_speed(video_path, filename, progress=None, shards=1, preview=None, selection=None):
+    """Player speed analysis - track player speed and acceleration"""
+    return analyze_multiple(video_path, filename, ['speed'], progress, shards, preview, selection)['analyses']['speed']
+
+def _finish_goalie(filename):
+    """Goalie result; the metrics table was written during the pose pass"""
+    output_video = _annotated_video_name('goalie', filename)
+    output_csv = _metrics_csv_name('goalie', filename)
     
     return {
         'success': True,
@@ -225,77 +942,14 @@ def analyze_goalie(video_path, filename):
                 'preview': True,
                 'download': True
             },
-            {
-                'name': output_csv,
-                'type': 'csv',
-                'description': 'Goalie biomechanical metrics data',
-                'preview': False,
-                'download': True
-            }
+            *_metrics_results(output_csv, 'Goalie biomechanical metrics data')
         ]
     }
 
-def analyze_skeleton(video_path, filename):
-    """Skeleton analysis - pose tracking with colored joint overlay"""
-    output_video = f"skeleton_{filename}"
-    output_csv = f"skeleton_metrics_{filename.replace('.mp4', '.csv')}"
-    
-    output_video_path = os.path.join(app.config['OUTPUT_FOLDER'], output_video)
-    output_csv_path = os.path.join(app.config['OUTPUT_FOLDER'], output_csv)
-    
-    # Initialize MediaPipe
-    pose = mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
-    
-    # Video setup
-    cap = cv2.VideoCapture(video_path)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
-    
-    joint_data = []
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-        
-        if results.pose_landmarks:
-            landmark_positions = {'frame': len(joint_data) + 1}
-            
-            for id, landmark in enumerate(results.pose_landmarks.landmark):
-                joint_name = mp_pose.PoseLandmark(id).name.lower()
-                landmark_positions[f'{joint_name}_x'] = landmark.x
-                landmark_positions[f'{joint_name}_y'] = landmark.y
-                
-                # Draw joints
-                x = int(landmark.x * width)
-                y = int(landmark.y * height)
-                cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)
-            
-            # Draw pose connections
-            mp.solutions.drawing_utils.draw_landmarks(
-                frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                mp.solutions.drawing_utils.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2),
-                mp.solutions.drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
-            )
-            
-            joint_data.append(landmark_positions)
-        
-        out.write(frame)
-    
-    cap.release()
-    out.release()
-    pose.close()
-    
-    # Save joint data
-    if joint_data:
-        joint_df = pd.DataFrame(joint_data)
-        joint_df.to_csv(output_csv_path, index=False)
+def _finish_skeleton(filename):
+    """Skeleton result; the joint position table was written during the pose pass"""
+    output_video = _annotated_video_name('skeleton', filename)
+    output_csv = _metrics_csv_name('skeleton', filename)
     
     return {
         'success': True,
@@ -310,76 +964,13 @@ def analyze_skeleton(video_path, filename):
                 'preview': True,
                 'download': True
             },
-            {
-                'name': output_csv,
-                'type': 'csv',
-                'description': 'Skeleton joint position data',
-                'preview': False,
-                'download': True
-            }
+            *_metrics_results(output_csv, 'Skeleton joint position data')
         ]
     }
 
-def analyze_speed(video_path, filename):
-    """Player speed analysis - track player speed and acceleration"""
-    output_csv = f"speed_metrics_{filename.replace('.mp4', '.csv')}"
-    output_csv_path = os.path.join(app.config['OUTPUT_FOLDER'], output_csv)
-    
-    # Initialize MediaPipe
-    pose = mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
-    
-    # Video setup
-    cap = cv2.VideoCapture(video_path)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    
-    joint_data = []
-    frame_index = 0
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        frame_index += 1
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-        
-        if results.pose_landmarks:
-            # Calculate center of mass for speed tracking
-            left_hip = results.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_HIP]
-            right_hip = results.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_HIP]
-            
-            com_x = (left_hip.x + right_hip.x) / 2
-            com_y = (left_hip.y + right_hip.y) / 2
-            
-            landmark_positions = {
-                'frame': frame_index,
-                'com_x': com_x,
-                'com_y': com_y,
-                'timestamp': frame_index / fps
-            }
-            
-            joint_data.append(landmark_positions)
-    
-    cap.release()
-    pose.close()
-    
-    # Calculate speed metrics
-    if len(joint_data) > 1:
-        df = pd.DataFrame(joint_data)
-        
-        # Calculate displacement and speed
-        df['displacement'] = np.sqrt(
-            (df['com_x'].diff() * width) ** 2 + 
-            (df['com_y'].diff() * height) ** 2
-        )
-        df['speed_px_s'] = df['displacement'] * fps
-        df['speed_kmh'] = df['speed_px_s'] * 3.6  # Rough conversion
-        df['speed_mph'] = df['speed_kmh'] * 0.621371
-        
-        df.to_csv(output_csv_path, index=False)
+def _finish_speed(filename):
+    """Speed result; the hip-centre speed table was written during the pose pass"""
+    output_csv = _metrics_csv_name('speed', filename)
     
     return {
         'success': True,
@@ -387,78 +978,57 @@ def analyze_speed(video_path, filename):
         'analysis_type': 'speed',
         'message': 'Speed analysis completed successfully',
         'results': [
-            {
-                'name': output_csv,
-                'type': 'csv',
-                'description': 'Player speed metrics data',
-                'preview': False,
-                'download': True
-            }
+            *_metrics_results(output_csv, 'Player speed metrics data')
         ]
     }
 
-def analyze_goalie_metrics(joint_df, fps, width):
-    """Analyze goalie-specific metrics"""
-    joint_df = calculate_center_of_mass(joint_df, width)
+def _requested_frame_number(video_path):
+    """Frame selected by the ``n`` (0-based frame) or ``t`` (seconds) query parameter; 0 by default"""
+    return frame_reader.frame_number(video_path, request.args.get('n', type=int), request.args.get('t', type=float))
+
+def _requested_frame(video_path):
+    """(frame number, decoded frame) selected by the ``n`` or ``t`` query parameter"""
+    frame_number = _requested_frame_number(video_path)
+    return frame_number, frame_reader.read(video_path, frame_number)
+
+@app.route('/frame/<filename>')
+def get_frame(filename):
+    """
+    One decoded frame of an uploaded video as JPEG, e.g. /frame/game.mp4?t=754.2 or ?n=22626
     
-    joint_df['glove_hand_velocity'] = calculate_velocity(joint_df, 'right_wrist_x', 'right_wrist_y', fps, width)
-    joint_df['stick_hand_velocity'] = calculate_velocity(joint_df, 'left_wrist_x', 'left_wrist_y', fps, width)
-    joint_df['center_of_mass_velocity'] = calculate_velocity(joint_df, 'com_x', 'com_y', fps, width)
+    Seeks to the nearest keyframe and decodes forward; repeat requests come from
+    the decoded-frame cache or a 304 when the browser already has the image.
+    """
+    video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if not os.path.exists(video_path):
+        return jsonify({'error': 'Video not found'}), 404
     
-    joint_df['leg_extension_angle'] = calculate_angle(joint_df, 'left_hip', 'left_knee', 'left_ankle', width)
-    joint_df['glove_hand_angle'] = calculate_angle(joint_df, 'right_shoulder', 'right_elbow', 'right_wrist', width)
-    joint_df['posture_angle'] = calculate_angle(joint_df, 'left_shoulder', 'left_hip', 'left_knee', width)
+    frame_number, frame = _requested_frame(video_path)
+    if frame is None:
+        return jsonify({'error': 'Could not read video frame'}), 500
     
-    return joint_df
-
-def calculate_center_of_mass(joint_df, width):
-    """Calculate the approximate center of mass using key body parts."""
-    x_cols = ['left_hip_x', 'right_hip_x', 'left_shoulder_x', 'right_shoulder_x']
-    y_cols = ['left_hip_y', 'right_hip_y', 'left_shoulder_y', 'right_shoulder_y']
-    joint_df['com_x'] = joint_df[x_cols].mean(axis=1)
-    joint_df['com_y'] = joint_df[y_cols].mean(axis=1)
-    return joint_df
-
-def calculate_velocity(joint_df, x_col, y_col, fps, width):
-    """Calculate the velocity of a joint over time using changes in x and y positions."""
-    import numpy as np
-    displacement = np.sqrt((joint_df[x_col].diff()) ** 2 + (joint_df[y_col].diff()) ** 2)
-    time_interval = 1 / fps
-    velocity = displacement / time_interval
-    velocity.fillna(0, inplace=True)
-    return velocity
-
-def calculate_angle(joint_df, point_a, point_b, point_c, width):
-    """Calculate the angle (in degrees) between three joints: A, B, and C (using cosine rule)"""
-    import numpy as np
-    ax, ay = joint_df[f'{point_a}_x'], joint_df[f'{point_a}_y']
-    bx, by = joint_df[f'{point_b}_x'], joint_df[f'{point_b}_y']
-    cx, cy = joint_df[f'{point_c}_x'], joint_df[f'{point_c}_y']
-
-    ab = np.sqrt((ax - bx) ** 2 + (ay - by) ** 2)
-    bc = np.sqrt((bx - cx) ** 2 + (by - cy) ** 2)
-    ac = np.sqrt((ax - cx) ** 2 + (ay - cy) ** 2)
-
-    denominator = 2 * ab * bc
-    cosine_angle = np.clip((ab ** 2 + bc ** 2 - ac ** 2) / denominator, -1, 1)
-    angle = np.degrees(np.arccos(cosine_angle))
-    return angle
-
-
+    quality = min(95, max(30, request.args.get('quality', 85, type=int)))
+    _, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    response = Response(buffer.tobytes(), mimetype='image/jpeg')
+    response.headers['X-Frame-Number'] = str(frame_number)
+    # Content hash when known without reading the video, else its size and mtime
+    stat = os.stat(video_path)
+    version = known_sha256(video_path) or f'{stat.st_size:x}-{stat.st_mtime_ns:x}'
+    response.set_etag(f'{version}-{frame_number}-{quality}')
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
 
 @app.route('/get_video_frame/<filename>')
 def get_video_frame(filename):
-    """Get first frame of video for player selection"""
+    """Get a frame of the video for player selection (first frame unless ``n`` or ``t`` is given)"""
     video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     
     if not os.path.exists(video_path):
         return jsonify({'error': 'Video not found'}), 404
     
-    cap = cv2.VideoCapture(video_path)
-    ret, frame = cap.read()
-    cap.release()
-    
-    if not ret:
+    frame_number, frame = _requested_frame(video_path)
+    if frame is None:
         return jsonify({'error': 'Could not read video frame'}), 500
     
     # Convert frame to base64 for web display
@@ -468,7 +1038,8 @@ def get_video_frame(filename):
     return jsonify({
         'frame': frame_base64,
         'width': frame.shape[1],
-        'height': frame.shape[0]
+        'height': frame.shape[0],
+        'frame_number': frame_number
     })
 
 @app.route('/test_roboflow')
@@ -512,172 +1083,33 @@ def test_roboflow():
             'traceback': traceback.format_exc()
         }), 500
 
-@app.route('/detect_players/<filename>')
-def detect_players(filename):
-    """Detect all players/people in the first frame of the video"""
+def _detection_response(filename, players_key):
+    """Shared body of the player-selection detection routes; ``players_key`` names the list in the JSON"""
     video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     
     if not os.path.exists(video_path):
         return jsonify({'error': 'Video not found'}), 404
     
-    cap = cv2.VideoCapture(video_path)
-    ret, frame = cap.read()
-    cap.release()
-    
-    if not ret:
-        return jsonify({'error': 'Could not read video frame'}), 500
-    
-    # Performance optimization: Resize frame to reduce memory usage
-    height, width = frame.shape[:2]
-    if width > 640:  # Reduced from 800 to 640 for better performance
-        scale = 640 / width
-        new_width = int(width * scale)
-        new_height = int(height * scale)
-        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-    
-    # Convert frame to base64 for web display (with compression)
-    encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 70]  # Reduced from 85% to 70% for smaller size
-    _, buffer = cv2.imencode('.jpg', frame, encode_param)
-    frame_base64 = base64.b64encode(buffer).decode('utf-8')
-    
-    # Log memory usage
-    log_memory_usage()
-    
-    # FAST FALLBACK: Use YOLO detection instead of slow Roboflow for player selection
-    players = []
-    
-    print(f"🎯 Starting FAST player detection...")
-    print(f"   Frame size: {frame.shape[1]}x{frame.shape[0]}")
-    print(f"   Using YOLO fallback for speed")
-    
-    if BYTETRACKER_AVAILABLE:
-        try:
-            print(f"   Loading YOLO model for fast detection...")
-            model = YOLO('yolov8n.pt')
-            print(f"   YOLO model loaded successfully")
-            
-            print(f"   Running YOLO detection...")
-            results = model(frame, verbose=False)
-            
-            if results and len(results) > 0:
-                boxes = results[0].boxes.xyxy.cpu().numpy()
-                confidences = results[0].boxes.conf.cpu().numpy()
-                classes = results[0].boxes.cls.cpu().numpy()
-                
-                for i, (box, conf, cls) in enumerate(zip(boxes, confidences, classes)):
-                    # Only include person class (class 0) with reasonable confidence
-                    if cls == 0 and conf > 0.3:  # Person class with 30%+ confidence
-                        x1, y1, x2, y2 = box
-                        players.append({
-                            'id': i,
-                            'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
-                            'confidence': float(conf),
-                            'type': 'person'
-                        })
-                
-                print(f"🎯 YOLO detected {len(players)} people for player selection")
-            else:
-                print(f"⚠️  YOLO detection returned no results")
-                
-        except Exception as e:
-            print(f"❌ YOLO detection error: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    # Clear memory after processing
-    clear_memory()
+    try:
+        result = detection_service.detect(video_path, _requested_frame_number(video_path),
+                                          min_confidence=request.args.get('conf', 0.3, type=float))
+    except DetectionError as e:
+        return jsonify({'error': str(e)}), 500
     
-    return jsonify({
-        'frame': frame_base64,
-        'width': frame.shape[1],
-        'height': frame.shape[0],
-        'players': players
-    })
+    response = dict(result)
+    response[players_key] = response.pop('players')
+    return jsonify(response)
+
+@app.route('/detect_players/<filename>')
+def detect_players(filename):
+    """Detect all players/people in a frame of the video (first frame unless ``n`` or ``t`` is given)"""
+    return _detection_response(filename, 'players')
 
 
 @app.route('/detect_yolo/<filename>')
 def detect_yolo(filename):
     """Detect people using YOLO model for general person detection"""
-    video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    
-    if not os.path.exists(video_path):
-        return jsonify({'error': 'Video not found'}), 404
-    
-    cap = cv2.VideoCapture(video_path)
-    ret, frame = cap.read()
-    cap.release()
-    
-    if not ret:
-        return jsonify({'error': 'Could not read video frame'}), 500
-    
-    # Performance optimization: Resize frame to reduce memory usage
-    height, width = frame.shape[:2]
-    if width > 640:  # Reduced from 800 to 640 for better performance
-        scale = 640 / width
-        new_width = int(width * scale)
-        new_height = int(height * scale)
-        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
-    
-    # Convert frame to base64 for web display (with compression)
-    encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 70]  # Reduced from 85% to 70% for smaller size
-    _, buffer = cv2.imencode('.jpg', frame, encode_param)
-    frame_base64 = base64.b64encode(buffer).decode('utf-8')
-    
-    # Log memory usage
-    log_memory_usage()
-    
-    # Detect people using YOLO model
-    people = []
-    
-    print(f"🎯 Starting YOLO person detection...")
-    print(f"   Frame size: {frame.shape[1]}x{frame.shape[0]}")
-    print(f"   BYTETRACKER_AVAILABLE: {BYTETRACKER_AVAILABLE}")
-    
-    if BYTETRACKER_AVAILABLE:
-        try:
-            print(f"   Loading YOLO model...")
-            model = YOLO('yolov8n.pt')
-            print(f"   YOLO model loaded successfully")
-            
-            print(f"   Running YOLO detection...")
-            results = model(frame, verbose=False)
-            
-            if results and len(results) > 0:
-                boxes = results[0].boxes.xyxy.cpu().numpy()
-                confidences = results[0].boxes.conf.cpu().numpy()
-                classes = results[0].boxes.cls.cpu().numpy()
-                
-                for i, (box, conf, cls) in enumerate(zip(boxes, confidences, classes)):
-                    # Only include person class (class 0) with reasonable confidence
-                    if cls == 0 and conf > 0.3:  # Person class with 30%+ confidence
-                        x1, y1, x2, y2 = box
-                        people.append({
-                            'id': i,
-                            'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
-                            'confidence': float(conf),
-                            'type': 'person'
-                        })
-                
-                print(f"🎯 YOLO detected {len(people)} people")
-            else:
-                print(f"⚠️  YOLO detection returned no results")
-                
-        except Exception as e:
-            print(f"❌ YOLO detection error: {e}")
-            import traceback
-            traceback.print_exc()
-    else:
-        print("❌ YOLO model not available")
-    
-    # Clear memory after processing
-    clear_memory()
-    
-    return jsonify({
-        'frame': frame_base64,
-        'width': frame.shape[1],
-        'height': frame.shape[0],
-        'people': people
-    })
+    return _detection_response(filename, 'people')
 
 
 @app.route('/clear_memory')
@@ -691,6 +1123,22 @@ def clear_memory_endpoint():
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/models')
+def model_status():
+    """Load time, warmup time and memory footprint of each registered model, plus Pose pool and detection cache usage"""
+    return jsonify({
+        'models': model_registry.stats(),
+        'pose_pool': pose_pool.stats(),
+        'detections': detection_service.stats()
+    })
+
+
+@app.route('/cache_status')
+def cache_status():
+    """Landmark cache size and hit/miss counters, plus the decoded frame cache under 'frames'"""
+    return jsonify({**landmark_cache.stats(), 'frames': frame_reader.stats()})
+
+
 @app.route('/memory_status')
 def memory_status():
     """Get current memory usage"""
@@ -727,136 +1175,30 @@ def force_cleanup():
 
 
 
-def _init_tracker_and_model(frame, bbox):
+def _init_tracker_and_model(frame, bbox, fps=30.0):
     """Helper to initialize tracker/model based on availability."""
-    if BYTETRACKER_AVAILABLE:
-        return {'use_yolo': True, 'model': YOLO('yolov8n.pt'), 'selected_id': None, 'init_bbox': bbox}
-    # Fallback to MIL
-    tracker = cv2.TrackerMIL_create()
-    x, y, w, h = bbox
-    tracker.init(frame, (int(x), int(y), int(w), int(h)))
-    return {'use_yolo': False, 'tracker': tracker}
+    model = model_registry.get('yolov8n') if BYTETRACKER_AVAILABLE else None
+    return init_tracking(frame, bbox, model, frame_rate=(fps or 30.0) / app.config['TRACKING_STRIDE'])
 
 
 def _update_bbox_with_tracking(frame, tracking_ctx):
     """Update bbox using YOLO+ByteTracker or classic tracker. Returns (ok, bbox)."""
-    if tracking_ctx.get('use_yolo'):
-        model = tracking_ctx['model']
-        init_x, init_y, init_w, init_h = tracking_ctx['init_bbox']
-        results = model.track(frame, persist=True, verbose=False)
-        
-        if results and len(results) > 0 and results[0].boxes is not None and results[0].boxes.xyxy is not None:
-            boxes = results[0].boxes.xyxy.cpu().numpy()
-            clss = results[0].boxes.cls.cpu().numpy() if results[0].boxes.cls is not None else None
-            ids = results[0].boxes.id.cpu().numpy() if results[0].boxes.id is not None else None
-            
-            # STRICT: Only track person class (COCO class 0), ignore everything else
-            person_idxs = []
-            for i in range(len(boxes)):
-                if clss is None or clss[i] == 0:  # Person class only
-                    # Additional safety check: ensure reasonable person dimensions
-                    x1, y1, x2, y2 = boxes[i]
-                    w, h = x2 - x1, y2 - y1
-                    aspect_ratio = w / h if h > 0 else 0
-                    # Person should have reasonable aspect ratio (not too wide or tall)
-                    if 0.3 < aspect_ratio < 2.0 and w > 20 and h > 40:  # Minimum size thresholds
-                        person_idxs.append(i)
-            
-            if len(person_idxs) == 0:
-                # No valid persons detected - return False but keep the selected_id
-                return False, None
-                
-            if tracking_ctx['selected_id'] is None and ids is not None:
-                # First time: Pick detection closest to initial bbox center
-                sel_cx, sel_cy = init_x + init_w / 2.0, init_y + init_h / 2.0
-                min_d, sel_id = 1e9, None
-                for i in person_idxs:
-                    x1, y1, x2, y2 = boxes[i]
-                    cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
-                    d = (cx - sel_cx) ** 2 + (cy - sel_cy) ** 2
-                    if d < min_d:
-                        min_d = d
-                        sel_id = ids[i] if ids is not None else None
-                tracking_ctx['selected_id'] = sel_id
-                print(f"🔒 LOCKED ON Player ID: {sel_id} for initial bbox: {init_x}, {init_y}, {init_w}, {init_h}")
-            
-            # CRITICAL: Only track the selected player ID, NEVER switch to others
-            chosen_idx = None
-            if ids is not None and tracking_ctx['selected_id'] is not None:
-                # Look for our specific selected player ID
-                for i in person_idxs:
-                    if ids[i] == tracking_ctx['selected_id']:
-                        chosen_idx = i
-                        break
-                
-                if chosen_idx is not None:
-                    print(f"✅ Tracking LOCKED player ID: {tracking_ctx['selected_id']}")
-                else:
-                    print(f"⚠️  Selected player ID {tracking_ctx['selected_id']} not found - maintaining last known position")
-                    # Return last known bbox if we have it, otherwise False
-                    if 'last_bbox' in tracking_ctx and tracking_ctx['last_bbox'] is not None:
-                        return True, tracking_ctx['last_bbox']
-                    return False, None
-            
-            # If we found our selected player, update the bbox
-            if chosen_idx is not None:
-                x1, y1, x2, y2 = boxes[chosen_idx]
-                bbox = (int(x1), int(y1), int(x2 - x1), int(y2 - y1))
-                tracking_ctx['last_bbox'] = bbox
-                return True, bbox
-            
-            # Fallback: if no IDs available, use nearest to last known position
-            if ids is None and 'last_bbox' in tracking_ctx and tracking_ctx['last_bbox'] is not None:
-                last_x, last_y, last_w, last_h = tracking_ctx['last_bbox']
-                ref_cx, ref_cy = last_x + last_w / 2.0, last_y + last_h / 2.0
-                min_d, chosen_idx = 1e9, None
-                for i in person_idxs:
-                    x1, y1, x2, y2 = boxes[i]
-                    cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
-                    d = (cx - ref_cx) ** 2 + (cy - ref_cy) ** 2
-                    if d < min_d:
-                        min_d = d
-                        chosen_idx = i
-                if chosen_idx is not None:
-                    x1, y1, x2, y2 = boxes[chosen_idx]
-                    bbox = (int(x1), int(y1), int(x2 - x1), int(y2 - y1))
-                    tracking_ctx['last_bbox'] = bbox
-                    return True, bbox
-            
-            return False, None
-        return False, None
-    else:
-        # Fallback to MIL tracker
-        ok, bbox = tracking_ctx['tracker'].update(frame)
-        if ok:
-            bbox = (int(bbox[0]), int(bbox[1]), int(bbox[2]), int(bbox[3]))
-            tracking_ctx['last_bbox'] = bbox
-            return True, bbox
-        return False, None
+    return update_tracking(frame, tracking_ctx)
 
 
 def _run_pose_on_roi(frame, bbox, pose, width, height):
-    """Run MediaPipe pose on ROI and return landmarks mapped to full-frame pixel coords."""
+    """Run MediaPipe pose on the padded ROI and return its landmarks in full-frame normalized coords, or None."""
     x, y, w, h = [int(v) for v in bbox]
-    x = max(0, x)
-    y = max(0, y)
-    w = max(1, min(w, width - x))
-    h = max(1, min(h, height - y))
-    roi = frame[y:y+h, x:x+w]
-    if roi.size == 0:
-        return None, None
-    rgb_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
+    pad_x, pad_y = int(w * app.config['ROI_PADDING']), int(h * app.config['ROI_PADDING'])
+    x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+    x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    rgb_roi = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2RGB)
     results = pose.process(rgb_roi)
     if not results.pose_landmarks:
-        return None, None
-    landmarks = results.pose_landmarks.landmark
-    # Map ROI-normalized coords back to full-frame pixel coords
-    pts = []
-    for lm in landmarks:
-        px = int(lm.x * w) + x
-        py = int(lm.y * h) + y
-        pts.append((px, py))
-    return pts, results
+        return None
+    return roi_landmarks_to_frame(results.pose_landmarks, (x0, y0, x1 - x0, y1 - y0), width, height)
 
 
 
@@ -872,6 +1214,9 @@ def process_motion_capture_analysis():
     
     if not filename or not bbox:
         return jsonify({'error': 'Missing filename or bounding box'}), 400
+    error = _selection_error(bbox, data.get('bbox_frame_width'))
+    if error:
+        return jsonify({'error': error}), 400
     
     video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     base_name = os.path.splitext(filename)[0]
@@ -883,319 +1228,39 @@ def process_motion_capture_analysis():
     output_video_path = os.path.join(app.config['OUTPUT_FOLDER'], output_video)
     output_skeleton_path = os.path.join(app.config['OUTPUT_FOLDER'], output_skeleton)
     
-    try:
-        result = process_motion_capture_tracking(video_path, bbox, output_csv_path, output_video_path, output_skeleton_path)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-
-    """Enhanced speed tracking with ByteTracker and better player selection"""
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    
-    # Initialize MediaPipe pose detection
-    pose = mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
-    
-    # Initialize ByteTracker if available, otherwise use MIL tracker
-    if BYTETRACKER_AVAILABLE:
-        tracker = None  # Will use YOLO + ByteTracker
-        model = YOLO('yolov8n.pt')  # Load YOLO model for detection
-    else:
-        tracker = cv2.TrackerMIL_create()
-    
-    # Read first frame and initialize tracker
-    ret, frame = cap.read()
-    if not ret:
-        raise Exception("Could not read video")
-    
-    # Initialize tracker with selected bbox
-    x, y, w, h = bbox
-    if not BYTETRACKER_AVAILABLE:
-        tracker.init(frame, (x, y, w, h))
-    
-    # Setup video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(video_path_out, fourcc, fps, (width, height))
-    
-    speeds = []
-    previous_center = None
-    frame_count = 0
-    selected_player_id = None
-    joint_data = []  # Store pose data for skeleton generation
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        frame_count += 1
-        ok = False  # Initialize ok variable
-        
-        if BYTETRACKER_AVAILABLE:
-            # Use YOLO + ByteTracker for better tracking
-            results = model.track(frame, persist=True, verbose=False)
-            
-            if results[0].boxes.id is not None:
-                boxes = results[0].boxes.xyxy.cpu().numpy()
-                track_ids = results[0].boxes.id.cpu().numpy()
-                
-                # Find the closest detection to our selected bbox
-                if selected_player_id is None:
-                    # Find the detection closest to our initial selection
-                    min_distance = float('inf')
-                    for i, box in enumerate(boxes):
-                        box_center = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
-                        selected_center = (x + w/2, y + h/2)
-                        distance = math.sqrt((box_center[0] - selected_center[0])**2 + 
-                                          (box_center[1] - selected_center[1])**2)
-                        if distance < min_distance:
-                            min_distance = distance
-                            selected_player_id = track_ids[i]
-                
-                # Track the selected player
-                for i, (box, track_id) in enumerate(zip(boxes, track_ids)):
-                    if track_id == selected_player_id:
-                        x1, y1, x2, y2 = box
-                        bbox = (int(x1), int(y1), int(x2-x1), int(y2-y1))
-                        ok = True  # Set ok to True when player is tracked
-                        
-                        # Draw bounding box
-                        p1 = (int(bbox[0]), int(bbox[1]))
-                        p2 = (int(bbox[0] + bbox[2]), int(bbox[1] + bbox[3]))
-                        cv2.rectangle(frame, p1, p2, (0, 255, 0), 2)
-                        
-                        # Calculate center
-                        center = (int(bbox[0] + bbox[2] / 2), int(bbox[1] + bbox[3] / 2))
-                        cv2.circle(frame, center, 10, (255, 0, 0), 3)
-                        
-                        # Calculate speed
-                        if previous_center is not None:
-                            distance = math.sqrt((center[0] - previous_center[0]) ** 2 + 
-                                              (center[1] - previous_center[1]) ** 2)
-                            speed = distance * fps  # pixels per second
-                            speeds.append(speed)
-                            
-                            # Display speed
-                            speed_kmh = speed * 3.6  # Convert to km/h
-                            cv2.putText(frame, f"Speed: {speed_kmh:.1f} km/h", (10, 30), 
-                                       cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                        
-                        previous_center = center
-                        
-                        # Add pose detection for skeleton generation
-                        try:
-                            # Convert BGR to RGB for MediaPipe
-                            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                            pose_results = pose.process(rgb_frame)
-                            
-                            # If pose landmarks are detected, extract key points
-                            if pose_results.pose_landmarks:
-                                landmark_positions = {'frame': frame_count}
-                                for id, landmark in enumerate(pose_results.pose_landmarks.landmark):
-                                    joint_name = mp_pose.PoseLandmark(id).name.lower()
-                                    landmark_positions[f'{joint_name}_x'] = landmark.x
-                                    landmark_positions[f'{joint_name}_y'] = landmark.y
-                                
-                                joint_data.append(landmark_positions)
-                        except Exception as e:
-                            print(f"⚠️ Pose detection error in frame {frame_count}: {e}")
-                        
-                        break
-        else:
-            # Use traditional tracker
-            ok, bbox = tracker.update(frame)
-        
-        if ok:
-            # Draw bounding box
-            p1 = (int(bbox[0]), int(bbox[1]))
-            p2 = (int(bbox[0] + bbox[2]), int(bbox[1] + bbox[3]))
-            cv2.rectangle(frame, p1, p2, (0, 255, 0), 2)
-            
-            # Calculate center
-            center = (int(bbox[0] + bbox[2] / 2), int(bbox[1] + bbox[3] / 2))
-            cv2.circle(frame, center, 10, (255, 0, 0), 3)
-            
-            # Calculate speed
-            if previous_center is not None:
-                distance = math.sqrt((center[0] - previous_center[0]) ** 2 + 
-                                  (center[1] - previous_center[1]) ** 2)
-                speed = distance * fps  # pixels per second
-                speeds.append(speed)
-                
-                # Display speed
-                speed_kmh = speed * 3.6  # Convert to km/h
-                cv2.putText(frame, f"Speed: {speed_kmh:.1f} km/h", (10, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            
-            previous_center = center
-        
-        # Add pose detection for skeleton generation
-        try:
-            # Convert BGR to RGB for MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pose_results = pose.process(rgb_frame)
-            
-            # If pose landmarks are detected, extract key points
-            if pose_results.pose_landmarks:
-                landmark_positions = {'frame': frame_count}
-                for id, landmark in enumerate(pose_results.pose_landmarks.landmark):
-                    joint_name = mp_pose.PoseLandmark(id).name.lower()
-                    landmark_positions[f'{joint_name}_x'] = landmark.x
-                    landmark_positions[f'{joint_name}_y'] = landmark.y
-                
-                joint_data.append(landmark_positions)
-        except Exception as e:
-            print(f"⚠️ Pose detection error in frame {frame_count}: {e}")
-        
-        out.write(frame)
-    
-    cap.release()
-    out.release()
-    
-    # Save speed data to CSV
-    if speeds:
-        df = pd.DataFrame({
-            'frame': range(1, len(speeds) + 1),
-            'speed_px_s': speeds,
-            'speed_kmh': [s * 3.6 for s in speeds],
-            'speed_mph': [s * 3.6 * 0.621371 for s in speeds]
-        })
-        df.to_csv(csv_path, index=False)
-    
-    # Generate skeleton animation video
-    skeleton_path = None
-    if joint_data:
-        try:
-            print(f"🎬 Generating skeleton animation for speed analysis...")
-            base_filename = os.path.splitext(os.path.basename(video_path))[0]
-            skeleton_path = os.path.join(os.path.dirname(video_path_out), f"skeleton_{base_filename}.mp4")
-            
-            print(f"🚀 Calling generate_live_streaming_skeleton with {len(joint_data)} frames...")
-            skeleton_result = generate_live_streaming_skeleton(video_path, skeleton_path, bbox, fps, width, height)
-            
-            if skeleton_result and os.path.exists(skeleton_path):
-                print(f"✅ Skeleton animation generated successfully!")
-            else:
-                print(f"❌ Skeleton generation failed")
-                skeleton_path = None
-                
-        except Exception as e:
-            print(f"❌ Exception during skeleton generation: {e}")
-            skeleton_path = None
-    
-    # Clean up pose detection
-    pose.close()
-    
-    # Prepare results
-    results = [
-        {
-            'name': os.path.basename(csv_path),
-            'type': 'csv',
-            'description': 'Player speed and acceleration data',
-            'preview': False,
-            'download': True
-        },
-        {
-            'name': os.path.basename(video_path_out),
-            'type': 'video',
-            'description': 'Annotated video with speed tracking',
-            'preview': True,
-            'download': True
-        }
-    ]
+    if not os.path.exists(video_path):
+        return jsonify({'error': 'File not found'}), 404
     
-    # Add skeleton video if generated
-    if skeleton_path and os.path.exists(skeleton_path):
-        results.append({
-            'name': os.path.basename(skeleton_path),
-            'type': 'video',
-            'description': 'Speed skeleton animation video',
-            'preview': True,
-            'download': True
-        })
+    selection = _selection_to_video_pixels(video_path, bbox, data.get('bbox_frame_width'))
+    preview = preview_hub.create()
+    try:
+        job = job_queue.submit('motion_capture', process_motion_capture_tracking,
+                               video_path, selection, output_csv_path, output_video_path, output_skeleton_path,
+                               params={'filename': filename, 'bbox': bbox}, preview=preview)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    preview_hub.attach(job.id, preview)
     
-    return {
+    return jsonify({
         'success': True,
-        'message': f'Speed analysis completed successfully! Processed {frame_count} frames.',
-        'results': results
-    }
+        'job_id': job.id,
+        'analysis_type': 'motion_capture',
+        'status_url': f'/jobs/{job.id}',
+        'preview_url': f'/jobs/{job.id}/preview'
+    }), 202
 
-def process_exercise_tracking(video_path, bbox, csv_path, video_path_out):
+def process_exercise_tracking(video_path, bbox, csv_path, video_path_out, progress=None, shards=1):
     """Process exercise tracking with selected person"""
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    
-    # Initialize MediaPipe
-    pose = mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
-    
-    # Setup video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(video_path_out, fourcc, fps, (width, height))
-    
-    joint_data = []
-    frame_count = 0
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        frame_count += 1
-        
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-        
-        # If pose landmarks are detected, extract key points
-        if results.pose_landmarks:
-            landmark_positions = {'frame': frame_count}
-            for id, landmark in enumerate(results.pose_landmarks.landmark):
-                joint_name = mp_pose.PoseLandmark(id).name.lower()
-                landmark_positions[f'{joint_name}_x'] = landmark.x
-                landmark_positions[f'{joint_name}_y'] = landmark.y
-                
-                # Draw the joints as circles on the frame
-                x = int(landmark.x * width)
-                y = int(landmark.y * height)
-                cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)  # Green circles for joints
-            
-            # Draw pose connections
-            mp.solutions.drawing_utils.draw_landmarks(
-                frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                mp.solutions.drawing_utils.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2),
-                mp.solutions.drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
-            )
-            
-            # Store frame data
-            joint_data.append(landmark_positions)
-        
-        out.write(frame)
-    
-    cap.release()
-    out.release()
-    pose.close()
-    
-    # Save joint positions to CSV
-    if joint_data:
-        joint_df = pd.DataFrame(joint_data)
-        joint_df.to_csv(csv_path, index=False)
+    # Joint positions are written to the CSV as they are posed
+    _, landmarks_key, _, _, _ = _annotated_pose_pass(video_path, video_path_out, progress, shards,
+                                                     tables={'joints': csv_path})
     
     return {
         'success': True,
         'message': 'Exercise analysis completed successfully',
+        'landmarks': landmarks_key,
         'results': [
-            {
-                'name': os.path.basename(csv_path),
-                'type': 'csv',
-                'description': 'Exercise form, range of motion, and biomechanics data',
-                'preview': False,
-                'download': True
-            },
+            *_metrics_results(os.path.basename(csv_path), 'Exercise form, range of motion, and biomechanics data'),
             {
                 'name': os.path.basename(video_path_out),
                 'type': 'video',
@@ -1206,8 +1271,14 @@ def process_exercise_tracking(video_path, bbox, csv_path, video_path_out):
         ]
     }
 
-def process_motion_capture_tracking(video_path, bbox, csv_path, video_path_out, skeleton_path_out):
-    """Process motion capture tracking with selected person and generate skeleton-only video"""
+def process_motion_capture_tracking(video_path, bbox, csv_path, video_path_out, skeleton_path_out, progress=None,
+                                    preview=None):
+    """
+    Process motion capture tracking with selected person and generate skeleton-only video
+    
+    ``bbox`` is the person's box on the first frame, in video pixels. The person is
+    tracked through the video and pose runs on their padded box only.
+    """
     print(f"🎬 STARTING process_motion_capture_tracking:")
     print(f"   📹 Video: {video_path}")
     print(f"   📦 BBox: {bbox}")
@@ -1219,76 +1290,67 @@ def process_motion_capture_tracking(video_path, bbox, csv_path, video_path_out,
     fps = cap.get(cv2.CAP_PROP_FPS)
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     
-    # Initialize MediaPipe
-    pose = mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+    # Pose only the selected player's tracked box (served from the landmark cache when posed before)
+    estimator = _PoseEstimator(video_path, selection=bbox)
     
-    # Setup video writers
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(video_path_out, fourcc, fps, (width, height))
-    skeleton_out = cv2.VideoWriter(skeleton_path_out, fourcc, fps, (width, height))
+    completed = False
+    cleanup = contextlib.ExitStack()
+    # Unwound in reverse and each step runs even if an earlier one raises, so the Pose graph always returns to the pool
+    cleanup.callback(lambda: estimator.close(completed, fps=fps, width=width, height=height))
+    cleanup.callback(cap.release)
+    if preview is not None:
+        cleanup.callback(preview.close)
     
-    joint_data = []
-    frame_count = 0
+    def infer(item):
+        frame_index, frame, roi = item
+        return frame_index, frame, estimator(frame_index, frame, roi)
     
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        frame_count += 1
-        
-        # Convert BGR to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-        
+    metrics_stream = live_metrics.stream(fps, width, height)
+    
+    def render(item):
+        frame_index, frame, pose_landmarks = item
         # If pose landmarks are detected, extract key points
-        if results.pose_landmarks:
-            landmark_positions = {'frame': frame_count}
-            for id, landmark in enumerate(results.pose_landmarks.landmark):
-                joint_name = mp_pose.PoseLandmark(id).name.lower()
-                landmark_positions[f'{joint_name}_x'] = landmark.x
-                landmark_positions[f'{joint_name}_y'] = landmark.y
-                
-                # Draw the joints as circles on the frame
-                x = int(landmark.x * width)
-                y = int(landmark.y * height)
-                cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)  # Green circles for joints
-            
-            # Draw pose connections
-            mp.solutions.drawing_utils.draw_landmarks(
-                frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                mp.solutions.drawing_utils.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2),
-                mp.solutions.drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
-            )
-            
-            # Store frame data
-            joint_data.append(landmark_positions)
+        if pose_landmarks:
+            metrics_stream.update_landmarks(pose_landmarks)
+            pose_tables.add(frame_index, pose_landmarks)
+            draw_pose_overlay(frame, pose_landmarks, width, height)
             
-            # Generate skeleton-only frame on white gridded background
-            skeleton_frame = create_skeleton_frame(results.pose_landmarks, width, height)
-            skeleton_out.write(skeleton_frame)
+            # Generate skeleton-only frame on white gridded background (its own copy: encoded on another thread)
+            skeleton_frame = create_skeleton_frame(pose_landmarks, width, height)
         else:
             # If no pose detected, write blank white frame with grid
             skeleton_frame = create_blank_grid_frame(width, height)
-            skeleton_out.write(skeleton_frame)
-        
-        out.write(frame)
+        return frame_index, frame, skeleton_frame
     
-    cap.release()
-    out.release()
-    skeleton_out.release()
-    pose.close()
+    def encode(item):
+        frame_index, frame, skeleton_frame = item
+        skeleton_out.write(skeleton_frame)
+        out.write(frame)
+        if preview is not None:
+            preview.offer(frame)
+    
+    with cleanup:
+        # Joint positions are written as they are posed; closing writes the last partial chunk
+        pose_tables = cleanup.enter_context(contextlib.closing(_PoseTables({'joints': csv_path}, fps, width, height)))
+        # Setup video writers
+        out = cleanup.enter_context(video_encoder.open(video_path_out, fps, width, height))
+        skeleton_out = cleanup.enter_context(video_encoder.open(skeleton_path_out, fps, width, height))
+        tracking = _tracking_stage(bbox if estimator.cached is None else None, fps)
+        FramePipeline(iter_video_frames(cap),
+                      [('tracking', tracking), ('inference', infer), ('render', render), ('encode', encode)],
+                      on_item=_pipeline_progress(progress, total_frames, metrics_stream)).run()
+        completed = True
+    
+    if pose_tables.rows:
+        print(f"📊 CSV saved with {pose_tables.rows} frames of pose data")
+    else:
+        print(f"⚠️  No pose data collected - CSV generation skipped")
     
-    # Initialize results list FIRST - ALWAYS defined regardless of code path
+    # Results list is ALWAYS defined regardless of code path
     results_list = [
-        {
-            'name': os.path.basename(csv_path),
-            'type': 'csv',
-            'description': 'Complete off-ice exercise data with joint trajectories',
-            'preview': False,
-            'download': True
-        },
+        *_metrics_results(os.path.basename(csv_path), 'Complete off-ice exercise data with joint trajectories'),
         {
             'name': os.path.basename(video_path_out),
             'type': 'video',
@@ -1304,71 +1366,23 @@ def process_motion_capture_tracking(video_path, bbox, csv_path, video_path_out,
             'download': True
         }
     ]
-    
-    # Save joint positions to CSV
-    print(f"🔍 CHECKING joint_data: length = {len(joint_data) if joint_data else 'None/Empty'}")
-    
-    if joint_data:
-        print(f"✅ joint_data exists with {len(joint_data)} frames - proceeding with CSV generation")
-        joint_df = pd.DataFrame(joint_data)
-        joint_df.to_csv(csv_path, index=False)
-        print(f"📊 CSV saved with {len(joint_data)} frames of pose data")
-        print(f"📦 FINAL results list has {len(results_list)} total outputs")
-    else:
-        print(f"⚠️  No pose data collected - CSV generation skipped")
+    print(f"📦 FINAL results list has {len(results_list)} total outputs")
     
     return {
         'success': True,
         'message': 'Motion capture analysis completed successfully',
+        'landmarks': estimator.cache_key,
         'results': results_list
     }
 
 # Helper functions for skeleton video generation
-def create_skeleton_frame(pose_landmarks, width, height):
-    """Create a skeleton-only frame on white gridded background"""
-    # Create white background
-    frame = np.ones((height, width, 3), dtype=np.uint8) * 255
-    
-    # Draw grid lines
-    grid_spacing = 50
-    for x in range(0, width, grid_spacing):
-        cv2.line(frame, (x, 0), (x, height), (200, 200, 200), 1)
-    for y in range(0, height, grid_spacing):
-        cv2.line(frame, (0, y), (width, y), (200, 200, 200), 1)
-    
-    # Draw skeleton connections
-    for connection in mp_pose.POSE_CONNECTIONS:
-        start_idx, end_idx = connection
-        start_landmark = pose_landmarks.landmark[start_idx]
-        end_landmark = pose_landmarks.landmark[end_idx]
-        
-        start_x = int(start_landmark.x * width)
-        start_y = int(start_landmark.y * height)
-        end_x = int(end_landmark.x * width)
-        end_y = int(end_landmark.y * height)
-        
-        cv2.line(frame, (start_x, start_y), (end_x, end_y), (0, 0, 255), 3)
-    
-    # Draw joint circles
-    for landmark in pose_landmarks.landmark:
-        x = int(landmark.x * width)
-        y = int(landmark.y * height)
-        cv2.circle(frame, (x, y), 6, (0, 255, 0), -1)
-    
-    return frame
+def create_skeleton_frame(pose_landmarks, width, height, out=None):
+    """Create a skeleton-only frame on white gridded background (in ``out`` if given)"""
+    return FULL_SKELETON.render(pose_landmarks, width, height, out=out)
 
-def create_blank_grid_frame(width, height):
-    """Create a blank white frame with grid lines"""
-    frame = np.ones((height, width, 3), dtype=np.uint8) * 255
-    
-    # Draw grid lines
-    grid_spacing = 50
-    for x in range(0, width, grid_spacing):
-        cv2.line(frame, (x, 0), (x, height), (200, 200, 200), 1)
-    for y in range(0, height, grid_spacing):
-        cv2.line(frame, (0, y), (width, y), (200, 200, 200), 1)
-    
-    return frame
+def create_blank_grid_frame(width, height, out=None):
+    """Create a blank white frame with grid lines (in ``out`` if given)"""
+    return blank_frame(width, height, out=out)
 
 # 3D Skeleton Generation Functions - REMOVED
 # All 3D skeleton functionality has been replaced with simple 2D skeleton generation
@@ -1388,40 +1402,36 @@ def generate_fast_2d_skeleton_video(pose_data, output_path, fps, width, height):
         print(f"🚀 Ultra fast mode: Reduced resolution from {width}x{height} to {fast_width}x{fast_height}")
         
         # Setup video writer for skeleton animation
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        skeleton_out = cv2.VideoWriter(output_path, fourcc, fps, (fast_width, fast_height))
-        
-        print(f"🎨 Creating FAST 2D skeleton animation frames...")
+        with video_encoder.open(output_path, fps, fast_width, fast_height) as skeleton_out:
+            print(f"🎨 Creating FAST 2D skeleton animation frames...")
         
-        # 🚀 ULTRA FAST MODE: Process only every 3rd frame
-        frame_skip = 3
-        total_frames = len(pose_data)
-        processed_frames = 0
+            # 🚀 ULTRA FAST MODE: Process only every 3rd frame
+            frame_skip = 3
+            total_frames = len(pose_data)
+            processed_frames = 0
+            frame_buffer = None  # Reused: each frame is written before the next is drawn
         
-        print(f"🚀 Ultra fast mode: Processing every {frame_skip} frame(s)")
+            print(f"🚀 Ultra fast mode: Processing every {frame_skip} frame(s)")
         
-        for frame_idx, landmarks in enumerate(pose_data):
-            # Skip frames for speed
-            if frame_idx % frame_skip != 0:
-                continue
+            for frame_idx, landmarks in enumerate(pose_data):
+                # Skip frames for speed
+                if frame_idx % frame_skip != 0:
+                    continue
                 
-            if processed_frames % 10 == 0:  # Progress update every 10 processed frames
-                print(f"   🚀 Processing frame {frame_idx}/{total_frames} ({(frame_idx/total_frames)*100:.1f}%)")
+                if processed_frames % 10 == 0:  # Progress update every 10 processed frames
+                    print(f"   🚀 Processing frame {frame_idx}/{total_frames} ({(frame_idx/total_frames)*100:.1f}%)")
             
-            # Create blank frame for skeleton
-            frame = np.ones((fast_height, fast_width, 3), dtype=np.uint8) * 255  # White background
-            
-            if landmarks:
-                # 🚀 ULTRA FAST MODE: Simple 2D skeleton drawing (no 3D model loading)
-                frame = draw_simple_2d_skeleton(frame, landmarks, fast_width, fast_height)
-            else:
-                # If no pose detected, show empty frame
-                frame = create_blank_grid_frame(fast_width, fast_height)
+                if landmarks:
+                    # 🚀 ULTRA FAST MODE: Simple 2D skeleton drawing (no 3D model loading) on a white background
+                    frame = blank_frame(fast_width, fast_height, grid=False, out=frame_buffer)
+                    frame = draw_simple_2d_skeleton(frame, landmarks, fast_width, fast_height)
+                else:
+                    # If no pose detected, show empty frame
+                    frame = create_blank_grid_frame(fast_width, fast_height, out=frame_buffer)
             
-            skeleton_out.write(frame)
-            processed_frames += 1
-        
-        skeleton_out.release()
+                skeleton_out.write(frame)
+                frame_buffer = frame
+                processed_frames += 1
         
         print(f"🚀 FAST 2D skeleton animation video created!")
         print(f"   📁 Output: {output_path}")
@@ -1439,6 +1449,9 @@ def generate_fast_2d_skeleton_video(pose_data, output_path, fps, width, height):
 
 def generate_live_streaming_skeleton(video_path, output_path, bbox, fps, width, height):
     """Generate skeleton animation using TRUE STREAMING - processes entire video as it plays"""
+    pose = None
+    cap = None
+    skeleton_out = None
     try:
         print(f"🎬 ENTER generate_live_streaming_skeleton (TRUE STREAMING):")
         print(f"📁 Video input: {video_path}")
@@ -1454,24 +1467,13 @@ def generate_live_streaming_skeleton(video_path, output_path, bbox, fps, width,
         stream_height = int(height * (stream_width / width))
         print(f"🎬 Streaming mode: Optimized resolution from {width}x{height} to {stream_width}x{stream_height}")
         
-        # 🎬 TRUE STREAMING: Use hardware acceleration when possible
-        try:
-            fourcc = cv2.VideoWriter_fourcc(*'avc1')  # H.264 hardware acceleration
-            skeleton_out = cv2.VideoWriter(output_path, fourcc, fps, (stream_width, stream_height))
-            if not skeleton_out.isOpened():
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                skeleton_out = cv2.VideoWriter(output_path, fourcc, fps, (stream_width, stream_height))
-                print("⚠️ Hardware acceleration not available, using software encoding")
-            else:
-                print("✅ Using hardware-accelerated H.264 encoding")
-        except:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            skeleton_out = cv2.VideoWriter(output_path, fourcc, fps, (stream_width, stream_height))
-            print("⚠️ Using software MP4V encoding")
+        # 🎬 TRUE STREAMING: H.264 in a separate ffmpeg process when available
+        skeleton_out = video_encoder.open(output_path, fps, stream_width, stream_height)
+        print(f"🎞️ Encoding with {video_encoder.codec or 'OpenCV mp4v'}")
         
         # 🎬 TRUE STREAMING: Open video and process in real-time
         cap = cv2.VideoCapture(video_path)
-        pose = mp_pose.Pose(min_detection_confidence=0.6, min_tracking_confidence=0.6)
+        pose = pose_pool.acquire(min_detection_confidence=0.6, min_tracking_confidence=0.6)
         
         print(f"🎬 Starting TRUE STREAMING skeleton generation...")
         print(f"   📹 Processing entire video file")
@@ -1479,6 +1481,7 @@ def generate_live_streaming_skeleton(video_path, output_path, bbox, fps, width,
         
         frame_count = 0
         start_time = time.time()
+        skeleton_buffer = None  # Reused: each frame is written before the next is drawn
         
         # 🎬 TRUE STREAMING: Process every frame for complete video
         # But optimize by processing at reduced resolution
@@ -1511,23 +1514,23 @@ def generate_live_streaming_skeleton(video_path, output_path, bbox, fps, width,
             rgb_frame = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
             pose_results = pose.process(rgb_frame)
             
-            # Create skeleton frame
-            skeleton_frame = np.ones((stream_height, stream_width, 3), dtype=np.uint8) * 255  # White background
-            
             if pose_results.pose_landmarks:
-                # 🎬 TRUE STREAMING: Generate skeleton frame immediately
+                # 🎬 TRUE STREAMING: Generate skeleton frame immediately on a white background
+                skeleton_frame = blank_frame(stream_width, stream_height, grid=False, out=skeleton_buffer)
                 skeleton_frame = draw_simple_2d_skeleton(skeleton_frame, pose_results.pose_landmarks, stream_width, stream_height)
             else:
                 # No pose detected, show empty frame
-                skeleton_frame = create_blank_grid_frame(stream_width, stream_height)
+                skeleton_frame = create_blank_grid_frame(stream_width, stream_height, out=skeleton_buffer)
             
             # 🎬 TRUE STREAMING: Write frame immediately (no buffering)
             skeleton_out.write(skeleton_frame)
+            skeleton_buffer = skeleton_frame
         
         # Cleanup
         cap.release()
         skeleton_out.release()
-        pose.close()
+        pose_pool.release(pose)
+        pose = None
         
         total_time = time.time() - start_time
         print(f"🎬 TRUE STREAMING skeleton generation completed!")
@@ -1544,6 +1547,12 @@ def generate_live_streaming_skeleton(video_path, output_path, bbox, fps, width,
         print(f"❌ Error in true streaming skeleton generation: {e}")
         import traceback
         traceback.print_exc()
+        if cap is not None:
+            cap.release()
+        if skeleton_out is not None:
+            skeleton_out.abort()  # Reap the encoder now rather than leaving it to garbage collection
+        if pose is not None:
+            pose_pool.release(pose)
         return False
 
 # draw_3d_skeleton function - REMOVED
@@ -1558,45 +1567,8 @@ def draw_simple_2d_skeleton(frame, pose_landmarks, width, height):
         return frame
     
     try:
-        # 🚀 ULTRA FAST MODE: Simple 2D skeleton drawing from MediaPipe landmarks
-        # Define key connections for basic skeleton (MediaPipe landmark indices)
-        connections = [
-            (0, 1), (0, 2), (1, 3), (2, 4),  # Head
-            (0, 5), (0, 6), (5, 6),  # Shoulders
-            (5, 7), (7, 9), (6, 8), (8, 10),  # Arms
-            (5, 11), (6, 12), (11, 12),  # Hips
-            (11, 13), (13, 15), (12, 14), (14, 16)  # Legs
-        ]
-        
-        # Draw connections (bones)
-        for start_idx, end_idx in connections:
-            if start_idx < len(pose_landmarks.landmark) and end_idx < len(pose_landmarks.landmark):
-                start_landmark = pose_landmarks.landmark[start_idx]
-                end_landmark = pose_landmarks.landmark[end_idx]
-                
-                start_x = int(start_landmark.x * width)
-                start_y = int(start_landmark.y * height)
-                end_x = int(end_landmark.x * width)
-                end_y = int(end_landmark.y * height)
-                
-                # Check bounds
-                if (0 <= start_x < width and 0 <= start_y < height and 
-                    0 <= end_x < width and 0 <= end_y < height):
-                    # Draw bone with thicker line for visibility
-                    cv2.line(frame, (start_x, start_y), (end_x, end_y), (0, 100, 255), 4)
-        
-        # Draw joints (landmarks)
-        for landmark in pose_landmarks.landmark:
-            x = int(landmark.x * width)
-            y = int(landmark.y * height)
-            
-            if 0 <= x < width and 0 <= y < height:
-                # Draw joint with larger circle for visibility
-                cv2.circle(frame, (x, y), 6, (0, 255, 0), -1)
-                # Add black outline for better visibility
-                cv2.circle(frame, (x, y), 6, (0, 0, 0), 2)
-        
-        return frame
+        # 🚀 ULTRA FAST MODE: all bones in one polyline call, joints stamped from one point array
+        return SIMPLE_SKELETON.draw(frame, pose_landmarks, width, height)
         
     except Exception as e:
         print(f"⚠️ Error in simple 2D skeleton drawing: {e}")
@@ -1938,12 +1910,28 @@ def analyze_player_tracking(video_path, filename):
         ]
     }
 
+def _send_output(filename, as_attachment=False):
+    """
+    Serve a file from the output folder with byte-range and cache validation support
+    
+    Range requests are answered with 206 partial content, so the video player can
+    seek without refetching the file. If-None-Match / If-Modified-Since get a 304
+    while the file is unchanged. Output names are reused when an analysis is
+    re-run, so browsers may keep a copy but must revalidate it before use.
+    Metrics CSVs written in a columnar format are rendered on first request.
+    """
+    file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
+    if not os.path.isfile(file_path) and not metrics_writer.ensure_csv(file_path):
+        return jsonify({'error': 'File not found'}), 404
+    
+    response = send_file(file_path, as_attachment=as_attachment, conditional=True, etag=True, max_age=0)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/download/<filename>')
 def download_file(filename):
-    file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-    if os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True)
-    return jsonify({'error': 'File not found'}), 404
+    return _send_output(filename, as_attachment=True)
 
 # download_3d_skeleton function - REMOVED
 # No longer needed since we're using simple 2D skeleton generation
@@ -1951,10 +1939,7 @@ def download_file(filename):
 @app.route('/view/<filename>')
 def view_file(filename):
     """Serve files for viewing in browser"""
-    file_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-    if os.path.exists(file_path):
-        return send_file(file_path)
-    return jsonify({'error': 'File not found'}), 404
+    return _send_output(filename)
 
 @app.route('/results/<analysis_id>')
 def get_results(analysis_id):
@@ -1995,7 +1980,7 @@ def list_files():
     
     return jsonify(files)
 
-def analyze_motion_capture(video_path, filename):
+def analyze_motion_capture(video_path, filename, progress=None):
     """Off-ice analysis - requires person selection first"""
     try:
         print(f"🎬 Motion capture analysis requested for: {filename}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cached-canvas skeleton renderer against the per-frame drawing it replaced
+
+Usage:
+    python3 benchmark_rendering.py --frames 500 --size 1920 1080
+    python3 benchmark_rendering.py --size 640 360 --size 960 540 --size 1920 1080
+
+Poses are a standing skeleton jittered from frame to frame, some partly outside
+the frame, so bounds handling is exercised. Each renderer draws the same poses;
+the new frames are compared pixel for pixel with the old ones.
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from pose_helpers import array_to_landmarks, mp_pose
+from skeleton_renderer import FULL_SKELETON, SIMPLE_CONNECTIONS, SIMPLE_SKELETON, blank_frame
+
+
+def legacy_blank_grid_frame(width, height):
+    """create_blank_grid_frame as it was: fresh image, every grid line redrawn"""
+    frame = np.ones((height, width, 3), dtype=np.uint8) * 255
+    grid_spacing = 50
+    for x in range(0, width, grid_spacing):
+        cv2.line(frame, (x, 0), (x, height), (200, 200, 200), 1)
+    for y in range(0, height, grid_spacing):
+        cv2.line(frame, (0, y), (width, y), (200, 200, 200), 1)
+    return frame
+
+
+def legacy_skeleton_frame(pose_landmarks, width, height):
+    """create_skeleton_frame as it was: one cv2 call per bone and per joint"""
+    frame = legacy_blank_grid_frame(width, height)
+    for start_idx, end_idx in mp_pose.POSE_CONNECTIONS:
+        start, end = pose_landmarks.landmark[start_idx], pose_landmarks.landmark[end_idx]
+        cv2.line(frame, (int(start.x * width), int(start.y * height)),
+                 (int(end.x * width), int(end.y * height)), (0, 0, 255), 3)
+    for landmark in pose_landmarks.landmark:
+        cv2.circle(frame, (int(landmark.x * width), int(landmark.y * height)), 6, (0, 255, 0), -1)
+    return frame
+
+
+def legacy_simple_skeleton(pose_landmarks, width, height):
+    """White frame plus draw_simple_2d_skeleton as it was"""
+    frame = np.ones((height, width, 3), dtype=np.uint8) * 255
+    for start_idx, end_idx in SIMPLE_CONNECTIONS:
+        start, end = pose_landmarks.landmark[start_idx], pose_landmarks.landmark[end_idx]
+        start_x, start_y = int(start.x * width), int(start.y * height)
+        end_x, end_y = int(end.x * width), int(end.y * height)
+        if 0 <= start_x < width and 0 <= start_y < height and 0 <= end_x < width and 0 <= end_y < height:
+            cv2.line(frame, (start_x, start_y), (end_x, end_y), (0, 100, 255), 4)
+    for landmark in pose_landmarks.landmark:
+        x, y = int(landmark.x * width), int(landmark.y * height)
+        if 0 <= x < width and 0 <= y < height:
+            cv2.circle(frame, (x, y), 6, (0, 255, 0), -1)
+            cv2.circle(frame, (x, y), 6, (0, 0, 0), 2)
+    return frame
+
+
+def synthetic_poses(count, seed=0):
+    """``count`` 33 x 4 poses drifting across the frame, the last ones partly leaving it"""
+    rng = np.random.default_rng(seed)
+    base = np.zeros((33, 4), dtype=np.float32)
+    base[:, 0] = 0.5 + rng.normal(0, 0.08, 33)
+    base[:, 1] = np.linspace(0.15, 0.9, 33)
+    base[:, 3] = 1.0
+    poses = []
+    for i in range(count):
+        pose = base.copy()
+        pose[:, 0] += 0.6 * (i / max(count - 1, 1)) - 0.2 + rng.normal(0, 0.01, 33)
+        pose[:, 1] += rng.normal(0, 0.01, 33)
+        poses.append(array_to_landmarks(pose))
+    return poses
+
+
+def run(render, poses):
+    started = time.perf_counter()
+    frames = [render(pose) for pose in poses]
+    return time.perf_counter() - started, frames
+
+
+def compare(name, legacy, cached, poses):
+    legacy_seconds, legacy_frames = run(legacy, poses)
+    cached_seconds, cached_frames = run(cached, poses)
+    differing = sum(int(np.any(a != b, axis=2).sum()) for a, b in zip(legacy_frames, cached_frames))
+    print(f"{name:16s} {len(poses) / legacy_seconds:8.1f} fps -> {len(poses) / cached_seconds:8.1f} fps  "
+          f"x{legacy_seconds / cached_seconds:5.2f}  ({differing} differing pixels)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--size', type=int, nargs=2, action='append', metavar=('WIDTH', 'HEIGHT'))
+    args = parser.parse_args()
+
+    poses = synthetic_poses(args.frames)
+    for width, height in args.size or [(1920, 1080)]:
+        print(f"🎨 {args.frames} frames at {width}x{height}")
+        blank_frame(width, height)  # Draw the canvas once up front, as a long video would
+        buffer = blank_frame(width, height)
+        compare('blank grid', lambda pose: legacy_blank_grid_frame(width, height),
+                lambda pose: blank_frame(width, height), poses)
+        compare('full skeleton', lambda pose: legacy_skeleton_frame(pose, width, height),
+                lambda pose: FULL_SKELETON.render(pose, width, height), poses)
+        compare('simple skeleton', lambda pose: legacy_simple_skeleton(pose, width, height),
+                lambda pose: SIMPLE_SKELETON.render(pose, width, height, grid=False), poses)
+        # Reusing one buffer, as the streaming skeleton writer does (only the timing is meaningful here)
+        started = time.perf_counter()
+        for pose in poses:
+            SIMPLE_SKELETON.render(pose, width, height, grid=False, out=buffer)
+        print(f"{'  reused buffer':16s} {len(poses) / (time.perf_counter() - started):8.1f} fps")
+
+
+if __name__ == '__main__':
+    main()
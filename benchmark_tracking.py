@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched YOLO + ByteTrack tracking against batch size and detection stride
+
+Usage:
+    python3 benchmark_tracking.py uploads/game.mp4 --bbox 800 300 120 260 --frames 300 --batch-sizes 1 2 4 8 16
+    python3 benchmark_tracking.py uploads/game.mp4 --bbox 800 300 120 260 --strides 2 4 8
+
+Each configuration tracks the same frames from a fresh ByteTrack context, so the
+locked-on player and the resulting boxes can be compared across runs. Strided
+runs report how far their boxes drift from the every-frame detector boxes.
+"""
+
+import argparse
+import time
+
+import cv2
+from ultralytics import YOLO
+
+from player_tracking import init_tracking, iter_tracked
+
+
+def load_frames(video_path, count):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames, fps
+
+
+def run(model, frames, fps, bbox, batch_size, stride=1):
+    ctx = init_tracking(frames[0], bbox, model, frame_rate=fps / stride)
+    items = enumerate(frames, start=1)
+    started = time.perf_counter()
+    boxes = [bbox_out for _, _, ok, bbox_out in iter_tracked(items, ctx, batch_size, stride=stride)]
+    elapsed = time.perf_counter() - started
+    return elapsed, boxes, ctx.get('stats')
+
+
+def center_error(boxes, reference_boxes):
+    """Median distance in pixels between box centers, over frames where both have a box"""
+    errors = []
+    for box, reference in zip(boxes, reference_boxes):
+        if box is None or reference is None:
+            continue
+        errors.append(((box[0] + box[2] / 2 - reference[0] - reference[2] / 2) ** 2 +
+                       (box[1] + box[3] / 2 - reference[1] - reference[3] / 2) ** 2) ** 0.5)
+    errors.sort()
+    return errors[len(errors) // 2] if errors else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video')
+    parser.add_argument('--bbox', type=int, nargs=4, required=True, metavar=('X', 'Y', 'W', 'H'))
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--strides', type=int, nargs='*', default=[], help='Detection strides to compare (batch size 1)')
+    parser.add_argument('--model', default='yolov8n.pt')
+    args = parser.parse_args()
+
+    frames, video_fps = load_frames(args.video, args.frames)
+    if not frames:
+        raise SystemExit(f"Could not read frames from {args.video}")
+    print(f"🎬 {len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    model = YOLO(args.model)
+    model(frames[0], verbose=False)  # Warm up so the first run is not charged for it
+
+    baseline = None
+    reference_boxes = None
+    for batch_size in args.batch_sizes:
+        elapsed, boxes, _ = run(model, frames, video_fps, tuple(args.bbox), batch_size)
+        fps = len(frames) / elapsed
+        baseline = baseline or fps
+        if reference_boxes is None:
+            reference_boxes = boxes
+        matches = sum(a == b for a, b in zip(boxes, reference_boxes))
+        print(f"batch {batch_size:3d}: {fps:7.1f} fps  x{fps / baseline:4.2f}  "
+              f"({matches}/{len(frames)} boxes identical to batch {args.batch_sizes[0]})")
+
+    for stride in args.strides:
+        elapsed, boxes, stats = run(model, frames, video_fps, tuple(args.bbox), 1, stride)
+        fps = len(frames) / elapsed
+        print(f"stride {stride:2d}: {fps:7.1f} fps  x{fps / baseline:4.2f}  "
+              f"detected {stats['detected']}, predicted {stats['predicted']}, "
+              f"early re-detections {stats['early_detections']}, "
+              f"median center error {center_error(boxes, reference_boxes):.1f}px")
+
+
+if __name__ == '__main__':
+    main()
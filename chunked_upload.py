@@ -0,0 +1,166 @@
+"""
+Resumable chunked uploads written straight to disk.
+
+A client opens a session with the file's name and size, then sends the body
+as raw ``application/octet-stream`` chunks, each tagged with its byte offset.
+Chunks are copied from the request stream to a ``.part`` file in small
+blocks, so memory use stays bounded regardless of file size. Session
+metadata lives next to the part file, so a client that reconnects (or a
+restarted server) can ask how many bytes arrived and continue from there.
+When the last byte arrives, the part file is handed to the content store.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import BinaryIO, Dict
+
+from content_store import CHUNK_SIZE, UploadStore
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class UploadError(Exception):
+    """Raised for an invalid upload request; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadOffsetError(UploadError):
+    """Raised when a chunk does not start where the part file ends"""
+
+    def __init__(self, received: int):
+        super().__init__(f'Expected chunk at offset {received}', status=409)
+        self.received = received
+
+
+class ChunkedUploads:
+    """Resumable upload sessions stored under ``directory``"""
+
+    def __init__(self, directory: str, store: UploadStore, max_bytes: int,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, retention_seconds: int = 24 * 3600):
+        self.directory = directory
+        self.store = store
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._session_locks = {}
+        self._hashers = {}  # upload_id -> (bytes hashed, running sha256)
+        os.makedirs(directory, exist_ok=True)
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f'{upload_id}.json')
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f'{upload_id}.part')
+
+    def _session_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._session_locks.setdefault(upload_id, threading.Lock())
+
+    def _load(self, upload_id: str) -> Dict:
+        if not upload_id.isalnum():
+            raise UploadError('Invalid upload id')
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                session = json.load(f)
+            session['received'] = os.path.getsize(self._part_path(upload_id))
+        except (OSError, ValueError):
+            raise UploadError('Upload not found', status=404)
+        return session
+
+    def start(self, filename: str, size: int) -> Dict:
+        """Open a session for ``size`` bytes to be stored as ``filename``"""
+        if size <= 0:
+            raise UploadError('Upload size must be positive')
+        if size > self.max_bytes:
+            raise UploadError(f'Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit', status=413)
+
+        self._prune()
+        upload_id = uuid.uuid4().hex
+        session = {'upload_id': upload_id, 'filename': filename, 'size': size, 'created_at': time.time()}
+        open(self._part_path(upload_id), 'wb').close()
+        with open(self._meta_path(upload_id), 'w') as f:
+            json.dump(session, f)
+        return {**session, 'received': 0, 'chunk_size': self.chunk_size}
+
+    def status(self, upload_id: str) -> Dict:
+        """Session state, including how many bytes have been received so far"""
+        return {**self._load(upload_id), 'chunk_size': self.chunk_size}
+
+    def write_chunk(self, upload_id: str, offset: int, stream: BinaryIO) -> Dict:
+        """
+        Append the body of ``stream`` at ``offset``
+
+        Raises:
+            UploadOffsetError: if ``offset`` is not the number of bytes already received
+            UploadError: if the chunk would run past the declared size
+        """
+        with self._session_lock(upload_id):
+            session = self._load(upload_id)
+            received = session['received']
+            if offset != received:
+                raise UploadOffsetError(received)
+
+            hashed, sha = self._hashers.pop(upload_id, (0, None))
+            if offset == 0:
+                sha = hashlib.sha256()
+            elif sha is None or hashed != received:
+                sha = None  # Server restarted mid-upload; rehash on completion instead
+
+            with open(self._part_path(upload_id), 'ab') as f:
+                for block in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    received += len(block)
+                    if received > session['size']:
+                        f.truncate(offset)
+                        raise UploadError('Chunk runs past the declared upload size')
+                    if sha is not None:
+                        sha.update(block)
+                    f.write(block)
+            self._hashers[upload_id] = (received, sha)
+
+            session['received'] = received
+            return session
+
+    def complete(self, upload_id: str) -> Dict:
+        """Move a fully received upload into the content store; returns its store entry"""
+        with self._session_lock(upload_id):
+            session = self._load(upload_id)
+            if session['received'] != session['size']:
+                raise UploadOffsetError(session['received'])
+
+            hashed, sha = self._hashers.pop(upload_id, (0, None))
+            if sha is None or hashed != session['size']:
+                sha = hashlib.sha256()
+                with open(self._part_path(upload_id), 'rb') as f:
+                    for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+                        sha.update(block)
+
+            stored = self.store.add_file(self._part_path(upload_id), session['filename'], sha.hexdigest())
+            os.remove(self._meta_path(upload_id))
+
+        with self._lock:
+            self._session_locks.pop(upload_id, None)
+        return stored
+
+    def _prune(self):
+        """Drop sessions whose part file has not grown for longer than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        for name in os.listdir(self.directory):
+            upload_id, ext = os.path.splitext(name)
+            if ext != '.part':
+                continue
+            try:
+                if os.path.getmtime(os.path.join(self.directory, name)) >= cutoff:
+                    continue
+                os.remove(self._part_path(upload_id))
+                os.remove(self._meta_path(upload_id))
+            except OSError:
+                continue
+            self._hashers.pop(upload_id, None)
@@ -0,0 +1,212 @@
+"""
+Content-addressed storage for uploads and the analyses run on them.
+
+Uploads are hashed while they stream to disk and stored once per SHA-256
+under ``<upload folder>/blobs``. The user-facing filename is only an alias:
+a hard link in the upload folder pointing at the blob, so existing code that
+opens ``uploads/<filename>`` keeps working. Re-uploading the same bytes costs
+no extra disk and is reported as a duplicate; two different files that share
+a name get distinct aliases instead of overwriting each other.
+
+Analysis results are remembered per (content hash, analysis) so an identical
+upload can be answered from the previous run.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import BinaryIO, Dict, Optional
+
+CHUNK_SIZE = 1024 * 1024
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+_blob_folders = []  # UploadStore blob folders, whose file names are their contents' digests
+
+
+def _memo_key(path: str):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def remember_sha256(path: str, digest: str):
+    """Record a digest computed elsewhere (e.g. while streaming an upload)"""
+    with _digest_lock:
+        _digest_memo[_memo_key(path)] = digest
+
+
+def known_sha256(path: str) -> Optional[str]:
+    """
+    SHA-256 of a file if it is known without reading the file, else None
+
+    Known means memoized in this process, or ``path`` is an upload alias hard
+    linked to a stored blob, whose name is the digest. The latter survives
+    restarts, so stored uploads are never rehashed.
+    """
+    memo_key = _memo_key(path)
+    with _digest_lock:
+        digest = _digest_memo.get(memo_key)
+    if digest is None:
+        digest = _blob_digest(path)
+        if digest is not None:
+            with _digest_lock:
+                _digest_memo[memo_key] = digest
+    return digest
+
+
+def _blob_digest(path: str) -> Optional[str]:
+    """Digest in the name of the stored blob ``path`` is a hard link to, if any"""
+    stat = os.stat(path)
+    for folder in list(_blob_folders):
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            stem = os.path.splitext(entry.name)[0]
+            if len(stem) != 64 or entry.name.endswith('.part'):
+                continue
+            try:
+                blob_stat = entry.stat()
+            except OSError:
+                continue
+            if (blob_stat.st_ino, blob_stat.st_dev) == (stat.st_ino, stat.st_dev):
+                return stem
+    return None
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, memoized on (path, size, mtime) so repeat lookups are free"""
+    memo_key = _memo_key(path)
+    digest = known_sha256(path)
+    if digest is not None:
+        return digest
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+def _link_or_copy(source: str, target: str):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class UploadStore:
+    """Stores uploads by content hash with filenames as aliases"""
+
+    def __init__(self, upload_folder: str):
+        self.upload_folder = upload_folder
+        self.blob_folder = os.path.join(upload_folder, 'blobs')
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_folder, exist_ok=True)
+        if self.blob_folder not in _blob_folders:
+            _blob_folders.append(self.blob_folder)
+
+    def blob_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.blob_folder, f'{digest}{ext}')
+
+    def save_stream(self, stream: BinaryIO, filename: str) -> Dict:
+        """
+        Stream an upload to disk, hashing as it goes, and alias it as ``filename``
+
+        Args:
+            stream: Readable binary stream of the upload body
+            filename: Already sanitized filename requested by the client
+
+        Returns:
+            Dict with the alias ``filename``, its ``filepath``, the ``content_hash``
+            and whether the content was already stored (``duplicate``)
+        """
+        sha = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    sha.update(chunk)
+                    f.write(chunk)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return self.add_file(tmp_path, filename, sha.hexdigest())
+
+    def add_file(self, tmp_path: str, filename: str, digest: str) -> Dict:
+        """Move a fully written temp file into the store under ``digest`` and alias it"""
+        ext = os.path.splitext(filename)[1].lower()
+        blob = self.blob_path(digest, ext)
+
+        with self._lock:
+            duplicate = os.path.exists(blob)
+            if duplicate:
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, blob)
+            alias = self._alias_for(blob, filename, digest)
+
+        filepath = os.path.join(self.upload_folder, alias)
+        remember_sha256(filepath, digest)
+        remember_sha256(blob, digest)
+        print(f"📦 Stored upload {alias} as {digest[:12]}{' (duplicate)' if duplicate else ''}")
+        return {'filename': alias, 'filepath': filepath, 'content_hash': digest, 'duplicate': duplicate}
+
+    def _alias_for(self, blob: str, filename: str, digest: str) -> str:
+        """Link ``filename`` to the blob, renaming it if the name belongs to other content"""
+        stem, ext = os.path.splitext(filename)
+        for alias in (filename, f'{stem}_{digest[:8]}{ext}'):
+            alias_path = os.path.join(self.upload_folder, alias)
+            if not os.path.exists(alias_path):
+                _link_or_copy(blob, alias_path)
+                return alias
+            if os.path.samefile(alias_path, blob) or file_sha256(alias_path) == digest:
+                return alias
+
+        # Name and hashed name both taken by other content: replace the hashed alias
+        alias = f'{stem}_{digest[:8]}{ext}'
+        alias_path = os.path.join(self.upload_folder, alias)
+        os.remove(alias_path)
+        _link_or_copy(blob, alias_path)
+        return alias
+
+
+class ResultStore:
+    """Remembers analysis results per (content hash, analysis key)"""
+
+    def __init__(self, directory: str, output_folder: str, exists=os.path.exists):
+        self.directory = directory
+        self.output_folder = output_folder
+        self.exists = exists  # Whether an output file is (or can be made) available
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest: str, analysis_key: str) -> str:
+        return os.path.join(self.directory, f'{digest}_{analysis_key}.json')
+
+    def get(self, digest: str, analysis_key: str) -> Optional[Dict]:
+        """Previous result for this content, if all of its output files still exist"""
+        try:
+            with open(self._path(digest, analysis_key)) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        for item in result.get('results', []):
+            if not self.exists(os.path.join(self.output_folder, item['name'])):
+                return None
+        return result
+
+    def put(self, digest: str, analysis_key: str, result: Dict):
+        path = self._path(digest, analysis_key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
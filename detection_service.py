@@ -0,0 +1,156 @@
+"""
+Player detection on a single video frame for the player-selection screen.
+
+The selection UI asks for the same frame's detections repeatedly (two code
+paths, page reloads, several tabs). Results are cached per (video content,
+frame number, detector, confidence threshold), together with the downscaled
+JPEG preview the UI displays, so a repeat request costs a dict lookup.
+Concurrent requests for the same key are coalesced: the first one runs the
+detector and the others wait for its result.
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+from typing import Dict
+
+import cv2
+
+from content_store import file_sha256
+
+PERSON_CLASS = 0
+
+
+class DetectionError(Exception):
+    """Raised when the requested frame cannot be decoded"""
+
+
+class DetectionService:
+    """Cached, coalesced person detection on one frame of a video"""
+
+    def __init__(self, frame_reader, model_registry, max_entries: int = 128,
+                 max_width: int = 640, jpeg_quality: int = 70):
+        self.frame_reader = frame_reader
+        self.model_registry = model_registry
+        self.max_entries = max_entries
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def detect(self, video_path: str, frame_number: int, detector: str = 'yolov8n',
+               min_confidence: float = 0.3) -> Dict:
+        """
+        Detections on frame ``frame_number`` of ``video_path``
+
+        Returns:
+            Dict with the base64 JPEG ``frame`` (at most ``max_width`` wide), its
+            ``width``/``height``, ``frame_number``, ``players`` (bbox as x, y, w, h in
+            preview pixels) and ``cached``. Treat it as read-only.
+
+        Raises:
+            DetectionError: if the frame cannot be decoded
+        """
+        key = (file_sha256(video_path), frame_number, detector, round(float(min_confidence), 3))
+
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return {**result, 'cached': True}
+
+            waiter = self._in_flight.get(key)
+            if waiter is None:
+                waiter = self._in_flight[key] = {'event': threading.Event(), 'result': None, 'error': None}
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.coalesced += 1
+
+        if not owner:
+            waiter['event'].wait()
+            if waiter['error'] is not None:
+                raise waiter['error']
+            return {**waiter['result'], 'cached': True}
+
+        try:
+            result, cacheable = self._run(video_path, frame_number, detector, min_confidence)
+            waiter['result'] = result
+            if cacheable:
+                with self._lock:
+                    self._results[key] = result
+                    while len(self._results) > self.max_entries:
+                        self._results.popitem(last=False)
+        except Exception as e:
+            waiter['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            waiter['event'].set()
+
+        return {**result, 'cached': False}
+
+    def _run(self, video_path: str, frame_number: int, detector: str, min_confidence: float):
+        frame = self.frame_reader.read(video_path, frame_number)
+        if frame is None:
+            raise DetectionError(f'Could not read frame {frame_number}')
+
+        # Detect on the same downscaled frame the UI shows, so boxes need no rescaling
+        height, width = frame.shape[:2]
+        if width > self.max_width:
+            scale = self.max_width / width
+            frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+        _, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        result = {
+            'frame': base64.b64encode(buffer).decode('utf-8'),
+            'width': frame.shape[1],
+            'height': frame.shape[0],
+            'frame_number': frame_number,
+            'players': [],
+        }
+
+        if not self.model_registry.is_registered(detector):
+            print(f"❌ Detector {detector} not available")
+            return result, True
+
+        try:
+            results = self.model_registry.get(detector)(frame, verbose=False)
+        except Exception as e:
+            # Answer with the frame so the user can still draw a box by hand; retry next time
+            print(f"❌ {detector} detection error: {e}")
+            return result, False
+
+        if results:
+            boxes = results[0].boxes.xyxy.cpu().numpy()
+            confidences = results[0].boxes.conf.cpu().numpy()
+            classes = results[0].boxes.cls.cpu().numpy()
+            for i, (box, conf, cls) in enumerate(zip(boxes, confidences, classes)):
+                if cls == PERSON_CLASS and conf > min_confidence:
+                    x1, y1, x2, y2 = box
+                    result['players'].append({
+                        'id': i,
+                        'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
+                        'confidence': float(conf),
+                        'type': 'person'
+                    })
+        print(f"🎯 {detector} detected {len(result['players'])} people on frame {frame_number}")
+        return result, True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._results),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,205 @@
+"""
+Random access to individual video frames, backed by a keyframe index.
+
+Seeking with ``cv2.CAP_PROP_POS_FRAMES`` alone can be slow or inexact on long
+files. The index (built once per video content with ffprobe, usually right
+after upload) lists the frames a decoder can start from. A request for frame
+``n`` seeks to the nearest keyframe at or before ``n`` and decodes forward.
+Captures stay open between requests, so stepping forward through a video
+decodes only the frames in between. Recently decoded frames are kept in a
+byte-bounded LRU cache.
+"""
+
+import bisect
+import json
+import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import cv2
+
+from content_store import file_sha256
+
+# Without a keyframe index, decode forward at most this many frames before seeking instead
+MAX_FORWARD_DECODE = 250
+
+
+def probe_keyframes(video_path: str) -> Optional[List[int]]:
+    """0-based display-order numbers of the keyframes in the first video stream, or None without ffprobe"""
+    if not shutil.which('ffprobe'):
+        return None
+    try:
+        output = subprocess.run(
+            ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path],
+            check=True, capture_output=True, text=True
+        ).stdout
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"⚠️ ffprobe could not index {video_path}: {e}")
+        return None
+
+    packets = []
+    for line in output.splitlines():
+        pts, _, flags = line.partition(',')
+        try:
+            packets.append((float(pts), 'K' in flags))
+        except ValueError:
+            continue  # Packet without a timestamp
+    packets.sort()  # Decode order -> display order
+    return [frame for frame, (_, key) in enumerate(packets) if key]
+
+
+class FrameReader:
+    """Keyframe-indexed frame access with open-capture reuse and an LRU frame cache"""
+
+    def __init__(self, index_dir: str, max_cache_bytes: int = 256 * 1024 * 1024, max_captures: int = 4):
+        self.index_dir = index_dir
+        self.max_cache_bytes = max_cache_bytes
+        self.max_captures = max_captures
+        self._lock = threading.Lock()
+        self._frames = OrderedDict()    # (content hash, frame number) -> BGR frame
+        self._cache_bytes = 0
+        self._captures = OrderedDict()  # video path -> {'cap', 'next', 'lock', 'closed'}
+        self._indexes = {}
+        self.hits = 0
+        self.misses = 0
+        self.frames_decoded = 0
+        os.makedirs(index_dir, exist_ok=True)
+
+    def index(self, video_path: str) -> Dict:
+        """Keyframe index for this video's content: fps, frame_count and keyframes (or None)"""
+        digest = file_sha256(video_path)
+        with self._lock:
+            index = self._indexes.get(digest)
+        if index is not None:
+            return index
+
+        path = os.path.join(self.index_dir, f'{digest}.json')
+        try:
+            with open(path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = self._build(video_path)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._indexes[digest] = index
+        return index
+
+    def _build(self, video_path: str) -> Dict:
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        keyframes = probe_keyframes(video_path)
+        if keyframes:
+            frame_count = max(frame_count, keyframes[-1] + 1)
+        print(f"🗂️ Indexed {os.path.basename(video_path)}: {frame_count} frames, "
+              f"{len(keyframes) if keyframes is not None else 'unknown'} keyframes")
+        return {'fps': fps, 'frame_count': frame_count, 'keyframes': keyframes}
+
+    def frame_number(self, video_path: str, n: Optional[int] = None, t: Optional[float] = None) -> int:
+        """Resolve a frame number or a timestamp in seconds to a valid 0-based frame number"""
+        index = self.index(video_path)
+        if n is None:
+            n = int(round((t or 0.0) * index['fps'])) if index['fps'] else 0
+        last = max(0, index['frame_count'] - 1)
+        return min(max(0, n), last)
+
+    def read(self, video_path: str, n: int):
+        """Decoded BGR frame ``n`` (0-based), or None if it cannot be decoded; shared, treat as read-only"""
+        key = (file_sha256(video_path), n)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            self.misses += 1
+
+        keyframes = self.index(video_path)['keyframes']
+        keyframe = None
+        if keyframes:
+            keyframe = keyframes[max(0, bisect.bisect_right(keyframes, n) - 1)]
+
+        while True:
+            entry = self._capture(video_path)
+            with entry['lock']:
+                if entry['closed']:
+                    continue  # Evicted between lookup and use; open a fresh capture
+                frame = self._decode(entry, n, keyframe)
+                break
+
+        if frame is not None:
+            self._remember(key, frame)
+        return frame
+
+    def _decode(self, entry: Dict, n: int, keyframe: Optional[int]):
+        """Decode frame ``n`` with ``entry``'s capture, continuing forward when that beats seeking"""
+        cap, start = entry['cap'], entry['next']
+        if keyframe is not None:
+            seek = start is None or start > n or start < keyframe
+        else:
+            seek = start is None or start > n or n - start > MAX_FORWARD_DECODE
+        if seek:
+            start = keyframe if keyframe is not None else n
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+        frame = None
+        for _ in range(start, n + 1):
+            ret, frame = cap.read()
+            if not ret:
+                frame = None
+                break
+            self.frames_decoded += 1
+        entry['next'] = n + 1 if frame is not None else None
+        return frame
+
+    def _capture(self, video_path: str) -> Dict:
+        with self._lock:
+            entry = self._captures.get(video_path)
+            if entry is not None:
+                self._captures.move_to_end(video_path)
+                return entry
+            entry = {'cap': cv2.VideoCapture(video_path), 'next': 0, 'lock': threading.Lock(), 'closed': False}
+            self._captures[video_path] = entry
+            evicted = []
+            while len(self._captures) > self.max_captures:
+                evicted.append(self._captures.popitem(last=False)[1])
+
+        # Released outside the reader lock: an evicted capture may still be mid-decode
+        for old in evicted:
+            with old['lock']:
+                old['cap'].release()
+                old['closed'] = True
+        return entry
+
+    def _remember(self, key, frame):
+        with self._lock:
+            if key in self._frames:
+                return
+            self._frames[key] = frame
+            self._cache_bytes += frame.nbytes
+            while self._cache_bytes > self.max_cache_bytes and len(self._frames) > 1:
+                _, old = self._frames.popitem(last=False)
+                self._cache_bytes -= old.nbytes
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cached_frames': len(self._frames),
+                'cache_mb': round(self._cache_bytes / 1024 / 1024, 1),
+                'open_captures': len(self._captures),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'frames_decoded': self.frames_decoded,
+            }
@@ -0,0 +1,196 @@
+"""
+Pipelined frame processing: decode, tracking, inference, rendering and encoding as concurrent stages.
+
+Each stage runs in its own thread and hands items to the next stage through a
+bounded queue, so a slow stage applies backpressure instead of letting frames
+pile up in memory. With one thread per stage and FIFO queues, frame order is
+preserved end to end. OpenCV and MediaPipe release the GIL in their native
+code, so decode/encode overlap with pose inference.
+
+Most stages map one item to one item. A stage that needs to see several items
+at once (e.g. a tracker detecting in mini-batches) is wrapped in
+``StreamStage``: it takes an iterator of items and yields its results.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_END = object()  # Sentinel marking the end of the stream
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline stage fails; wraps the original exception"""
+
+
+def iter_video_frames(cap) -> Iterable[Tuple[int, object]]:
+    """Decode stage source: yield (1-based frame number, BGR frame) from a cv2.VideoCapture"""
+    frame_number = 0
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_number += 1
+        yield frame_number, frame
+
+
+class StreamStage:
+    """
+    Stage function that consumes an iterator of items and yields results
+
+    Its busy time excludes time spent waiting on the previous stage for items.
+    """
+
+    def __init__(self, fn: Callable[[Iterator], Iterable]):
+        self.fn = fn
+
+
+class FramePipeline:
+    """
+    Run ``source`` through a chain of stage functions on separate threads
+
+    Args:
+        source: Iterable producing items (typically ``iter_video_frames(cap)``)
+        stages: List of (name, fn) pairs. Each fn takes the previous stage's item and
+            returns the next one, or is a ``StreamStage``; the last stage is the sink and
+            its return value is ignored
+        queue_size: Capacity of each inter-stage queue
+        on_item: Optional callback ``on_item(items_processed, stage_seconds)`` run by the
+            sink after each item; ``stage_seconds`` is the live timing dict, not a copy
+    """
+
+    def __init__(self, source: Iterable, stages: List[Tuple[str, Callable]], queue_size: int = 8,
+                 on_item: Optional[Callable] = None):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_item = on_item
+        self.stage_seconds = {'decode': 0.0}
+        self.stage_seconds.update({name: 0.0 for name, _ in stages})
+        self.items_processed = 0
+        self._stop = threading.Event()
+        self._error = None
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Blocking put that gives up when the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, name: str, error: Exception):
+        if self._error is None:
+            self._error = (name, error)
+        self._stop.set()
+
+    def _run_source(self, out_q: queue.Queue):
+        try:
+            iterator = iter(self.source)
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                self.stage_seconds['decode'] += time.perf_counter() - started
+                if not self._put(out_q, item):
+                    return
+        except Exception as e:
+            self._fail('decode', e)
+        self._put(out_q, _END)
+
+    def _emit(self, out_q: Optional[queue.Queue], result) -> bool:
+        """Hand a stage's result on, or count it when the stage is the sink; False when stopping"""
+        if out_q is None:
+            self.items_processed += 1
+            if self.on_item is not None:
+                self.on_item(self.items_processed, self.stage_seconds)
+            return True
+        return self._put(out_q, result)
+
+    def _run_stage(self, name: str, fn: Callable, in_q: queue.Queue, out_q: Optional[queue.Queue]):
+        try:
+            if isinstance(fn, StreamStage):
+                self._run_stream(name, fn.fn, in_q, out_q)
+            else:
+                while True:
+                    item = self._get(in_q)
+                    if item is _END:
+                        break
+                    started = time.perf_counter()
+                    result = fn(item)
+                    self.stage_seconds[name] += time.perf_counter() - started
+                    if not self._emit(out_q, result):
+                        return
+        except Exception as e:
+            self._fail(name, e)
+        if out_q is not None:
+            self._put(out_q, _END)
+
+    def _run_stream(self, name: str, fn: Callable, in_q: queue.Queue, out_q: Optional[queue.Queue]):
+        waited = 0.0
+
+        def items():
+            nonlocal waited
+            while True:
+                started = time.perf_counter()
+                item = self._get(in_q)
+                waited += time.perf_counter() - started
+                if item is _END:
+                    return
+                yield item
+
+        results = iter(fn(items()))
+        while True:
+            waited = 0.0
+            started = time.perf_counter()
+            try:
+                result = next(results)
+            except StopIteration:
+                break
+            finally:
+                self.stage_seconds[name] += time.perf_counter() - started - waited
+            if not self._emit(out_q, result):
+                return
+
+    def run(self) -> Dict[str, float]:
+        """
+        Run the pipeline to completion
+
+        Returns:
+            Busy seconds spent in each stage
+
+        Raises:
+            PipelineError: if any stage raised; remaining stages are stopped
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = [threading.Thread(target=self._run_source, args=(queues[0],),
+                                    name='pipeline-decode', daemon=True)]
+        for i, (name, fn) in enumerate(self.stages):
+            out_q = queues[i + 1] if i + 1 < len(self.stages) else None
+            threads.append(threading.Thread(target=self._run_stage, args=(name, fn, queues[i], out_q),
+                                            name=f'pipeline-{name}', daemon=True))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            name, error = self._error
+            raise PipelineError(f"Pipeline stage '{name}' failed: {error}") from error
+
+        return dict(self.stage_seconds)
+
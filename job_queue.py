@@ -0,0 +1,191 @@
+"""
+Background job queue for long-running video analyses.
+
+Analyses are submitted as jobs and executed by a bounded pool of worker
+threads, so an HTTP request only has to enqueue the work and hand back a
+job ID. Progress (frames processed, throughput, ETA) is reported through a
+callback the analysis calls from inside its frame loop. The callback only
+stores numbers; readers (status polls, event streams) snapshot them at their
+own pace, so reporting costs the analysis no I/O.
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds the maximum number of pending jobs"""
+
+
+class Job:
+    """State and progress of one submitted analysis"""
+
+    def __init__(self, kind: str, params: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.state = JOB_QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.frames_processed = 0
+        self.total_frames = None
+        self.stage_seconds = None
+        self.metrics = None
+        self.result = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def update_progress(self, frames_processed: int, total_frames: Optional[int] = None,
+                        stage_seconds: Optional[Dict[str, float]] = None,
+                        metrics: Optional[Dict[str, float]] = None):
+        """Progress callback handed to the analysis; cheap enough to call every frame"""
+        self.frames_processed = frames_processed
+        if total_frames:
+            self.total_frames = total_frames
+        if stage_seconds is not None:
+            self.stage_seconds = stage_seconds
+        if metrics is not None:
+            self.metrics = metrics
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes or ``timeout`` elapses; returns whether it finished"""
+        return self._done.wait(timeout)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JOB_COMPLETED, JOB_FAILED)
+
+    def to_dict(self) -> Dict:
+        """Snapshot of the job for the status endpoint"""
+        with self._lock:
+            now = self.finished_at or time.time()
+            elapsed = (now - self.started_at) if self.started_at else 0.0
+            frames = self.frames_processed
+            fps = frames / elapsed if elapsed > 0 else 0.0
+            eta = None
+            if self.state == JOB_RUNNING and self.total_frames and fps > 0:
+                eta = max(0.0, (self.total_frames - frames) / fps)
+            progress = None
+            if self.total_frames:
+                progress = min(1.0, frames / self.total_frames)
+            if self.state == JOB_COMPLETED:
+                progress = 1.0
+            stage_seconds = None
+            if self.stage_seconds:
+                stage_seconds = {name: round(seconds, 3) for name, seconds in list(self.stage_seconds.items())}
+            metrics = None
+            if self.metrics:
+                # NaN (e.g. an undefined angle) is not valid JSON
+                metrics = {name: round(value, 4) if value == value else None
+                           for name, value in list(self.metrics.items())}
+
+            return {
+                'job_id': self.id,
+                'kind': self.kind,
+                'state': self.state,
+                'frames_processed': frames,
+                'total_frames': self.total_frames,
+                'progress': progress,
+                'fps': round(fps, 2),
+                'elapsed_seconds': round(elapsed, 2),
+                'eta_seconds': round(eta, 1) if eta is not None else None,
+                'stage_seconds': stage_seconds,
+                'metrics': metrics,
+                'result': self.result if self.state == JOB_COMPLETED else None,
+                'error': self.error,
+            }
+
+
+class JobQueue:
+    """Bounded worker pool that runs analysis jobs in the background"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, retention_seconds: int = 3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable, *args, params: Optional[Dict] = None, **kwargs) -> Job:
+        """
+        Queue ``fn(*args, progress=job.update_progress, **kwargs)`` for execution
+
+        Raises:
+            QueueFullError: if too many jobs are already waiting or running
+        """
+        with self._lock:
+            self._prune_locked()
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise QueueFullError(f'Too many pending jobs ({pending}), try again later')
+
+            job = Job(kind, params)
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        print(f"📥 Queued {kind} job {job.id} ({pending + 1} pending)")
+        return job
+
+    def add_completed(self, kind: str, result, params: Optional[Dict] = None) -> Job:
+        """Record a job whose result is already known (e.g. reused), so clients poll it as usual"""
+        job = Job(kind, params)
+        job.started_at = job.finished_at = time.time()
+        job.result = result
+        job.state = JOB_COMPLETED
+        job._done.set()
+        with self._lock:
+            self._prune_locked()
+            self._jobs[job.id] = job
+        print(f"♻️ Reused {kind} result as job {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        with job._lock:
+            job.state = JOB_RUNNING
+            job.started_at = time.time()
+        try:
+            result = fn(*args, progress=job.update_progress, **kwargs)
+            with job._lock:
+                job.result = result
+                job.state = JOB_COMPLETED
+        except Exception as e:
+            print(f"❌ Job {job.id} ({job.kind}) failed: {e}")
+            traceback.print_exc()
+            with job._lock:
+                job.error = str(e)
+                job.state = JOB_FAILED
+        finally:
+            with job._lock:
+                job.finished_at = time.time()
+            job._done.set()
+            elapsed = job.finished_at - job.started_at
+            print(f"🏁 Job {job.id} ({job.kind}) {job.state} in {elapsed:.1f}s")
+
+    def _prune_locked(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
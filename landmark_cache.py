@@ -0,0 +1,133 @@
+"""
+On-disk cache of pose landmarks keyed by video content and pose settings.
+
+Landmarks for a given video and Pose configuration never change, so they are
+stored once and reused by every later analysis of the same content. Each
+entry is a directory of plain ``.npy`` blocks (frame numbers, and a frames x
+33 x 4 float32 array of x, y, z, visibility) plus a small ``header.json``
+(fps, width, height, joint order). Blocks are opened memory-mapped, so
+reading a window of a long session only touches the pages it needs.
+Entries are evicted least-recently-used once the cache exceeds its size
+budget; a hit refreshes the entry's mtime.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from content_store import file_sha256
+from pose_helpers import JOINT_NAMES
+from landmark_store import COORDINATES
+
+
+class LandmarkCache:
+    """Size-bounded LRU cache of per-video landmark arrays"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, video_path: str, pose_options: Dict, stride: int = 1, **variant) -> str:
+        """Cache key for (video content, pose model settings, frame stride, any other settings that change landmarks)"""
+        settings = json.dumps({'pose': pose_options, 'stride': stride, **variant}, sort_keys=True)
+        return hashlib.sha256(f"{file_sha256(video_path)}:{settings}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return memory-mapped (frames, landmarks) for ``key`` or None on a miss"""
+        path = self._path(key)
+        try:
+            frames = np.load(os.path.join(path, 'frames.npy'), mmap_mode='r')
+            landmarks = np.load(os.path.join(path, 'landmarks.npy'), mmap_mode='r')
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return frames, landmarks
+
+    def header(self, key: str) -> Optional[Dict]:
+        """fps, width, height, joints, coordinates and frame count stored with ``key``, or None"""
+        try:
+            with open(os.path.join(self._path(key), 'header.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, frames: np.ndarray, landmarks: np.ndarray, **header):
+        """Store landmarks (and ``header`` fields such as fps, width, height) for ``key`` atomically"""
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        os.makedirs(tmp_path, exist_ok=True)
+        frames = np.asarray(frames, dtype=np.int32)
+        np.save(os.path.join(tmp_path, 'frames.npy'), frames)
+        np.save(os.path.join(tmp_path, 'landmarks.npy'), np.asarray(landmarks, dtype=np.float32))
+        with open(os.path.join(tmp_path, 'header.json'), 'w') as f:
+            json.dump({**header, 'joints': JOINT_NAMES, 'coordinates': list(COORDINATES),
+                       'frame_count': len(frames)}, f)
+
+        # A directory can only be renamed over an empty one
+        shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)  # Another writer stored the same landmarks first
+        self._evict()
+
+    def _entries(self):
+        """(mtime, size, path) of every entry"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.tmp') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((os.path.getmtime(path), size, path))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    shutil.rmtree(path)
+                except OSError:
+                    continue  # Still mapped by a reader on platforms that forbid that
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._entries()
+            size = sum(size for _, size, _ in entries)
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(entries),
+                'size_mb': round(size / 1024 / 1024, 1),
+                'max_mb': round(self.max_bytes / 1024 / 1024, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,142 @@
+"""
+Columnar storage for per-frame pose landmarks.
+
+Analyses used to collect one dict per frame with 66 string keys and turn the
+list into a DataFrame at the end. ``LandmarkStore`` instead keeps every pose
+in one preallocated frames x 33 x 4 float32 array of (x, y, z, visibility),
+grown in chunks, next to an int32 array of video frame numbers. Metrics read
+NumPy views of single joints or coordinates without copying; the DataFrame
+exporter builds its table from the same arrays in one pass.
+
+With a ``spill_dir`` only one chunk is held in memory: full chunks are
+appended to raw files there and read back memory-mapped, so a long session
+does not grow the process.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from pose_helpers import JOINT_NAMES
+
+NUM_LANDMARKS = 33
+COORDINATES = ('x', 'y', 'z', 'visibility')
+
+_JOINT_INDEX = {name: i for i, name in enumerate(JOINT_NAMES)}
+
+
+class LandmarkStore:
+    """Append-only frames x 33 x 4 landmark array with zero-copy views"""
+
+    def __init__(self, capacity: int = 1024, chunk: int = 1024, spill_dir: Optional[str] = None):
+        self.chunk = max(1, chunk)
+        self.spill_dir = spill_dir
+        if spill_dir is not None:
+            capacity = self.chunk
+        self._frames = np.empty(max(1, capacity), dtype=np.int32)
+        self._landmarks = np.empty((max(1, capacity), NUM_LANDMARKS, 4), dtype=np.float32)
+        self._size = 0     # Rows in memory
+        self._spilled = 0  # Rows already appended to the spill files
+
+    @classmethod
+    def from_arrays(cls, frames: np.ndarray, landmarks: np.ndarray) -> 'LandmarkStore':
+        """Wrap existing (frames, landmarks) arrays, e.g. from the landmark cache, without copying"""
+        store = cls.__new__(cls)
+        store.chunk = 1024
+        store.spill_dir = None
+        store._spilled = 0
+        store._frames = np.asarray(frames, dtype=np.int32)
+        store._landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 4)
+        store._size = len(store._frames)
+        return store
+
+    def __len__(self) -> int:
+        return self._spilled + self._size
+
+    def _reserve(self, size: int):
+        if size <= len(self._frames):
+            return
+        if self.spill_dir is not None:
+            self._spill()
+            return
+        capacity = len(self._frames) + max(self.chunk, size - len(self._frames))
+        frames = np.empty(capacity, dtype=np.int32)
+        landmarks = np.empty((capacity, NUM_LANDMARKS, 4), dtype=np.float32)
+        frames[:self._size] = self._frames[:self._size]
+        landmarks[:self._size] = self._landmarks[:self._size]
+        self._frames, self._landmarks = frames, landmarks
+
+    def append(self, frame_number: int, landmark_array: np.ndarray):
+        """Add one pose given as a 33 x 4 array"""
+        self._reserve(self._size + 1)
+        self._frames[self._size] = frame_number
+        self._landmarks[self._size] = landmark_array
+        self._size += 1
+
+    def append_landmarks(self, frame_number: int, pose_landmarks):
+        """Add one pose given as MediaPipe landmarks, written straight into the array"""
+        self._reserve(self._size + 1)
+        row = self._landmarks[self._size]
+        for i, lm in enumerate(pose_landmarks.landmark):
+            row[i] = (lm.x, lm.y, lm.z, lm.visibility)
+        self._frames[self._size] = frame_number
+        self._size += 1
+
+    def _spill(self):
+        """Append the rows held in memory to the spill files"""
+        with open(os.path.join(self.spill_dir, 'frames.bin'), 'ab') as f:
+            self._frames[:self._size].tofile(f)
+        with open(os.path.join(self.spill_dir, 'landmarks.bin'), 'ab') as f:
+            self._landmarks[:self._size].tofile(f)
+        self._spilled += self._size
+        self._size = 0
+
+    def _spilled_array(self, name: str, dtype, shape) -> np.ndarray:
+        return np.memmap(os.path.join(self.spill_dir, name), dtype=dtype, mode='r', shape=shape)
+
+    @property
+    def frames(self) -> np.ndarray:
+        """Video frame numbers, one per stored pose (view; memory-mapped once rows were spilled)"""
+        if self._spilled:
+            self._spill()
+            return self._spilled_array('frames.bin', np.int32, (self._spilled,))
+        return self._frames[:self._size]
+
+    @property
+    def landmarks(self) -> np.ndarray:
+        """frames x 33 x 4 float32 landmarks (view; memory-mapped once rows were spilled)"""
+        if self._spilled:
+            self._spill()
+            return self._spilled_array('landmarks.bin', np.float32, (self._spilled, NUM_LANDMARKS, 4))
+        return self._landmarks[:self._size]
+
+    def joint(self, name: str) -> np.ndarray:
+        """frames x 4 (x, y, z, visibility) of one joint, e.g. 'left_hip' (view)"""
+        return self.landmarks[:, _JOINT_INDEX[name]]
+
+    def coordinate(self, name: str, coordinate: str) -> np.ndarray:
+        """One coordinate of one joint over time, e.g. ('left_hip', 'x') (view)"""
+        return self.landmarks[:, _JOINT_INDEX[name], COORDINATES.index(coordinate)]
+
+    def window(self, first_frame: int, last_frame: int) -> 'LandmarkStore':
+        """Poses with ``first_frame`` <= frame number <= ``last_frame``, as views (frame numbers are ascending)"""
+        lo = int(np.searchsorted(self.frames, first_frame, side='left'))
+        hi = int(np.searchsorted(self.frames, last_frame, side='right'))
+        return LandmarkStore.from_arrays(self.frames[lo:hi], self.landmarks[lo:hi])
+
+    def to_dataframe(self, coordinates=('x', 'y'), frame_numbers: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Table with a 'frame' column and '<joint>_<coordinate>' columns, in joint order
+
+        The default x/y columns match the rows the analyses have always written
+        (float64, as MediaPipe's Python floats were). ``frame_numbers`` replaces the
+        stored video frame numbers in the 'frame' column.
+        """
+        indexes = [COORDINATES.index(c) for c in coordinates]
+        values = self.landmarks[:, :, indexes].reshape(len(self), -1).astype(np.float64)
+        columns = [f'{joint}_{c}' for joint in JOINT_NAMES for c in coordinates]
+        df = pd.DataFrame(values, columns=columns)
+        df.insert(0, 'frame', self.frames if frame_numbers is None else frame_numbers)
+        return df
@@ -0,0 +1,139 @@
+"""
+Live MJPEG preview of annotated frames while an analysis is running.
+
+The analysis offers each annotated frame to a ``PreviewChannel`` after it has
+been drawn. Offering never blocks and never encodes on the pipeline thread:
+a frame is only taken when someone is watching, the preview's own encoder
+thread is idle and the preview rate allows it; otherwise it is dropped. The
+effective "every Nth frame" therefore adapts to how fast the pipeline runs
+and how long JPEG encoding takes, and the main pipeline never waits on it.
+"""
+
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+import cv2
+
+
+class PreviewChannel:
+    """Latest-frame preview for one job, JPEG-encoded on a background thread"""
+
+    def __init__(self, max_fps: float = 5.0, max_width: int = 640, quality: int = 70):
+        self.min_interval = 1.0 / max_fps
+        self.max_width = max_width
+        self.quality = quality
+        self.viewers = 0
+        self.closed = False
+        self.frames_offered = 0
+        self.frames_encoded = 0
+        self._cond = threading.Condition()
+        self._pending = None
+        self._jpeg = None
+        self._seq = 0
+        self._last_taken = 0.0
+        self._thread = None
+
+    def offer(self, frame):
+        """Called by the analysis for each annotated frame; returns immediately"""
+        self.frames_offered += 1
+        if not self.viewers or self._pending is not None:
+            return
+        now = time.monotonic()
+        if now - self._last_taken < self.min_interval:
+            return
+
+        with self._cond:
+            if self._pending is not None or self.closed:
+                return
+            self._pending = frame  # Frames are not reused after encoding, so no copy is needed
+            self._last_taken = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._encode_loop, name='preview-encode', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _encode_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self.closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                frame = self._pending
+
+            height, width = frame.shape[:2]
+            if width > self.max_width:
+                frame = cv2.resize(frame, (self.max_width, int(height * self.max_width / width)),
+                                   interpolation=cv2.INTER_AREA)
+            ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+
+            with self._cond:
+                self._pending = None
+                if ok:
+                    self._jpeg = buffer.tobytes()
+                    self._seq += 1
+                    self.frames_encoded += 1
+                self._cond.notify_all()
+
+    def close(self):
+        """Mark the analysis finished; viewers receive what is left and their streams end"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def frames(self, timeout: float = 1.0, is_done=None) -> Iterator[bytes]:
+        """
+        Yield each newly encoded JPEG as it becomes available
+
+        Ends when the channel is closed, or when ``is_done()`` returns True (checked
+        every ``timeout`` seconds) in case the analysis never offered any frames.
+        """
+        last_seq = 0
+        with self._cond:
+            self.viewers += 1
+        try:
+            while True:
+                with self._cond:
+                    while self._seq == last_seq and not self.closed:
+                        if not self._cond.wait(timeout) and is_done is not None and is_done():
+                            return
+                    if self._seq == last_seq:
+                        return
+                    last_seq, jpeg = self._seq, self._jpeg
+                yield jpeg
+        finally:
+            with self._cond:
+                self.viewers -= 1
+
+    def stats(self) -> Dict:
+        offered, encoded = self.frames_offered, self.frames_encoded
+        return {
+            'viewers': self.viewers,
+            'frames_offered': offered,
+            'frames_encoded': encoded,
+            'every_nth_frame': round(offered / encoded, 1) if encoded else None,
+        }
+
+
+class PreviewHub:
+    """Preview channels by job ID"""
+
+    def __init__(self, max_fps: float = 5.0):
+        self.max_fps = max_fps
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> PreviewChannel:
+        """New channel, handed to the analysis before its job ID is known"""
+        return PreviewChannel(max_fps=self.max_fps)
+
+    def attach(self, job_id: str, channel: PreviewChannel):
+        with self._lock:
+            for key in [key for key, old in self._channels.items() if old.closed and not old.viewers]:
+                del self._channels[key]
+            self._channels[job_id] = channel
+
+    def get(self, job_id: str) -> Optional[PreviewChannel]:
+        with self._lock:
+            return self._channels.get(job_id)
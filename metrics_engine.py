@@ -0,0 +1,276 @@
+"""
+Declarative biomechanics metrics evaluated in one vectorized pass.
+
+A metric spec is a list of dicts, evaluated in order. Each has a ``name``,
+a ``kind`` and the points it is computed from. A point is a joint name
+('left_knee') or the name of an earlier ``com`` metric. Supported kinds:
+
+    com           mean position of ``joints`` (optionally ``weights``); adds <name>_x, <name>_y
+    velocity      speed of ``point`` per second; 0 on the first row
+    acceleration  change of that speed per second; 0 on the first row
+    angle         angle in degrees at the middle of three ``joints``
+    distance      distance between the two ``points``
+    smooth        rolling mean of an earlier metric column ``of`` over ``window`` rows (NaNs skipped)
+
+Coordinates are MediaPipe's normalized x/y unless a metric sets
+``'units': 'pixels'``, which scales x by the frame width and y by its height.
+Rows are consecutive detected poses, as in the metrics CSVs.
+
+Every joint a spec needs is gathered from the frames x 33 x 4 landmark array
+in one indexing operation, and each metric is then a handful of array
+operations over all frames. Adding a metric is a new entry in a spec such as
+``GOALIE_METRICS``.
+
+``MetricsEngine.stream`` evaluates the same spec one pose at a time, as frames
+arrive, keeping only constant state per metric (the previous point or speed,
+and the rolling window of a smoothed column). It produces the same values as
+``evaluate`` on the whole table.
+"""
+
+import math
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from pose_helpers import JOINT_NAMES
+
+GOALIE_METRICS = [
+    {'name': 'com', 'kind': 'com', 'joints': ['left_hip', 'right_hip', 'left_shoulder', 'right_shoulder']},
+    {'name': 'glove_hand_velocity', 'kind': 'velocity', 'point': 'right_wrist'},
+    {'name': 'stick_hand_velocity', 'kind': 'velocity', 'point': 'left_wrist'},
+    {'name': 'center_of_mass_velocity', 'kind': 'velocity', 'point': 'com'},
+    {'name': 'leg_extension_angle', 'kind': 'angle', 'joints': ['left_hip', 'left_knee', 'left_ankle']},
+    {'name': 'glove_hand_angle', 'kind': 'angle', 'joints': ['right_shoulder', 'right_elbow', 'right_wrist']},
+    {'name': 'posture_angle', 'kind': 'angle', 'joints': ['left_shoulder', 'left_hip', 'left_knee']},
+]
+
+# Live progress only (appended to GOALIE_METRICS); the goalie metrics table keeps its columns
+GOALIE_LIVE_METRICS = [
+    {'name': 'center_of_mass_velocity_smoothed', 'kind': 'smooth', 'of': 'center_of_mass_velocity', 'window': 5},
+]
+
+# Hip-centre speed in pixels per second, as the speed analysis reports it (live progress only)
+SPEED_METRICS = [
+    {'name': 'hip_center', 'kind': 'com', 'joints': ['left_hip', 'right_hip']},
+    {'name': 'speed_px_s', 'kind': 'velocity', 'point': 'hip_center', 'units': 'pixels'},
+    {'name': 'speed_px_s_smoothed', 'kind': 'smooth', 'of': 'speed_px_s', 'window': 15},
+]
+
+KINDS = ('com', 'velocity', 'acceleration', 'angle', 'distance', 'smooth')
+
+
+class MetricsEngine:
+    """
+    Compiled metric spec; ``evaluate`` computes every metric for a landmark array
+
+    ``context_rows`` is how many preceding rows a row's values depend on, so a
+    table can be evaluated in chunks by prepending that many earlier rows.
+    """
+
+    def __init__(self, spec: List[Dict]):
+        self.spec = spec
+        derived = set()
+        columns = set()
+        context = {}
+        joints = []
+        for metric in spec:
+            kind = metric.get('kind')
+            if kind not in KINDS:
+                raise ValueError(f"Metric {metric.get('name')!r}: unknown kind {kind!r}, expected one of {KINDS}")
+            if kind == 'smooth' and metric.get('of') not in columns:
+                raise ValueError(f"Metric {metric['name']!r}: smooths {metric.get('of')!r}, which is not an earlier column")
+            for point in _points(metric):
+                if point in derived:
+                    continue
+                if point not in JOINT_NAMES:
+                    raise ValueError(f"Metric {metric['name']!r}: unknown joint or point {point!r}")
+                if point not in joints:
+                    joints.append(point)
+            if kind == 'com':
+                derived.add(metric['name'])
+                columns.update((f"{metric['name']}_x", f"{metric['name']}_y"))
+            else:
+                columns.add(metric['name'])
+            context[metric['name']] = {
+                'velocity': 1,
+                'acceleration': 2,
+                'smooth': metric.get('window', 1) - 1 + context.get(metric.get('of'), 0),
+            }.get(kind, 0)
+        self.context_rows = max(context.values(), default=0)
+        self._joints = joints
+        self._joint_indexes = [JOINT_NAMES.index(joint) for joint in joints]
+
+    def evaluate(self, landmarks: np.ndarray, fps: float, width: int = 1, height: int = 1) -> Dict[str, np.ndarray]:
+        """
+        Metric columns for a frames x 33 x 4 landmark array, in spec order
+
+        Returns an ordered dict of column name to float64 array, one value per row.
+        """
+        positions = np.asarray(landmarks)[:, self._joint_indexes, :2].astype(np.float64)
+        points = {joint: positions[:, i] for i, joint in enumerate(self._joints)}
+        scale = np.array([width, height], dtype=np.float64)
+        columns = OrderedDict()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for metric in self.spec:
+                name, kind = metric['name'], metric['kind']
+                pixels = metric.get('units') == 'pixels'
+                point = lambda key: points[key] * scale if pixels else points[key]
+
+                if kind == 'com':
+                    stacked = np.stack([points[j] for j in metric['joints']])
+                    points[name] = np.average(stacked, axis=0, weights=metric.get('weights'))
+                    columns[f'{name}_x'], columns[f'{name}_y'] = points[name][:, 0], points[name][:, 1]
+                elif kind in ('velocity', 'acceleration'):
+                    speed = _speed(point(metric['point']), fps)
+                    columns[name] = _speed_change(speed, fps) if kind == 'acceleration' else speed
+                elif kind == 'angle':
+                    a, b, c = (point(j) for j in metric['joints'])
+                    columns[name] = _angle(a, b, c)
+                elif kind == 'distance':
+                    a, b = (point(p) for p in metric['points'])
+                    columns[name] = np.hypot(*(a - b).T)
+                else:
+                    columns[name] = _rolling_mean(columns[metric['of']], metric['window'])
+        return columns
+
+    def stream(self, fps: float, width: int = 1, height: int = 1) -> 'MetricsStream':
+        """Incremental evaluator of this spec for one video"""
+        return MetricsStream(self, fps, width, height)
+
+
+class MetricsStream:
+    """
+    Evaluates a spec one pose at a time with constant state per metric
+
+    ``update`` takes the next detected pose (33 x 4 array; ``update_landmarks``
+    takes MediaPipe landmarks) and returns that row's metrics. ``latest`` is
+    the most recent row, for progress reports.
+    """
+
+    def __init__(self, engine: MetricsEngine, fps: float, width: int = 1, height: int = 1):
+        self.spec = engine.spec
+        self.fps = fps
+        self.width, self.height = width, height
+        self._joint_indexes = dict(zip(engine._joints, engine._joint_indexes))
+        self._previous = {}  # metric name -> previous point (velocity) or speed (acceleration)
+        self._windows = {m['name']: _RollingMean(m['window']) for m in self.spec if m['kind'] == 'smooth'}
+        self.rows = 0
+        self.latest: Optional[Dict[str, float]] = None
+
+    def update(self, landmark_array) -> Dict[str, float]:
+        return self._update({joint: (float(landmark_array[i][0]), float(landmark_array[i][1]))
+                             for joint, i in self._joint_indexes.items()})
+
+    def update_landmarks(self, pose_landmarks) -> Dict[str, float]:
+        landmarks = pose_landmarks.landmark
+        return self._update({joint: (landmarks[i].x, landmarks[i].y) for joint, i in self._joint_indexes.items()})
+
+    def _update(self, points) -> Dict[str, float]:
+        row = OrderedDict()
+        for metric in self.spec:
+            name, kind = metric['name'], metric['kind']
+            sx, sy = (self.width, self.height) if metric.get('units') == 'pixels' else (1, 1)
+            point = lambda key: (points[key][0] * sx, points[key][1] * sy)
+
+            if kind == 'com':
+                weights = metric.get('weights') or [1] * len(metric['joints'])
+                total = sum(weights)
+                x = sum(points[j][0] * w for j, w in zip(metric['joints'], weights)) / total
+                y = sum(points[j][1] * w for j, w in zip(metric['joints'], weights)) / total
+                points[name] = (x, y)
+                row[f'{name}_x'], row[f'{name}_y'] = x, y
+            elif kind in ('velocity', 'acceleration'):
+                p = point(metric['point'])
+                previous = self._previous.get(name)
+                speed = 0.0 if previous is None else math.hypot(p[0] - previous[0], p[1] - previous[1]) * self.fps
+                speed = 0.0 if math.isnan(speed) else speed
+                self._previous[name] = p
+                if kind == 'acceleration':
+                    previous_speed = self._previous.get((name, 'speed'))
+                    self._previous[(name, 'speed')] = speed
+                    speed = 0.0 if previous_speed is None else (speed - previous_speed) * self.fps
+                row[name] = speed
+            elif kind == 'angle':
+                row[name] = _angle_at(*(point(j) for j in metric['joints']))
+            elif kind == 'distance':
+                a, b = (point(p) for p in metric['points'])
+                row[name] = math.hypot(a[0] - b[0], a[1] - b[1])
+            else:
+                row[name] = self._windows[name].push(row[metric['of']])
+        self.rows += 1
+        self.latest = row
+        return row
+
+
+class _RollingMean:
+    """Mean of the last ``window`` non-NaN values, updated in O(1)"""
+
+    def __init__(self, window: int):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+    def push(self, value: float) -> float:
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            if not math.isnan(old):
+                self.total -= old
+                self.count -= 1
+        self.values.append(value)
+        if not math.isnan(value):
+            self.total += value
+            self.count += 1
+        return self.total / self.count if self.count else float('nan')
+
+
+def _points(metric):
+    if 'point' in metric:
+        return [metric['point']]
+    return metric.get('joints') or metric.get('points') or []
+
+
+def _speed(p, fps):
+    """Distance moved since the previous row, per second; 0 on the first row"""
+    speed = np.zeros(len(p))
+    if len(p) > 1:
+        speed[1:] = np.hypot(*np.diff(p, axis=0).T) * fps
+    return np.nan_to_num(speed, nan=0.0)
+
+
+def _speed_change(speed, fps):
+    change = np.zeros(len(speed))
+    if len(speed) > 1:
+        change[1:] = np.diff(speed) * fps
+    return change
+
+
+def _rolling_mean(values, window):
+    """Mean over the last ``window`` rows (fewer at the start), ignoring NaNs"""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0))
+    counts = np.cumsum(valid)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    return sums / counts
+
+
+def _angle_at(a, b, c):
+    """Scalar ``_angle`` for one row"""
+    ab = math.hypot(a[0] - b[0], a[1] - b[1])
+    bc = math.hypot(b[0] - c[0], b[1] - c[1])
+    ac = math.hypot(a[0] - c[0], a[1] - c[1])
+    denominator = 2 * ab * bc
+    if denominator == 0:
+        return float('nan')
+    return math.degrees(math.acos(min(1.0, max(-1.0, (ab ** 2 + bc ** 2 - ac ** 2) / denominator))))
+
+
+def _angle(a, b, c):
+    """Angle at ``b`` in degrees, by the cosine rule over the three side lengths"""
+    ab = np.hypot(*(a - b).T)
+    bc = np.hypot(*(b - c).T)
+    ac = np.hypot(*(a - c).T)
+    cosine = np.clip((ab ** 2 + bc ** 2 - ac ** 2) / (2 * ab * bc), -1, 1)
+    return np.degrees(np.arccos(cosine))
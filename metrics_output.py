@@ -0,0 +1,191 @@
+"""
+Writing metrics tables as CSV or as compressed columnar files.
+
+The metrics CSVs are wide float tables (frame plus 66+ joint columns) that are
+slow to write, large on disk and slow to reload. With the ``parquet`` or
+``arrow`` format (and pyarrow installed) an analysis writes its table as
+float32, compressed Parquet or Arrow IPC next to where the CSV would go. The
+CSV is only rendered from that file the first time someone asks for it, so
+the download links keep working. Without pyarrow, or with the ``csv`` format,
+tables are written as CSV directly, exactly as before.
+
+Long sessions write their tables in chunks as poses arrive (``open``). Each
+chunk is appended as whole CSV lines or one Arrow record batch, so the file
+on disk is a valid table of every row so far even if the process dies. Arrow
+output uses the IPC stream format, which is readable without a footer;
+Parquet needs its footer, so it is streamed as Arrow and converted batch by
+batch when the table is closed.
+"""
+
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+COLUMNAR_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+class MetricsWriter:
+    """Writes metrics DataFrames in the configured format and renders CSVs from columnar files on demand"""
+
+    def __init__(self, fmt: str = 'csv', compression: str = 'zstd'):
+        if fmt != 'csv' and fmt not in COLUMNAR_EXTENSIONS:
+            raise ValueError(f"Unknown metrics format {fmt!r}; use 'csv', 'parquet' or 'arrow'")
+        if fmt != 'csv' and not PYARROW_AVAILABLE:
+            print(f"⚠️ Metrics format {fmt!r} needs pyarrow (pip install pyarrow), which is not installed - "
+                  f"writing metrics as CSV instead")
+            fmt = 'csv'
+        self.format = fmt
+        self.compression = compression
+        self._lock = threading.Lock()
+
+    @property
+    def columnar(self) -> bool:
+        return self.format != 'csv'
+
+    def columnar_path(self, csv_path: str, fmt: Optional[str] = None) -> str:
+        return os.path.splitext(csv_path)[0] + COLUMNAR_EXTENSIONS[fmt or self.format]
+
+    def _columnar_source(self, csv_path: str) -> Optional[str]:
+        """Existing columnar file a missing CSV can be rendered from"""
+        if not PYARROW_AVAILABLE or not csv_path.endswith('.csv'):
+            return None
+        for fmt in COLUMNAR_EXTENSIONS:
+            path = self.columnar_path(csv_path, fmt)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def open(self, csv_path: str) -> 'TableStream':
+        """Table for ``csv_path`` written chunk by chunk; close it when the analysis ends"""
+        return TableStream(self, csv_path)
+
+    def write(self, df: pd.DataFrame, csv_path: str) -> Optional[str]:
+        """Write all of ``df`` for ``csv_path``; returns the columnar file's path, or None when the CSV was written"""
+        table = self.open(csv_path)
+        try:
+            table.write(df)
+        finally:
+            table.close()
+        return table.path if self.columnar else None
+
+    def exists(self, path: str) -> bool:
+        """True if ``path`` exists or is a CSV that can be rendered from its columnar file"""
+        return os.path.exists(path) or self._columnar_source(path) is not None
+
+    def ensure_csv(self, csv_path: str) -> bool:
+        """Render ``csv_path`` from its columnar file if it does not exist yet; False if there is neither"""
+        if os.path.exists(csv_path):
+            return True
+        source = self._columnar_source(csv_path)
+        if source is None:
+            return False
+
+        with self._lock:
+            if os.path.exists(csv_path):
+                return True
+            tmp_path = f'{csv_path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', newline='') as f:
+                for i, batch in enumerate(_read_batches(source)):
+                    batch.to_pandas().to_csv(f, header=(i == 0), index=False)
+            os.replace(tmp_path, csv_path)
+        print(f"📄 Rendered {os.path.basename(csv_path)} from {os.path.basename(source)}")
+        return True
+
+
+class TableStream:
+    """
+    One metrics table written in chunks
+
+    ``write`` appends a DataFrame chunk and flushes it to disk. Nothing is
+    created until the first chunk, so an analysis that finds no poses leaves
+    no file, as before.
+    """
+
+    def __init__(self, writer: MetricsWriter, csv_path: str):
+        self.writer = writer
+        self.csv_path = csv_path
+        self.rows = 0
+        self._file = None
+        self._arrow = None
+        if writer.format == 'csv':
+            self.path = csv_path
+        else:
+            # Parquet is streamed as Arrow and converted on close
+            self.path = writer.columnar_path(csv_path, 'arrow')
+
+        # Whichever copies are not being written are removed, so a file left over
+        # from an earlier run is never served in place of the new table
+        stale = [csv_path] + [writer.columnar_path(csv_path, fmt) for fmt in COLUMNAR_EXTENSIONS]
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        if self.writer.format == 'csv':
+            if self._file is None:
+                self._file = open(self.csv_path, 'w', newline='')
+            self._file.write(df.to_csv(header=(self.rows == 0), index=False))
+            self._file.flush()
+        else:
+            table = pa.Table.from_pandas(_downcast(df), preserve_index=False)
+            if self._arrow is None:
+                self._file = pa.OSFile(self.path, 'wb')
+                options = pa.ipc.IpcWriteOptions(compression=self.writer.compression)
+                self._arrow = pa.ipc.new_stream(self._file, table.schema, options=options)
+            self._arrow.write_table(table)
+            self._file.flush()
+        self.rows += len(df)
+
+    def close(self):
+        if self._arrow is not None:
+            self._arrow.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = self._arrow = None
+
+        if self.writer.columnar:
+            # A CSV rendered from the partial table while it was being written
+            try:
+                os.remove(self.csv_path)
+            except FileNotFoundError:
+                pass
+        if self.writer.format == 'parquet' and self.rows:
+            parquet_path = self.writer.columnar_path(self.csv_path, 'parquet')
+            tmp_path = f'{parquet_path}.{threading.get_ident()}.tmp'
+            parquet = None
+            for batch in _read_batches(self.path):
+                if parquet is None:
+                    parquet = pq.ParquetWriter(tmp_path, batch.schema, compression=self.writer.compression)
+                parquet.write_table(pa.Table.from_batches([batch]))
+            parquet.close()
+            os.replace(tmp_path, parquet_path)
+            os.remove(self.path)
+            self.path = parquet_path
+
+
+def _read_batches(path: str):
+    """Record batches of a columnar metrics file, one at a time"""
+    if path.endswith('.parquet'):
+        yield from pq.ParquetFile(path).iter_batches()
+    else:
+        yield from pa.ipc.open_stream(pa.memory_map(path))
+
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """float64 columns as float32; landmark coordinates do not carry more precision than that"""
+    floats = df.select_dtypes(include=[np.float64]).columns
+    return df.astype({column: np.float32 for column in floats}) if len(floats) else df
@@ -0,0 +1,137 @@
+"""
+Process-wide registry of inference models.
+
+Models are loaded and warmed up once (at startup or lazily on first use) and
+then handed out as shared handles. A handle serializes calls into its model,
+since detector predictors keep per-call state and are not safe to drive from
+several request threads at once.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+
+class ModelHandle:
+    """Shared, thread-safe handle to one loaded model"""
+
+    def __init__(self, name: str, model, load_seconds: float, warmup_seconds: float,
+                 rss_delta_bytes: int, parameter_bytes: Optional[int]):
+        self.name = name
+        self.model = model
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.rss_delta_bytes = rss_delta_bytes
+        self.parameter_bytes = parameter_bytes
+        self.loaded_at = time.time()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        """Run inference with exclusive access to the model"""
+        with self.lock:
+            self.calls += 1
+            return self.model(*args, **kwargs)
+
+    def stats(self) -> Dict:
+        return {
+            'name': self.name,
+            'loaded': True,
+            'load_seconds': round(self.load_seconds, 3),
+            'warmup_seconds': round(self.warmup_seconds, 3),
+            'rss_delta_mb': round(self.rss_delta_bytes / 1024 / 1024, 1),
+            'parameter_mb': round(self.parameter_bytes / 1024 / 1024, 1) if self.parameter_bytes is not None else None,
+            'loaded_at': self.loaded_at,
+            'calls': self.calls,
+        }
+
+
+def _parameter_bytes(model) -> Optional[int]:
+    """Size of the model's weights if it exposes torch parameters (e.g. ultralytics YOLO)"""
+    module = getattr(model, 'model', model)
+    parameters = getattr(module, 'parameters', None)
+    if parameters is None:
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """Loads each registered model at most once per process"""
+
+    def __init__(self):
+        self._loaders = {}
+        self._handles = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable, warmup: Optional[Callable] = None):
+        """
+        Register a model without loading it
+
+        Args:
+            name: Registry key, e.g. 'yolov8n'
+            loader: Zero-argument callable returning the model
+            warmup: Optional callable run once on the loaded model (first inference)
+        """
+        with self._lock:
+            self._loaders[name] = (loader, warmup)
+            self._load_locks[name] = threading.Lock()
+
+    def is_registered(self, name: str) -> bool:
+        return name in self._loaders
+
+    def get(self, name: str) -> ModelHandle:
+        """Return the shared handle for ``name``, loading and warming it on first use"""
+        handle = self._handles.get(name)
+        if handle is not None:
+            return handle
+
+        if name not in self._loaders:
+            raise KeyError(f"Model '{name}' is not registered")
+
+        # Per-model lock: concurrent first requests wait for one load instead of each loading
+        with self._load_locks[name]:
+            handle = self._handles.get(name)
+            if handle is not None:
+                return handle
+
+            loader, warmup = self._loaders[name]
+            process = psutil.Process()
+            rss_before = process.memory_info().rss
+
+            print(f"📦 Loading model '{name}'...")
+            started = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - started
+
+            warmup_seconds = 0.0
+            if warmup is not None:
+                started = time.perf_counter()
+                warmup(model)
+                warmup_seconds = time.perf_counter() - started
+
+            rss_delta = max(0, process.memory_info().rss - rss_before)
+            handle = ModelHandle(name, model, load_seconds, warmup_seconds, rss_delta, _parameter_bytes(model))
+            self._handles[name] = handle
+            print(f"✅ Model '{name}' ready (load {load_seconds:.2f}s, warmup {warmup_seconds:.2f}s, "
+                  f"+{rss_delta / 1024 / 1024:.1f} MB)")
+            return handle
+
+    def preload(self, names: Optional[List[str]] = None):
+        """Load and warm the given (default: all registered) models"""
+        for name in names or list(self._loaders):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"❌ Failed to preload model '{name}': {e}")
+
+    def stats(self) -> Dict:
+        return {
+            name: (self._handles[name].stats() if name in self._handles else {'name': name, 'loaded': False})
+            for name in self._loaders
+        }
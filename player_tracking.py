@@ -0,0 +1,290 @@
+"""
+Following one selected player through a video.
+
+With ultralytics/supervision available, a YOLO detector finds people and
+ByteTrack assigns them persistent IDs. The first frame's detection nearest
+the user's box is locked on, and from then on only that ID is followed.
+Otherwise a classic OpenCV MIL tracker is used.
+
+Detection is the expensive part and has no state, so ``iter_tracked`` runs
+it on mini-batches of frames in one model call. ByteTrack association is
+stateful and order-dependent, so it then runs frame by frame over the
+batch results, exactly as it would have one frame at a time.
+
+With a detection stride of k, the detector only runs every k frames and a
+sparse optical-flow predictor moves the box in between. The detector runs
+early whenever the predictor loses confidence (points lost to occlusion, or
+disagreeing motion when players cross).
+"""
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import supervision as sv
+    BYTETRACK_AVAILABLE = True
+except ImportError:
+    BYTETRACK_AVAILABLE = False
+
+PERSON_CLASS = 0  # COCO
+
+# Detector settings model.track(persist=True) used before detection and association were split: ByteTrack's
+# second association pass matches low-score boxes (0.1 up to its activation threshold), so the detector must
+# not drop them at plain inference's default conf of 0.25. All classes are kept, as before; non-person boxes
+# are filtered after association.
+DETECTION_OPTIONS = {'conf': 0.1, 'iou': 0.7, 'classes': None, 'verbose': False}
+
+
+def init_tracking(frame, bbox, model=None, frame_rate: float = 30.0) -> dict:
+    """
+    Tracking context for the player inside ``bbox`` (x, y, w, h) on ``frame``
+
+    Uses YOLO + ByteTrack when ``model`` is given and supervision is installed,
+    the MIL tracker otherwise. ``frame_rate`` is how many frames a second the
+    detector sees (the video fps divided by the detection stride); ByteTrack
+    counts how long a lost track is kept in detector frames, so this keeps that
+    time the same whatever the stride.
+    """
+    if model is not None and BYTETRACK_AVAILABLE:
+        # The detector may be shared across requests; ByteTrack association state is per context
+        return {'use_yolo': True, 'model': model, 'byte_tracker': sv.ByteTrack(frame_rate=max(1, round(frame_rate))),
+                'selected_id': None, 'init_bbox': bbox, 'target_lost': False}
+    tracker = cv2.TrackerMIL_create()
+    x, y, w, h = bbox
+    tracker.init(frame, (int(x), int(y), int(w), int(h)))
+    return {'use_yolo': False, 'tracker': tracker}
+
+
+def update_tracking(frame, tracking_ctx: dict) -> Tuple[bool, Optional[tuple]]:
+    """Track one frame. Returns (ok, bbox)."""
+    if tracking_ctx.get('use_yolo'):
+        results = tracking_ctx['model'](frame, **DETECTION_OPTIONS)
+        return associate_detections(results[0] if results else None, tracking_ctx)
+
+    ok, bbox = tracking_ctx['tracker'].update(frame)
+    if ok:
+        bbox = (int(bbox[0]), int(bbox[1]), int(bbox[2]), int(bbox[3]))
+        tracking_ctx['last_bbox'] = bbox
+        return True, bbox
+    return False, None
+
+
+def track_batch(frames: List, tracking_ctx: dict) -> List[Tuple[bool, Optional[tuple]]]:
+    """Track consecutive frames: one batched detector call, then sequential association"""
+    if not tracking_ctx.get('use_yolo'):
+        return [update_tracking(frame, tracking_ctx) for frame in frames]
+
+    results = tracking_ctx['model'](frames, **DETECTION_OPTIONS)
+    return [associate_detections(result, tracking_ctx) for result in results]
+
+
+def iter_tracked(items: Iterable[Tuple[int, object]], tracking_ctx: dict, batch_size: int = 8,
+                 stride: int = 1, min_flow_confidence: float = 0.5) -> Iterator[Tuple[int, object, bool, Optional[tuple]]]:
+    """
+    Track a stream of (frame_number, frame) items
+
+    With ``stride`` 1 every frame is detected, in mini-batches of ``batch_size``.
+    With a larger stride the detector runs every ``stride`` frames (or sooner, when
+    the optical-flow confidence falls below ``min_flow_confidence``) and the
+    predictor fills the frames in between.
+
+    Yields (frame_number, frame, ok, bbox) in the original order.
+    """
+    if stride > 1:
+        yield from _iter_strided(items, tracking_ctx, stride, min_flow_confidence)
+        return
+
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield from _track_items(batch, tracking_ctx)
+            batch = []
+    if batch:
+        yield from _track_items(batch, tracking_ctx)
+
+
+def _track_items(batch, tracking_ctx):
+    outcomes = track_batch([frame for _, frame in batch], tracking_ctx)
+    for (frame_number, frame), (ok, bbox) in zip(batch, outcomes):
+        yield frame_number, frame, ok, bbox
+
+
+def _iter_strided(items, tracking_ctx, stride, min_flow_confidence):
+    """Detector every ``stride`` frames, optical flow in between, early detection on low confidence"""
+    stats = tracking_ctx.setdefault('stats', {'detected': 0, 'predicted': 0, 'early_detections': 0})
+    predictor = FlowPredictor()
+    since_detection = stride
+    for frame_number, frame in items:
+        if since_detection < stride and predictor.active:
+            bbox, confidence = predictor.predict(frame)
+            if confidence >= min_flow_confidence:
+                since_detection += 1
+                stats['predicted'] += 1
+                tracking_ctx['last_bbox'] = bbox
+                yield frame_number, frame, True, bbox
+                continue
+            stats['early_detections'] += 1
+
+        ok, bbox = update_tracking(frame, tracking_ctx)
+        stats['detected'] += 1
+        since_detection = 1
+        if ok and not tracking_ctx.get('target_lost'):
+            predictor.reset(frame, bbox)
+        else:
+            # A last-known box is stale: flow seeded from it would follow whoever stands there
+            # now, so detect again on the next frame instead
+            predictor.clear()
+        yield frame_number, frame, ok, bbox
+
+
+class FlowPredictor:
+    """
+    Moves a bounding box between detector frames with sparse Lucas-Kanade optical flow
+
+    Corner features inside the box are tracked forward and then backward; points
+    whose round trip does not return to where they started are discarded. The
+    box moves by the median displacement of the surviving points. Confidence is
+    the fraction of points that survived, reduced when their motions disagree
+    (another player crossing in front moves part of the box differently).
+    """
+
+    def __init__(self, max_points: int = 60, max_round_trip_error: float = 1.0):
+        self.max_points = max_points
+        self.max_round_trip_error = max_round_trip_error
+        self.clear()
+
+    @property
+    def active(self) -> bool:
+        return self._points is not None
+
+    def clear(self):
+        self._gray = None
+        self._points = None
+        self._bbox = None
+        self._initial_count = 0
+
+    def reset(self, frame, bbox):
+        """Restart from a detector box on ``frame``"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        x, y, w, h = [int(v) for v in bbox]
+        mask = np.zeros_like(gray)
+        mask[max(0, y):y + h, max(0, x):x + w] = 255
+        points = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 5, mask=mask)
+        if points is None or len(points) < 3:
+            self.clear()
+            return
+        self._gray, self._points, self._bbox = gray, points, (x, y, w, h)
+        self._initial_count = len(points)
+
+    def predict(self, frame) -> Tuple[Optional[tuple], float]:
+        """Box on ``frame`` and a confidence in [0, 1]"""
+        if not self.active:
+            return None, 0.0
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(self._gray, gray, self._points, None)
+        backward, status_back, _ = cv2.calcOpticalFlowPyrLK(gray, self._gray, forward, None)
+        round_trip = np.abs(self._points - backward).reshape(-1, 2).max(axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (round_trip < self.max_round_trip_error)
+        if good.sum() < 3:
+            self.clear()
+            return self._bbox, 0.0
+
+        motion = (forward - self._points).reshape(-1, 2)[good]
+        dx, dy = np.median(motion, axis=0)
+        spread = np.median(np.abs(motion - (dx, dy)))
+        x, y, w, h = self._bbox
+        bbox = (int(round(x + dx)), int(round(y + dy)), w, h)
+
+        confidence = good.sum() / self._initial_count
+        confidence *= float(np.exp(-spread / max(2.0, 0.02 * w)))
+
+        self._gray, self._points, self._bbox = gray, forward[good].reshape(-1, 1, 2), bbox
+        return bbox, float(confidence)
+
+
+def associate_detections(result, tracking_ctx: dict) -> Tuple[bool, Optional[tuple]]:
+    """Feed one frame's YOLO result through ByteTrack and pick out the locked-on player"""
+    if result is None or result.boxes is None or result.boxes.xyxy is None:
+        return False, None
+
+    init_x, init_y, init_w, init_h = tracking_ctx['init_bbox']
+    detections = tracking_ctx['byte_tracker'].update_with_detections(sv.Detections.from_ultralytics(result))
+    boxes = detections.xyxy
+    clss = detections.class_id
+    ids = detections.tracker_id if len(detections) > 0 else None
+
+    # STRICT: Only track person class (COCO class 0), ignore everything else
+    person_idxs = []
+    for i in range(len(boxes)):
+        if clss is None or clss[i] == PERSON_CLASS:
+            # Additional safety check: ensure reasonable person dimensions
+            x1, y1, x2, y2 = boxes[i]
+            w, h = x2 - x1, y2 - y1
+            aspect_ratio = w / h if h > 0 else 0
+            # Person should have reasonable aspect ratio (not too wide or tall)
+            if 0.3 < aspect_ratio < 2.0 and w > 20 and h > 40:  # Minimum size thresholds
+                person_idxs.append(i)
+
+    if len(person_idxs) == 0:
+        # No valid persons detected - return False but keep the selected_id
+        return False, None
+
+    if tracking_ctx['selected_id'] is None and ids is not None:
+        # First time: Pick detection closest to initial bbox center
+        sel_cx, sel_cy = init_x + init_w / 2.0, init_y + init_h / 2.0
+        min_d, sel_id = 1e9, None
+        for i in person_idxs:
+            x1, y1, x2, y2 = boxes[i]
+            cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+            d = (cx - sel_cx) ** 2 + (cy - sel_cy) ** 2
+            if d < min_d:
+                min_d = d
+                sel_id = ids[i]
+        tracking_ctx['selected_id'] = sel_id
+        print(f"🔒 LOCKED ON Player ID: {sel_id} for initial bbox: {init_x}, {init_y}, {init_w}, {init_h}")
+
+    # CRITICAL: Only track the selected player ID, NEVER switch to others
+    chosen_idx = None
+    if ids is not None and tracking_ctx['selected_id'] is not None:
+        # Look for our specific selected player ID
+        for i in person_idxs:
+            if ids[i] == tracking_ctx['selected_id']:
+                chosen_idx = i
+                break
+
+        tracking_ctx['target_lost'] = chosen_idx is None
+        if chosen_idx is None:
+            # Return last known bbox if we have it, otherwise False
+            if tracking_ctx.get('last_bbox') is not None:
+                return True, tracking_ctx['last_bbox']
+            return False, None
+
+    # If we found our selected player, update the bbox
+    if chosen_idx is not None:
+        x1, y1, x2, y2 = boxes[chosen_idx]
+        bbox = (int(x1), int(y1), int(x2 - x1), int(y2 - y1))
+        tracking_ctx['last_bbox'] = bbox
+        return True, bbox
+
+    # Fallback: if no IDs available, use nearest to last known position
+    if ids is None and tracking_ctx.get('last_bbox') is not None:
+        last_x, last_y, last_w, last_h = tracking_ctx['last_bbox']
+        ref_cx, ref_cy = last_x + last_w / 2.0, last_y + last_h / 2.0
+        min_d, chosen_idx = 1e9, None
+        for i in person_idxs:
+            x1, y1, x2, y2 = boxes[i]
+            cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+            d = (cx - ref_cx) ** 2 + (cy - ref_cy) ** 2
+            if d < min_d:
+                min_d = d
+                chosen_idx = i
+        if chosen_idx is not None:
+            x1, y1, x2, y2 = boxes[chosen_idx]
+            bbox = (int(x1), int(y1), int(x2 - x1), int(y2 - y1))
+            tracking_ctx['last_bbox'] = bbox
+            return True, bbox
+
+    return False, None
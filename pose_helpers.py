@@ -0,0 +1,62 @@
+"""
+Shared MediaPipe pose helpers used by the analyses and their worker processes.
+
+Kept free of Flask/app imports so it can be imported in spawned worker
+processes without starting the dashboard.
+"""
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+mp_pose = mp.solutions.pose
+mp_drawing = mp.solutions.drawing_utils
+
+# Landmark names in MediaPipe index order, e.g. 'left_shoulder'
+JOINT_NAMES = [landmark.name.lower() for landmark in mp_pose.PoseLandmark]
+
+DEFAULT_POSE_OPTIONS = {
+    'min_detection_confidence': 0.7,
+    'min_tracking_confidence': 0.7,
+}
+
+_LANDMARK_STYLE = mp_drawing.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2)
+_CONNECTION_STYLE = mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
+
+
+def landmarks_to_array(pose_landmarks):
+    """MediaPipe landmarks as a 33 x 4 float32 array of (x, y, z, visibility)"""
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark], dtype=np.float32)
+
+
+def array_to_landmarks(landmark_array):
+    """Rebuild a NormalizedLandmarkList from a 33 x 4 array so cached poses draw like live ones"""
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in landmark_array.tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
+
+
+def roi_landmarks_to_frame(pose_landmarks, roi, width, height):
+    """Map landmarks normalized to an (x, y, w, h) crop back to full-frame normalized coordinates, in place"""
+    roi_x, roi_y, roi_w, roi_h = roi
+    for landmark in pose_landmarks.landmark:
+        landmark.x = (landmark.x * roi_w + roi_x) / width
+        landmark.y = (landmark.y * roi_h + roi_y) / height
+        landmark.z = landmark.z * roi_w / width  # z shares the x scale
+    return pose_landmarks
+
+
+def draw_pose_overlay(frame, pose_landmarks, width, height):
+    """Draw joints and pose connections onto a BGR frame in place"""
+    for landmark in pose_landmarks.landmark:
+        x = int(landmark.x * width)
+        y = int(landmark.y * height)
+        cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)  # Green circles for joints
+
+    mp_drawing.draw_landmarks(
+        frame, pose_landmarks, mp_pose.POSE_CONNECTIONS,
+        _LANDMARK_STYLE, _CONNECTION_STYLE
+    )
+    return frame
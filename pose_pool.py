@@ -0,0 +1,137 @@
+"""
+Pool of reusable MediaPipe Pose graphs keyed by configuration.
+
+Building an ``mp_pose.Pose`` parses the graph config and loads the TFLite
+models; doing that for every analysis is wasted work. The pool keeps idle
+graphs per (model_complexity, detection confidence, tracking confidence,
+static_image_mode) and resets their tracking state when they are checked
+back in, so the next job starts cold without paying for initialization.
+The number of graphs per configuration is bounded; extra concurrent jobs
+wait for one to be returned.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from pose_helpers import mp_pose
+
+
+class PosePool:
+    """Checkout/checkin pool of ``mp_pose.Pose`` instances"""
+
+    def __init__(self, max_per_config: int = 2):
+        self.max_per_config = max_per_config
+        self._cond = threading.Condition()
+        self._idle = {}       # key -> list of idle Pose graphs
+        self._created = {}    # key -> number of graphs alive
+        self._checked_out = {}  # id(pose) -> key
+        self._stats = {}
+
+    @staticmethod
+    def _key(model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+             static_image_mode=False):
+        return (int(model_complexity), float(min_detection_confidence),
+                float(min_tracking_confidence), bool(static_image_mode))
+
+    def acquire(self, timeout: Optional[float] = None, **options):
+        """
+        Check out a Pose graph for ``options`` (same keywords as ``mp_pose.Pose``)
+
+        Blocks while all graphs for this configuration are in use.
+
+        Raises:
+            TimeoutError: if ``timeout`` elapses before a graph is free
+        """
+        key = self._key(**options)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        with self._cond:
+            stats = self._stats.setdefault(key, {'checkouts': 0, 'created': 0, 'init_seconds': 0.0, 'waits': 0})
+            while not self._idle.get(key) and self._created.get(key, 0) >= self.max_per_config:
+                stats['waits'] += 1
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No Pose graph available for {key}")
+                self._cond.wait(remaining)
+
+            stats['checkouts'] += 1
+            if self._idle.get(key):
+                pose = self._idle[key].pop()
+                self._checked_out[id(pose)] = key
+                return pose
+
+            # Reserve the slot before building outside the lock
+            self._created[key] = self._created.get(key, 0) + 1
+
+        try:
+            started = time.perf_counter()
+            pose = mp_pose.Pose(model_complexity=key[0], min_detection_confidence=key[1],
+                                min_tracking_confidence=key[2], static_image_mode=key[3])
+            init_seconds = time.perf_counter() - started
+        except Exception:
+            with self._cond:
+                self._created[key] -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            stats['created'] += 1
+            stats['init_seconds'] += init_seconds
+            self._checked_out[id(pose)] = key
+        print(f"🦴 Created Pose graph {key} in {init_seconds:.2f}s")
+        return pose
+
+    def release(self, pose):
+        """Return a graph to the pool, resetting its tracking state for the next job"""
+        with self._cond:
+            key = self._checked_out.pop(id(pose))
+
+        try:
+            pose.reset()
+            healthy = True
+        except Exception as e:
+            print(f"⚠️ Pose graph reset failed, discarding it: {e}")
+            healthy = False
+            try:
+                pose.close()
+            except Exception:
+                pass
+
+        with self._cond:
+            if healthy:
+                self._idle.setdefault(key, []).append(pose)
+            else:
+                self._created[key] -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None, **options):
+        """Context manager form of acquire/release"""
+        pose = self.acquire(timeout=timeout, **options)
+        try:
+            yield pose
+        finally:
+            self.release(pose)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                'complexity={},det={},track={},static={}'.format(*key): {
+                    **stats,
+                    'init_seconds': round(stats['init_seconds'], 3),
+                    'alive': self._created.get(key, 0),
+                    'idle': len(self._idle.get(key, [])),
+                }
+                for key, stats in self._stats.items()
+            }
+
+    def close_all(self):
+        """Close every idle graph, e.g. at shutdown"""
+        with self._cond:
+            for key, graphs in self._idle.items():
+                for pose in graphs:
+                    pose.close()
+                self._created[key] -= len(graphs)
+            self._idle.clear()
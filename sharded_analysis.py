@@ -0,0 +1,221 @@
+"""
+Sharded pose analysis: split one video into frame ranges and pose them in parallel.
+
+Each shard is decoded and posed in its own process with its own
+``mp_pose.Pose``. A shard starts ``overlap`` frames before its range so
+MediaPipe's tracker is warmed up by the time the first frame that counts is
+reached; warm-up frames are discarded. Landmark arrays and annotated video
+segments are stitched back together in frame order.
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from video_encoder import VideoEncoder
+
+DEFAULT_OVERLAP = 15
+
+# Shared frame counter, installed in each worker by _init_worker
+_frames_done = None
+
+
+def plan_shards(total_frames: int, shards: int, overlap: int = DEFAULT_OVERLAP) -> List[Tuple[int, int, int]]:
+    """
+    Split ``total_frames`` into contiguous ranges
+
+    Returns:
+        List of (warmup_start, start, end) tuples, 0-based, ``end`` exclusive
+    """
+    shards = max(1, min(shards, total_frames))
+    size = -(-total_frames // shards)  # ceil division
+    plan = []
+    for start in range(0, total_frames, size):
+        end = min(start + size, total_frames)
+        plan.append((max(0, start - overlap), start, end))
+    return plan
+
+
+def _init_worker(counter):
+    global _frames_done
+    _frames_done = counter
+
+
+def _pose_shard(video_path: str, warmup_start: int, start: int, end: int,
+                segment_path: Optional[str], pose_options: Dict, encoder_options: Optional[Dict] = None) -> Dict:
+    """Worker: pose frames [start, end) of the video, warming the tracker up from ``warmup_start``"""
+    # Imported here so the parent does not pay for MediaPipe just to plan shards
+    from pose_helpers import mp_pose, landmarks_to_array, draw_pose_overlay
+
+    cap = cv2.VideoCapture(video_path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if warmup_start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, warmup_start)
+
+    out = None
+    if segment_path:
+        out = VideoEncoder(**(encoder_options or {})).open(segment_path, fps, width, height)
+
+    pose = mp_pose.Pose(**pose_options)
+    frames = []
+    landmarks = []
+    frames_written = 0
+    try:
+        for frame_index in range(warmup_start, end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            results = pose.process(rgb_frame)
+
+            if frame_index < start:
+                continue  # Warm-up frame: only primes the tracker
+
+            if results.pose_landmarks:
+                frames.append(frame_index + 1)
+                landmarks.append(landmarks_to_array(results.pose_landmarks))
+                if out is not None:
+                    draw_pose_overlay(frame, results.pose_landmarks, width, height)
+
+            if out is not None:
+                out.write(frame)
+            frames_written += 1
+
+            if _frames_done is not None:
+                with _frames_done.get_lock():
+                    _frames_done.value += 1
+    finally:
+        cap.release()
+        pose.close()
+        if out is not None:
+            out.release()
+
+    return {
+        'start': start,
+        'frames': np.asarray(frames, dtype=np.int32),
+        'landmarks': np.asarray(landmarks, dtype=np.float32).reshape(-1, 33, 4),
+        'segment_path': segment_path,
+        'frames_written': frames_written,
+    }
+
+
+def _concat_segments(segment_paths: List[str], output_path: str, fps: float, width: int, height: int,
+                     encoder: VideoEncoder):
+    """Join encoded segments; stream-copies with ffmpeg when available, re-encodes otherwise"""
+    if shutil.which('ffmpeg'):
+        list_path = output_path + '.segments.txt'
+        with open(list_path, 'w') as f:
+            for path in segment_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        try:
+            subprocess.run(
+                ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                 '-i', list_path, '-c', 'copy', '-movflags', '+faststart', output_path],
+                check=True
+            )
+            return
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"⚠️ ffmpeg concat failed ({e}), re-encoding segments")
+        finally:
+            os.remove(list_path)
+
+    out = encoder.open(output_path, fps, width, height)
+    for path in segment_paths:
+        cap = cv2.VideoCapture(path)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(frame)
+        cap.release()
+    out.release()
+
+
+def run_sharded_pose(video_path: str, output_video_path: Optional[str], shards: int,
+                     overlap: int = DEFAULT_OVERLAP, pose_options: Optional[Dict] = None,
+                     progress=None, encoder_options: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pose a video across ``shards`` processes
+
+    Args:
+        video_path: Input video
+        output_video_path: Where to write the stitched annotated video, or None to skip rendering
+        shards: Number of frame ranges / worker processes
+        overlap: Warm-up frames decoded before each shard's first frame
+        pose_options: Keyword arguments for ``mp_pose.Pose``
+        progress: Optional callback ``progress(frames_done, total_frames)``
+        encoder_options: ``VideoEncoder`` arguments for the segments (``VideoEncoder.options()``)
+
+    Returns:
+        (frames, landmarks): 1-based video frame numbers of every frame with a
+        detected pose, in order, and the matching frames x 33 x 4 float32 array
+    """
+    from pose_helpers import DEFAULT_POSE_OPTIONS
+
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+
+    if total_frames <= 0:
+        raise Exception("Could not determine frame count for sharding")
+
+    plan = plan_shards(total_frames, shards, overlap)
+    pose_options = pose_options or DEFAULT_POSE_OPTIONS
+    print(f"🧩 Sharding {total_frames} frames into {len(plan)} segments ({overlap} warm-up frames each)")
+
+    # Spawned (not forked) workers: the parent runs Flask and job threads.
+    # The pool is per job on purpose: it gets exactly one worker per shard, and the
+    # workers' MediaPipe graphs are freed when the job ends instead of idling between
+    # jobs. The shared frame counter can only reach workers through the initializer
+    # (synchronized values are inherited, not pickled), so it is bound to the pool too.
+    # Spawning costs a second or two, which is small next to a video worth sharding.
+    ctx = multiprocessing.get_context('spawn')
+    counter = ctx.Value('i', 0)
+    segment_dir = tempfile.mkdtemp(prefix='shards_') if output_video_path else None
+    start_time = time.time()
+
+    try:
+        with ProcessPoolExecutor(max_workers=len(plan), mp_context=ctx,
+                                 initializer=_init_worker, initargs=(counter,)) as executor:
+            pending = set()
+            for i, (warmup_start, start, end) in enumerate(plan):
+                segment_path = os.path.join(segment_dir, f'segment_{i:04d}.mp4') if segment_dir else None
+                pending.add(executor.submit(_pose_shard, video_path, warmup_start, start, end,
+                                            segment_path, pose_options, encoder_options))
+
+            shard_results = []
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                shard_results.extend(future.result() for future in done)
+                if progress:
+                    progress(counter.value, total_frames)
+
+        shard_results.sort(key=lambda shard: shard['start'])
+        frames = np.concatenate([shard['frames'] for shard in shard_results])
+        landmarks = np.concatenate([shard['landmarks'] for shard in shard_results])
+
+        if output_video_path:
+            _concat_segments([shard['segment_path'] for shard in shard_results],
+                             output_video_path, fps, width, height, VideoEncoder(**(encoder_options or {})))
+    finally:
+        if segment_dir:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    elapsed = time.time() - start_time
+    print(f"🧩 Sharded pose finished: {counter.value} frames in {elapsed:.1f}s "
+          f"({counter.value / elapsed if elapsed > 0 else 0:.1f} fps)")
+    return frames, landmarks
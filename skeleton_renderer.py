@@ -0,0 +1,141 @@
+"""
+Skeleton-only frames drawn on cached background canvases.
+
+The skeleton videos used to allocate a new white image for every frame and
+redraw each grid line on it, then draw the skeleton with one OpenCV call per
+bone and per joint. Here the white (optionally gridded) background is drawn
+once per resolution and copied into the frame, into a caller's reused buffer
+where the frame is written out before the next one is drawn. All bones go to
+a single ``cv2.polylines`` call; joints are stamped from a pre-rasterized
+circle sprite with one NumPy assignment over the whole point array.
+
+Output matches the per-call drawing pixel for pixel: a two-point open
+polyline is drawn exactly like ``cv2.line``, and the sprite is rasterized by
+``cv2.circle`` itself. ``benchmark_rendering.py`` checks both.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from pose_helpers import landmarks_to_array, mp_pose
+
+GRID_SPACING = 50
+GRID_COLOR = (200, 200, 200)
+
+_canvases: Dict[Tuple[int, int, bool], np.ndarray] = {}
+_canvas_lock = threading.Lock()
+
+
+def canvas(width: int, height: int, grid: bool = True) -> np.ndarray:
+    """Read-only white background for this resolution, with grid lines every GRID_SPACING pixels"""
+    key = (width, height, grid)
+    background = _canvases.get(key)
+    if background is None:
+        background = np.full((height, width, 3), 255, dtype=np.uint8)
+        if grid:
+            for x in range(0, width, GRID_SPACING):
+                cv2.line(background, (x, 0), (x, height), GRID_COLOR, 1)
+            for y in range(0, height, GRID_SPACING):
+                cv2.line(background, (0, y), (width, y), GRID_COLOR, 1)
+        background.flags.writeable = False
+        with _canvas_lock:
+            background = _canvases.setdefault(key, background)
+    return background
+
+
+def blank_frame(width: int, height: int, grid: bool = True, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Writable copy of the background, in ``out`` when it has the right shape
+
+    Only pass ``out`` when the previous frame drawn into it has already been
+    written; frames handed to another pipeline stage need their own copy.
+    """
+    background = canvas(width, height, grid)
+    if out is None or out.shape != background.shape:
+        return background.copy()
+    np.copyto(out, background)
+    return out
+
+
+class SkeletonRenderer:
+    """
+    One skeleton drawing style: bone connections and colors, joint radius and outline
+
+    With ``inside_frame_only`` bones are drawn only when both ends are inside
+    the frame and joints only when their center is, as the simple 2D skeleton
+    has always done; otherwise everything is drawn and clipped to the frame.
+    """
+
+    def __init__(self, connections, bone_color, bone_thickness, joint_color, joint_radius,
+                 outline_color=None, outline_thickness=0, inside_frame_only=False):
+        self.connections = np.array(sorted(connections) if isinstance(connections, (set, frozenset)) else connections,
+                                    dtype=np.intp).reshape(-1, 2)
+        self.bone_color = bone_color
+        self.bone_thickness = bone_thickness
+        self.inside_frame_only = inside_frame_only
+        self._sprite_offsets, self._sprite_colors = _joint_sprite(joint_color, joint_radius,
+                                                                  outline_color, outline_thickness)
+
+    def draw(self, frame: np.ndarray, landmarks, width: int, height: int) -> np.ndarray:
+        """Draw one pose (MediaPipe landmarks or a 33 x 4 array) onto ``frame`` in place"""
+        if hasattr(landmarks, 'landmark'):
+            landmarks = landmarks_to_array(landmarks)
+        # Truncate like int(landmark.x * width) did, in double precision
+        points = (np.asarray(landmarks)[:, :2].astype(np.float64) * (width, height)).astype(np.int32)
+        inside = (points[:, 0] >= 0) & (points[:, 0] < width) & (points[:, 1] >= 0) & (points[:, 1] < height)
+
+        connections = self.connections[self.connections.max(axis=1) < len(points)]
+        if self.inside_frame_only:
+            connections = connections[inside[connections].all(axis=1)]
+        if len(connections):
+            cv2.polylines(frame, np.ascontiguousarray(points[connections]), False,
+                          self.bone_color, self.bone_thickness)
+
+        centers = points[inside] if self.inside_frame_only else points
+        ys = (centers[:, None, 1] + self._sprite_offsets[None, :, 0]).ravel()
+        xs = (centers[:, None, 0] + self._sprite_offsets[None, :, 1]).ravel()
+        colors = np.broadcast_to(self._sprite_colors, (len(centers),) + self._sprite_colors.shape).reshape(-1, 3)
+        visible = (xs >= 0) & (xs < frame.shape[1]) & (ys >= 0) & (ys < frame.shape[0])
+        # Joints are stamped in order, so a later joint covers an earlier one as separate circle calls did
+        frame[ys[visible], xs[visible]] = colors[visible]
+        return frame
+
+    def render(self, landmarks, width: int, height: int, grid: bool = True,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Skeleton-only frame: the pose drawn on a copy of the background"""
+        return self.draw(blank_frame(width, height, grid, out), landmarks, width, height)
+
+
+def _joint_sprite(color, radius, outline_color, outline_thickness):
+    """(dy, dx) offsets and BGR colors of the pixels cv2.circle sets for one joint centered at the origin"""
+    margin = radius + outline_thickness + 1
+    size = 2 * margin + 1
+    patch = np.zeros((size, size, 3), dtype=np.uint8)
+    mask = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(patch, (margin, margin), radius, color, -1)
+    cv2.circle(mask, (margin, margin), radius, 1, -1)
+    if outline_color is not None and outline_thickness:
+        cv2.circle(patch, (margin, margin), radius, outline_color, outline_thickness)
+        cv2.circle(mask, (margin, margin), radius, 1, outline_thickness)
+    offsets = np.argwhere(mask) - margin
+    return offsets, patch[mask.astype(bool)]
+
+
+# Every MediaPipe pose connection, as the motion capture skeleton video draws them
+FULL_SKELETON = SkeletonRenderer(mp_pose.POSE_CONNECTIONS, bone_color=(0, 0, 255), bone_thickness=3,
+                                 joint_color=(0, 255, 0), joint_radius=6)
+
+# Basic head/arms/hips/legs skeleton of the fast and streaming skeleton videos (indices as they have always been)
+SIMPLE_CONNECTIONS = [
+    (0, 1), (0, 2), (1, 3), (2, 4),  # Head
+    (0, 5), (0, 6), (5, 6),  # Shoulders
+    (5, 7), (7, 9), (6, 8), (8, 10),  # Arms
+    (5, 11), (6, 12), (11, 12),  # Hips
+    (11, 13), (13, 15), (12, 14), (14, 16)  # Legs
+]
+SIMPLE_SKELETON = SkeletonRenderer(SIMPLE_CONNECTIONS, bone_color=(0, 100, 255), bone_thickness=4,
+                                   joint_color=(0, 255, 0), joint_radius=6,
+                                   outline_color=(0, 0, 0), outline_thickness=2, inside_frame_only=True)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+End-to-end tests for queued pose analyses: /analyze to a finished job and its output files
+
+Run with: python3 -m pytest test_analysis_jobs.py  (or python3 test_analysis_jobs.py)
+"""
+
+import os
+import time
+
+import cv2
+import pytest
+
+import app
+from content_store import ResultStore
+from landmark_cache import LandmarkCache
+from metrics_output import MetricsWriter
+
+FIXTURE_CLIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'Trimmed_V2.mp4')
+CLIP_FRAMES = 24
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client with uploads, outputs and caches in ``tmp_path`` and the default CSV metrics format"""
+    uploads, outputs = tmp_path / 'uploads', tmp_path / 'outputs'
+    uploads.mkdir()
+    outputs.mkdir()
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(uploads))
+    monkeypatch.setitem(app.app.config, 'OUTPUT_FOLDER', str(outputs))
+    monkeypatch.setitem(app.app.config, 'ANALYSIS_SHARDS', 1)
+    writer = MetricsWriter('csv')
+    monkeypatch.setattr(app, 'metrics_writer', writer)
+    monkeypatch.setattr(app, 'landmark_cache', LandmarkCache(str(tmp_path / 'landmarks'), 64 * 1024 * 1024))
+    monkeypatch.setattr(app, 'result_store', ResultStore(str(tmp_path / 'results'), str(outputs), exists=writer.exists))
+    return app.app.test_client()
+
+
+def write_clip(path, frames=CLIP_FRAMES):
+    """The first ``frames`` frames of the fixture clip (a goalie in net)"""
+    cap = cv2.VideoCapture(FIXTURE_CLIP)
+    fps, size = cap.get(cv2.CAP_PROP_FPS), (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for _ in range(frames):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        out.write(frame)
+    out.release()
+    cap.release()
+
+
+def run_analysis(client, **request):
+    response = client.post('/analyze', json=request)
+    assert response.status_code == 202, response.get_json()
+    job_id = response.get_json()['job_id']
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        status = client.get(f'/jobs/{job_id}').get_json()
+        if status['state'] in ('completed', 'failed'):
+            return status
+        time.sleep(0.1)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+@pytest.mark.parametrize('analysis', [{'analysis_type': 'skeleton'}, {'analysis_type': 'goalie'},
+                                      {'analysis_type': 'speed'}, {'analysis_types': ['skeleton', 'goalie', 'speed']}])
+def test_pose_analysis_with_csv_metrics(client, analysis):
+    write_clip(os.path.join(app.app.config['UPLOAD_FOLDER'], 'clip.mp4'))
+    status = run_analysis(client, filename='clip.mp4', force=True, **analysis)
+    assert status['state'] == 'completed', status['error']
+    result = status['result']
+    assert result['success']
+    names = [item['name'] for item in result['results']]
+    assert any(name.endswith('.csv') for name in names)
+    assert not any(name.endswith(('.parquet', '.arrow')) for name in names)
+    for name in names:
+        assert os.path.exists(os.path.join(app.app.config['OUTPUT_FOLDER'], name)), name
+
+
+def output_bytes(result):
+    folder = app.app.config['OUTPUT_FOLDER']
+    contents = {}
+    for item in result['results']:
+        with open(os.path.join(folder, item['name']), 'rb') as f:
+            contents[item['name']] = f.read()
+    return contents
+
+
+def test_selected_player_run_keeps_whole_frame_outputs(client):
+    write_clip(os.path.join(app.app.config['UPLOAD_FOLDER'], 'clip.mp4'))
+    whole = run_analysis(client, filename='clip.mp4', analysis_type='skeleton', force=True)['result']
+    whole_outputs = output_bytes(whole)
+
+    roi = run_analysis(client, filename='clip.mp4', analysis_type='skeleton', bbox=[250, 80, 140, 200],
+                       bbox_frame_width=640)['result']
+    assert roi['success']
+    assert not set(output_bytes(roi)) & set(whole_outputs)
+
+    # The stored whole-frame result is reused, and its files still hold the whole-frame output
+    again = run_analysis(client, filename='clip.mp4', analysis_type='skeleton')['result']
+    assert again == whole
+    assert output_bytes(again) == whole_outputs
+
+
+
+def test_invalid_selection_is_a_bad_request(client):
+    write_clip(os.path.join(app.app.config['UPLOAD_FOLDER'], 'clip.mp4'), frames=2)
+    for selection in ({'bbox': ['a', 1, 2, 3]}, {'bbox': [10, 10, 0, 50]}, {'bbox': [10, 10, 50, -5]},
+                      {'bbox': [-1, 10, 50, 50]}, {'bbox': [10, 10, 50]}, {'bbox': [10, True, 50, 50]},
+                      {'bbox': [10, 10, 50, 50], 'bbox_frame_width': 0},
+                      {'bbox': [10, 10, 50, 50], 'bbox_frame_width': 'wide'}):
+        for route, request in (('/analyze', {'analysis_type': 'skeleton'}), ('/process_motion_capture_analysis', {})):
+            response = client.post(route, json={'filename': 'clip.mp4', **request, **selection})
+            assert response.status_code == 400, (route, selection, response.get_json())
+
+
+
+def test_failed_sharded_pass_closes_preview_and_spill_directory(client, monkeypatch):
+    clip = os.path.join(app.app.config['UPLOAD_FOLDER'], 'clip.mp4')
+    write_clip(clip, frames=4)
+
+    def failing_shards(*args, **kwargs):
+        raise RuntimeError('shard crashed')
+
+    monkeypatch.setattr(app, 'run_sharded_pose', failing_shards)
+    preview = app.preview_hub.create()
+    with pytest.raises(RuntimeError):
+        app._annotated_pose_pass(clip, None, shards=2, preview=preview)
+    assert preview.closed
+    assert not [name for name in os.listdir(app.landmark_cache.directory) if name.endswith('.tmp')]
+
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for resumable chunked uploads: offset checks, resuming and completion into the content store
+
+Run with: python3 -m pytest test_chunked_upload.py  (or python3 test_chunked_upload.py)
+"""
+
+import hashlib
+import io
+import os
+
+from chunked_upload import ChunkedUploads, UploadError, UploadOffsetError
+from content_store import UploadStore, file_sha256, known_sha256
+
+BODY = os.urandom(3 * 1024 * 1024 + 17)
+
+
+def make_uploads(tmp_path):
+    store = UploadStore(str(tmp_path / 'uploads'))
+    return ChunkedUploads(str(tmp_path / 'uploads' / 'partial'), store, max_bytes=64 * 1024 * 1024)
+
+
+def test_upload_in_chunks_and_complete(tmp_path):
+    uploads = make_uploads(tmp_path)
+    session = uploads.start('game.mp4', len(BODY))
+    step = 1024 * 1024
+    for offset in range(0, len(BODY), step):
+        state = uploads.write_chunk(session['upload_id'], offset, io.BytesIO(BODY[offset:offset + step]))
+        assert state['received'] == min(offset + step, len(BODY))
+
+    stored = uploads.complete(session['upload_id'])
+    digest = hashlib.sha256(BODY).hexdigest()
+    assert stored['content_hash'] == digest
+    assert stored['filename'] == 'game.mp4' and not stored['duplicate']
+    with open(stored['filepath'], 'rb') as f:
+        assert f.read() == BODY
+    assert file_sha256(stored['filepath']) == digest
+
+
+def test_wrong_offset_is_a_conflict(tmp_path):
+    uploads = make_uploads(tmp_path)
+    session = uploads.start('game.mp4', len(BODY))
+    uploads.write_chunk(session['upload_id'], 0, io.BytesIO(BODY[:1000]))
+    try:
+        uploads.write_chunk(session['upload_id'], 500, io.BytesIO(BODY[500:2000]))
+    except UploadOffsetError as e:
+        assert e.status == 409
+        assert e.received == 1000
+    else:
+        raise AssertionError('chunk at the wrong offset was accepted')
+    assert uploads.status(session['upload_id'])['received'] == 1000
+
+
+def test_complete_before_all_bytes_is_a_conflict(tmp_path):
+    uploads = make_uploads(tmp_path)
+    session = uploads.start('game.mp4', len(BODY))
+    uploads.write_chunk(session['upload_id'], 0, io.BytesIO(BODY[:1000]))
+    try:
+        uploads.complete(session['upload_id'])
+    except UploadOffsetError as e:
+        assert e.status == 409 and e.received == 1000
+    else:
+        raise AssertionError('incomplete upload was completed')
+
+
+def test_resume_after_restart(tmp_path):
+    uploads = make_uploads(tmp_path)
+    session = uploads.start('game.mp4', len(BODY))
+    uploads.write_chunk(session['upload_id'], 0, io.BytesIO(BODY[:1234567]))
+
+    # A new instance has no running hash, as after a server restart; the client asks where to continue
+    restarted = make_uploads(tmp_path)
+    received = restarted.status(session['upload_id'])['received']
+    assert received == 1234567
+    restarted.write_chunk(session['upload_id'], received, io.BytesIO(BODY[received:]))
+    stored = restarted.complete(session['upload_id'])
+    assert stored['content_hash'] == hashlib.sha256(BODY).hexdigest()
+
+
+def test_chunk_past_declared_size_is_rejected(tmp_path):
+    uploads = make_uploads(tmp_path)
+    session = uploads.start('game.mp4', 100)
+    try:
+        uploads.write_chunk(session['upload_id'], 0, io.BytesIO(BODY[:200]))
+    except UploadError as e:
+        assert e.status == 400
+    else:
+        raise AssertionError('oversized chunk was accepted')
+    assert uploads.status(session['upload_id'])['received'] == 0
+
+
+def test_duplicate_upload_reuses_blob_and_hash_survives_restart(tmp_path):
+    uploads = make_uploads(tmp_path)
+    first = uploads.start('a.mp4', len(BODY))
+    uploads.write_chunk(first['upload_id'], 0, io.BytesIO(BODY))
+    stored = uploads.complete(first['upload_id'])
+    second = uploads.start('b.mp4', len(BODY))
+    uploads.write_chunk(second['upload_id'], 0, io.BytesIO(BODY))
+    assert uploads.complete(second['upload_id'])['duplicate']
+
+    # The digest is recovered from the blob name, without reading the file
+    import content_store
+    content_store._digest_memo.clear()
+    assert known_sha256(stored['filepath']) == stored['content_hash']
+
+
+def test_unknown_upload_is_not_found(tmp_path):
+    uploads = make_uploads(tmp_path)
+    try:
+        uploads.status('0123456789abcdef')
+    except UploadError as e:
+        assert e.status == 404
+    else:
+        raise AssertionError('unknown upload was found')
+
+
+if __name__ == '__main__':
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the background job queue: job states, the pending-job limit and retention pruning
+
+Run with: python3 -m pytest test_job_queue.py  (or python3 test_job_queue.py)
+"""
+
+import threading
+import time
+
+from job_queue import JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobQueue, QueueFullError
+
+
+def test_job_runs_to_completion_with_progress():
+    queue = JobQueue(max_workers=1)
+
+    def analysis(frames, progress=None):
+        for n in range(1, frames + 1):
+            progress(n, frames, metrics={'speed': 1.23456, 'angle': float('nan')})
+        return {'success': True}
+
+    job = queue.submit('skeleton', analysis, 10, params={'filename': 'a.mp4'})
+    assert job.wait(5)
+    status = job.to_dict()
+    assert status['state'] == JOB_COMPLETED
+    assert status['result'] == {'success': True}
+    assert status['frames_processed'] == 10 and status['total_frames'] == 10
+    assert status['progress'] == 1.0
+    assert status['metrics'] == {'speed': 1.2346, 'angle': None}  # NaN is not valid JSON
+    assert queue.get(job.id) is job
+
+
+def test_failed_job_reports_error():
+    queue = JobQueue(max_workers=1)
+
+    def analysis(progress=None):
+        raise ValueError('no video')
+
+    job = queue.submit('goalie', analysis)
+    assert job.wait(5)
+    status = job.to_dict()
+    assert status['state'] == JOB_FAILED
+    assert status['error'] == 'no video'
+    assert status['result'] is None
+
+
+def test_states_move_from_queued_to_running():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking(progress=None):
+        started.set()
+        release.wait(5)
+        return {}
+
+    first = queue.submit('skeleton', blocking)
+    second = queue.submit('skeleton', blocking)
+    assert started.wait(5)
+    assert first.state == JOB_RUNNING
+    assert second.state == JOB_QUEUED  # The only worker is busy
+    release.set()
+    assert first.wait(5) and second.wait(5)
+    assert second.state == JOB_COMPLETED
+
+
+def test_queue_full_raises():
+    queue = JobQueue(max_workers=1, max_pending=2)
+    release = threading.Event()
+    blocking = lambda progress=None: release.wait(5)
+    try:
+        queue.submit('skeleton', blocking)
+        queue.submit('skeleton', blocking)
+        try:
+            queue.submit('skeleton', blocking)
+        except QueueFullError:
+            pass
+        else:
+            raise AssertionError('third pending job was accepted')
+    finally:
+        release.set()
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    queue = JobQueue(max_workers=1, retention_seconds=60)
+    old = queue.add_completed('skeleton', {'success': True})
+    old.finished_at = time.time() - 120
+    recent = queue.add_completed('skeleton', {'success': True})
+
+    queue.submit('skeleton', lambda progress=None: {}).wait(5)  # Submitting prunes
+    assert queue.get(old.id) is None
+    assert queue.get(recent.id) is recent
+
+
+def test_add_completed_is_immediately_finished():
+    queue = JobQueue()
+    job = queue.add_completed('goalie', {'success': True}, params={'reused': True})
+    assert job.wait(0)
+    assert job.to_dict()['state'] == JOB_COMPLETED
+    assert job.to_dict()['result'] == {'success': True}
+
+
+if __name__ == '__main__':
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
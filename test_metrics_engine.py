@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the declarative metrics engine: incremental (stream) and batch (evaluate) agree
+
+Run with: python3 -m pytest test_metrics_engine.py  (or python3 test_metrics_engine.py)
+"""
+
+import numpy as np
+
+from metrics_engine import GOALIE_LIVE_METRICS, GOALIE_METRICS, SPEED_METRICS, MetricsEngine
+from pose_helpers import array_to_landmarks
+
+SPECS = {
+    'goalie': GOALIE_METRICS,
+    'live': GOALIE_METRICS + GOALIE_LIVE_METRICS + SPEED_METRICS,
+    'acceleration': [
+        {'name': 'wrist', 'kind': 'acceleration', 'point': 'right_wrist', 'units': 'pixels'},
+        {'name': 'hands', 'kind': 'distance', 'points': ['left_wrist', 'right_wrist']},
+        {'name': 'weighted', 'kind': 'com', 'joints': ['left_hip', 'right_hip'], 'weights': [1, 3]},
+        {'name': 'weighted_speed', 'kind': 'velocity', 'point': 'weighted'},
+        {'name': 'weighted_speed_smoothed', 'kind': 'smooth', 'of': 'weighted_speed', 'window': 4},
+    ],
+}
+
+
+def random_landmarks(frames=200, seed=0):
+    rng = np.random.default_rng(seed)
+    landmarks = rng.random((frames, 33, 4)).astype(np.float32)
+    if frames > 80:
+        landmarks[50, 23:25, :2] = landmarks[49, 23:25, :2]  # Stationary hips: zero speed rows
+        landmarks[80, 11] = landmarks[80, 23]  # Coincident joints: undefined (NaN) angle
+    return landmarks
+
+
+def assert_columns_equal(expected, actual):
+    assert list(expected) == list(actual)
+    for name in expected:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-9, atol=1e-9, equal_nan=True,
+                                   err_msg=name)
+
+
+def test_stream_matches_evaluate():
+    landmarks = random_landmarks()
+    for spec_name, spec in SPECS.items():
+        engine = MetricsEngine(spec)
+        expected = engine.evaluate(landmarks, fps=30, width=1280, height=720)
+
+        stream = engine.stream(fps=30, width=1280, height=720)
+        rows = [stream.update(pose) for pose in landmarks]
+        actual = {name: np.array([row[name] for row in rows]) for name in expected}
+        assert_columns_equal(expected, actual)
+        assert stream.rows == len(landmarks)
+        assert stream.latest == rows[-1], spec_name
+
+
+def test_update_landmarks_matches_update():
+    landmarks = random_landmarks(20)
+    engine = MetricsEngine(SPECS['live'])
+    from_arrays = engine.stream(fps=25)
+    from_landmarks = engine.stream(fps=25)
+    for pose in landmarks:
+        a = from_arrays.update(pose)
+        b = from_landmarks.update_landmarks(array_to_landmarks(pose))
+        np.testing.assert_allclose(list(b.values()), list(a.values()), rtol=1e-12, equal_nan=True)
+
+
+def test_goalie_table_columns():
+    engine = MetricsEngine(GOALIE_METRICS)
+    columns = list(engine.evaluate(random_landmarks(5), fps=30))
+    assert columns == ['com_x', 'com_y', 'glove_hand_velocity', 'stick_hand_velocity', 'center_of_mass_velocity',
+                       'leg_extension_angle', 'glove_hand_angle', 'posture_angle']
+
+
+def test_context_rows():
+    assert MetricsEngine(GOALIE_METRICS).context_rows == 1
+    assert MetricsEngine(SPECS['acceleration']).context_rows == 4  # Smoothing window 4 over a velocity
+    assert MetricsEngine(SPEED_METRICS).context_rows == 15
+
+
+def test_chunked_evaluate_with_context_matches_whole():
+    landmarks = random_landmarks(300)
+    engine = MetricsEngine(SPECS['live'])
+    expected = engine.evaluate(landmarks, fps=30, width=1280, height=720)
+    context, chunks = engine.context_rows, []
+    for start in range(0, len(landmarks), 64):
+        first = max(0, start - context)
+        columns = engine.evaluate(landmarks[first:start + 64], fps=30, width=1280, height=720)
+        chunks.append({name: values[start - first:] for name, values in columns.items()})
+    actual = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in expected}
+    assert_columns_equal(expected, actual)
+
+
+def test_invalid_specs_are_rejected():
+    for spec in ([{'name': 'x', 'kind': 'jerk', 'point': 'nose'}],
+                 [{'name': 'x', 'kind': 'velocity', 'point': 'tail'}],
+                 [{'name': 'x', 'kind': 'smooth', 'of': 'missing', 'window': 3}]):
+        try:
+            MetricsEngine(spec)
+        except ValueError:
+            continue
+        raise AssertionError(f'{spec} was accepted')
+
+
+if __name__ == '__main__':
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for selected-player tracking: detector settings, and batched detection matching frame-by-frame tracking
+
+The comparison on the fixture clip needs ultralytics, supervision and the
+yolov8n weights, and is skipped without them.
+
+Run with: python3 -m pytest test_player_tracking.py  (or python3 test_player_tracking.py)
+"""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import player_tracking
+from player_tracking import DETECTION_OPTIONS, associate_detections, init_tracking, iter_tracked, track_batch, update_tracking
+
+FIXTURE_CLIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads', 'Trimmed_V2.mp4')
+
+
+class RecordingModel:
+    """Stands in for a YOLO model: records the keyword arguments of every call and detects nothing"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, frames, **kwargs):
+        self.calls.append(kwargs)
+        return []
+
+
+def test_detector_keeps_low_score_boxes_for_bytetrack():
+    model = RecordingModel()
+    ctx = {'use_yolo': True, 'model': model}
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    assert update_tracking(frame, ctx) == (False, None)
+    assert track_batch([frame, frame], ctx) == []
+    assert model.calls == [DETECTION_OPTIONS, DETECTION_OPTIONS]
+    assert DETECTION_OPTIONS['conf'] == 0.1  # What model.track used; plain inference would default to 0.25
+
+
+def load_frames(count=60):
+    cap = cv2.VideoCapture(FIXTURE_CLIP)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+@pytest.fixture(scope='module')
+def yolo():
+    pytest.importorskip('supervision')
+    ultralytics = pytest.importorskip('ultralytics')
+    if not player_tracking.BYTETRACK_AVAILABLE:
+        pytest.skip('supervision not importable by player_tracking')
+    try:
+        return ultralytics.YOLO('yolov8n.pt')
+    except Exception as e:  # No weights and no network to fetch them
+        pytest.skip(f'yolov8n weights unavailable: {e}')
+
+
+def track_ids(model, frames, bbox, batch_size, monkeypatch):
+    """Per frame: the locked-on ID when association matched it (None when lost), and the box"""
+    ctx = init_tracking(frames[0], bbox, model, frame_rate=24)
+    sequence = []
+
+    def recording_associate(result, tracking_ctx):
+        ok, box = associate_detections(result, tracking_ctx)
+        matched = ok and not tracking_ctx.get('target_lost')
+        sequence.append((tracking_ctx['selected_id'] if matched else None, box))
+        return ok, box
+
+    monkeypatch.setattr(player_tracking, 'associate_detections', recording_associate)
+    if batch_size == 1:
+        for frame in frames:
+            update_tracking(frame, ctx)
+    else:
+        for _ in iter_tracked(enumerate(frames, start=1), ctx, batch_size):
+            pass
+    return sequence
+
+
+def test_batched_tracking_matches_frame_by_frame(yolo, monkeypatch):
+    frames = load_frames()
+    assert frames, FIXTURE_CLIP
+    height, width = frames[0].shape[:2]
+    bbox = (width // 3, height // 4, width // 3, height // 2)
+    per_frame = track_ids(yolo, frames, bbox, 1, monkeypatch)
+    assert any(player_id is not None for player_id, _ in per_frame)
+    for batch_size in (4, 8):
+        assert track_ids(yolo, frames, bbox, batch_size, monkeypatch) == per_frame
+
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the streamed metrics tables: chunked writes equal one whole-table write
+
+Run with: python3 -m pytest test_pose_tables.py  (or python3 test_pose_tables.py)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from landmark_store import LandmarkStore
+from metrics_output import MetricsWriter, PYARROW_AVAILABLE
+from pose_helpers import array_to_landmarks
+
+KINDS = ('joints', 'skeleton', 'goalie', 'speed')
+FPS, WIDTH, HEIGHT = 30.0, 1280, 720
+
+
+def random_poses(count=157, seed=1):
+    rng = np.random.default_rng(seed)
+    frames = np.sort(rng.choice(np.arange(1, count * 2), count, replace=False)).astype(np.int32)
+    return frames, rng.random((count, 33, 4)).astype(np.float32)
+
+
+def write_tables(tmp_path, name, chunk, feed):
+    app.app.config['TABLE_FLUSH_FRAMES'] = chunk
+    paths = {kind: str(tmp_path / f'{name}_{kind}.csv') for kind in KINDS}
+    tables = app._PoseTables(paths, FPS, WIDTH, HEIGHT)
+    feed(tables)
+    tables.close()
+    for kind, path in paths.items():
+        app.metrics_writer.ensure_csv(path)
+    return {kind: pd.read_csv(path) for kind, path in paths.items()}
+
+
+@pytest.fixture(autouse=True)
+def restore_flush_frames(monkeypatch):
+    monkeypatch.setitem(app.app.config, 'TABLE_FLUSH_FRAMES', app.app.config['TABLE_FLUSH_FRAMES'])
+
+
+@pytest.fixture(params=['csv', 'arrow', 'parquet'])
+def metrics_format(request, monkeypatch):
+    if request.param != 'csv' and not PYARROW_AVAILABLE:
+        pytest.skip('pyarrow not installed')
+    monkeypatch.setattr(app, 'metrics_writer', MetricsWriter(request.param))
+    return request.param
+
+
+def assert_tables_equal(expected, actual):
+    for kind in KINDS:
+        pd.testing.assert_frame_equal(actual[kind], expected[kind], check_exact=False, rtol=1e-6, obj=kind)
+
+
+def test_chunked_add_matches_whole_table(tmp_path, metrics_format):
+    frames, landmarks = random_poses()
+    whole = write_tables(tmp_path, 'whole', len(frames) + 1, lambda t: t.extend(frames, landmarks))
+    for chunk in (1, 2, 7, 64):
+        def feed(tables):
+            for frame, pose in zip(frames, landmarks):
+                tables.add(int(frame), array_to_landmarks(pose))
+        assert_tables_equal(whole, write_tables(tmp_path, f'chunk{chunk}', chunk, feed))
+
+
+def test_chunked_extend_matches_whole_table(tmp_path, metrics_format):
+    frames, landmarks = random_poses()
+    whole = write_tables(tmp_path, 'whole', len(frames) + 1, lambda t: t.extend(frames, landmarks))
+    assert_tables_equal(whole, write_tables(tmp_path, 'chunked', 10, lambda t: t.extend(frames, landmarks)))
+
+
+def test_whole_table_matches_batch_metrics(tmp_path):
+    frames, landmarks = random_poses()
+    tables = write_tables(tmp_path, 'whole', len(frames) + 1, lambda t: t.extend(frames, landmarks))
+    store = LandmarkStore.from_arrays(frames, landmarks)
+
+    assert list(tables['joints']['frame']) == list(frames)
+    assert list(tables['skeleton']['frame']) == list(range(1, len(frames) + 1))
+    metrics = app.goalie_metrics.evaluate(landmarks, FPS, WIDTH, HEIGHT)
+    for name, values in metrics.items():
+        np.testing.assert_allclose(tables['goalie'][name], values, rtol=1e-6, equal_nan=True, err_msg=name)
+    speed = app._speed_rows(store, FPS, WIDTH, HEIGHT)
+    np.testing.assert_allclose(tables['speed']['speed_px_s'], speed['speed_px_s'], rtol=1e-6, equal_nan=True)
+    assert np.isnan(tables['speed']['displacement'][0])
+
+
+def test_partial_table_is_readable_before_close(tmp_path, metrics_format):
+    frames, landmarks = random_poses(40)
+    app.app.config['TABLE_FLUSH_FRAMES'] = 16
+    path = str(tmp_path / 'partial.csv')
+    tables = app._PoseTables({'joints': path}, FPS, WIDTH, HEIGHT)
+    tables.extend(frames[:32], landmarks[:32])
+    stream = tables._streams['joints']
+    if metrics_format == 'csv':
+        assert len(pd.read_csv(path)) == 32
+    else:
+        from metrics_output import _read_batches
+        assert sum(batch.num_rows for batch in _read_batches(stream.path)) == 32
+    tables.close()
+
+
+def test_spilled_store_reads_back_all_rows(tmp_path):
+    frames, landmarks = random_poses(50)
+    store = LandmarkStore(chunk=8, spill_dir=str(tmp_path))
+    for frame, pose in zip(frames, landmarks):
+        store.append(frame, pose)
+    assert len(store) == 50
+    np.testing.assert_array_equal(store.frames, frames)
+    np.testing.assert_array_equal(store.landmarks, landmarks)
+    pd.testing.assert_frame_equal(store.to_dataframe(), LandmarkStore.from_arrays(frames, landmarks).to_dataframe())
+
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests that the cached-canvas skeleton renderer draws exactly what the per-frame drawing did
+
+Run with: python3 -m pytest test_skeleton_renderer.py  (or python3 test_skeleton_renderer.py)
+"""
+
+import numpy as np
+
+from benchmark_rendering import legacy_blank_grid_frame, legacy_simple_skeleton, legacy_skeleton_frame, synthetic_poses
+from pose_helpers import array_to_landmarks
+from skeleton_renderer import FULL_SKELETON, SIMPLE_SKELETON, blank_frame
+
+SIZES = [(640, 360), (1280, 720), (333, 201)]
+
+
+def edge_poses(count=40, seed=3):
+    """Joints scattered over and just past every edge, where sprites are clipped"""
+    rng = np.random.default_rng(seed)
+    poses = []
+    for _ in range(count):
+        pose = np.ones((33, 4), dtype=np.float32)
+        pose[:, :2] = rng.uniform(-0.05, 1.05, (33, 2))
+        pose[:4, :2] = rng.choice([0.0, 0.999, 1.0, -0.001], (4, 2))
+        poses.append(array_to_landmarks(pose))
+    return poses
+
+
+def differing_pixels(expected, actual):
+    assert expected.shape == actual.shape and expected.dtype == actual.dtype
+    return int(np.any(expected != actual, axis=2).sum())
+
+
+def test_blank_grid_is_pixel_identical():
+    for width, height in SIZES:
+        assert differing_pixels(legacy_blank_grid_frame(width, height), blank_frame(width, height)) == 0
+        white = np.full((height, width, 3), 255, dtype=np.uint8)
+        assert differing_pixels(white, blank_frame(width, height, grid=False)) == 0
+
+
+def test_full_skeleton_is_pixel_identical():
+    for width, height in SIZES:
+        for pose in synthetic_poses(30) + edge_poses():
+            expected = legacy_skeleton_frame(pose, width, height)
+            assert differing_pixels(expected, FULL_SKELETON.render(pose, width, height)) == 0
+
+
+def test_simple_skeleton_is_pixel_identical():
+    for width, height in SIZES:
+        for pose in synthetic_poses(30) + edge_poses():
+            expected = legacy_simple_skeleton(pose, width, height)
+            assert differing_pixels(expected, SIMPLE_SKELETON.render(pose, width, height, grid=False)) == 0
+
+
+def test_reused_buffer_does_not_keep_the_previous_skeleton():
+    width, height = 640, 360
+    buffer = blank_frame(width, height, grid=False)
+    for pose in edge_poses(10):
+        frame = SIMPLE_SKELETON.render(pose, width, height, grid=False, out=buffer)
+        assert frame is buffer
+        assert differing_pixels(legacy_simple_skeleton(pose, width, height), frame) == 0
+
+
+def test_rendering_does_not_draw_on_the_cached_canvas():
+    width, height = 640, 360
+    pose = synthetic_poses(1)[0]
+    FULL_SKELETON.render(pose, width, height)
+    assert differing_pixels(legacy_blank_grid_frame(width, height), blank_frame(width, height)) == 0
+
+
+if __name__ == '__main__':
+    import pytest
+    raise SystemExit(pytest.main([__file__, '-q']))
@@ -0,0 +1,201 @@
+"""
+Video output through an ffmpeg subprocess, with OpenCV as the fallback.
+
+``cv2.VideoWriter`` with ``mp4v`` writes MPEG-4 Part 2, which browsers
+mostly refuse to play inline, and OpenCV builds rarely ship an H.264 writer.
+``VideoEncoder.open`` instead starts a local ffmpeg that reads raw BGR frames
+from a pipe and encodes them with libx264 (or libopenh264 when that is all
+the ffmpeg build has) to yuv420p H.264 with ``+faststart``, so the result
+plays and seeks in a browser straight away. Encoding runs in the ffmpeg
+process; writing a frame is only a pipe write, which releases the GIL.
+
+With the 'auto' backend and no ffmpeg or H.264 encoder, ``open`` writes
+``mp4v`` through ``cv2.VideoWriter`` as before; asking for the 'ffmpeg'
+backend explicitly fails when the encoder is built instead. Both writers
+have the same ``write``/``release``/``isOpened`` interface and are context
+managers: leaving the block releases the writer, or on an exception stops
+the encoder without waiting for it to finish the file.
+"""
+
+import functools
+import shutil
+import subprocess
+import threading
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+H264_ENCODERS = ('libx264', 'libopenh264')
+
+
+class EncoderError(Exception):
+    """Raised when the ffmpeg backend is unavailable, or ffmpeg exits before all frames were written"""
+
+
+@functools.lru_cache(maxsize=None)
+def available_encoders(ffmpeg: str) -> frozenset:
+    """Names of the H.264 encoders this ffmpeg build provides"""
+    try:
+        listing = subprocess.run([ffmpeg, '-hide_banner', '-encoders'], capture_output=True, text=True,
+                                 timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return frozenset()
+    names = {line.split()[1] for line in listing.splitlines() if len(line.split()) > 1}
+    return frozenset(name for name in H264_ENCODERS if name in names)
+
+
+class VideoEncoder:
+    """
+    Output video settings shared by every writer
+
+    Args:
+        backend: 'ffmpeg', 'opencv', or 'auto' (ffmpeg when it has an H.264 encoder)
+        codec: 'libx264', 'libopenh264', or 'auto' (the first of those available)
+        preset: x264 speed/size preset, e.g. 'veryfast'
+        crf: x264 constant rate factor; lower is better quality, 23 is x264's default
+        threads: Encoder threads; 0 lets ffmpeg choose
+    """
+
+    def __init__(self, backend: str = 'auto', codec: str = 'auto', preset: str = 'veryfast', crf: int = 23,
+                 threads: int = 0, ffmpeg: Optional[str] = None):
+        if backend not in ('auto', 'ffmpeg', 'opencv'):
+            raise ValueError(f"Unknown video encoder backend {backend!r}; use 'auto', 'ffmpeg' or 'opencv'")
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.ffmpeg = ffmpeg or shutil.which('ffmpeg')
+        self.codec = None
+        if backend != 'opencv' and self.ffmpeg:
+            encoders = available_encoders(self.ffmpeg)
+            if codec == 'auto':
+                self.codec = next((name for name in H264_ENCODERS if name in encoders), None)
+            elif codec in encoders:
+                self.codec = codec
+        if self.codec is None and backend != 'opencv':
+            missing = 'ffmpeg' if not self.ffmpeg else f"an ffmpeg with {'an H.264 encoder' if codec == 'auto' else codec}"
+            if backend == 'ffmpeg':
+                raise EncoderError(f"Video encoder 'ffmpeg' needs {missing} on PATH")
+            print(f"⚠️ No {missing} found - writing videos as OpenCV mp4v, which browsers may not play inline")
+
+    @property
+    def backend(self) -> str:
+        return 'ffmpeg' if self.codec else 'opencv'
+
+    def options(self) -> Dict:
+        """Constructor arguments reproducing this encoder, e.g. in a worker process"""
+        return {'backend': self.backend, 'codec': self.codec or 'auto', 'preset': self.preset, 'crf': self.crf,
+                'threads': self.threads, 'ffmpeg': self.ffmpeg}
+
+    def open(self, path: str, fps: float, width: int, height: int):
+        """Writer for a ``width`` x ``height`` BGR video at ``path``; call ``release`` when done"""
+        if self.codec:
+            return FFmpegWriter(self, path, fps, width, height)
+        return OpenCVWriter(path, fps, width, height)
+
+
+class OpenCVWriter:
+    """``cv2.VideoWriter`` with mp4v, with the same context-manager interface as FFmpegWriter"""
+
+    def __init__(self, path: str, fps: float, width: int, height: int):
+        self.path = path
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+
+    def isOpened(self) -> bool:
+        return self._writer.isOpened()
+
+    def write(self, frame: np.ndarray):
+        self._writer.write(frame)
+
+    def release(self):
+        self._writer.release()
+
+    abort = release
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FFmpegWriter:
+    """Pipes raw BGR frames into an ffmpeg process that encodes H.264 MP4"""
+
+    def __init__(self, encoder: VideoEncoder, path: str, fps: float, width: int, height: int):
+        self.path = path
+        self.shape = (height, width, 3)
+        command = [
+            encoder.ffmpeg, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', f'{fps or 30:g}', '-i', '-',
+            '-an', '-c:v', encoder.codec,
+        ]
+        if encoder.codec == 'libx264':
+            command += ['-preset', encoder.preset, '-crf', str(encoder.crf)]
+        command += [
+            '-threads', str(encoder.threads),
+            # yuv420p (what browsers decode) needs even dimensions
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart', path,
+        ]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._stderr = b''
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, name='ffmpeg-stderr', daemon=True)
+        self._stderr_thread.start()
+        self._released = False
+        self.frames_written = 0
+
+    def _drain_stderr(self):
+        # Read continuously so a chatty ffmpeg can never block on a full pipe
+        self._stderr = self._process.stderr.read()
+
+    def isOpened(self) -> bool:
+        return self._process.poll() is None
+
+    def write(self, frame: np.ndarray):
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame of shape {frame.shape} written to a {self.shape} video")
+        try:
+            self._process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast('B'))
+        except (BrokenPipeError, ValueError):
+            self._released = True
+            self._finish()
+            raise EncoderError(f"ffmpeg stopped encoding {self.path}: {self._stderr.decode(errors='replace').strip()}")
+        self.frames_written += 1
+
+    def release(self):
+        """Finish the file; raises EncoderError if ffmpeg failed"""
+        if self._released:
+            return
+        self._released = True
+        returncode = self._finish()
+        if returncode != 0:
+            raise EncoderError(f"ffmpeg exited with {returncode} encoding {self.path}: "
+                               f"{self._stderr.decode(errors='replace').strip()}")
+
+    def abort(self):
+        """Stop ffmpeg without finishing the file, e.g. when the analysis failed"""
+        if self._released:
+            return
+        self._released = True
+        self._process.kill()
+        self._finish()
+
+    def _finish(self) -> int:
+        """Close ffmpeg's input and reap the process; returns its exit code"""
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self._process.wait()
+        self._stderr_thread.join()
+        return returncode
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.release()
+        else:
+            self.abort()